@@ -7,8 +7,7 @@ class AdmetRequest(BaseModel):
     smiles: Optional[str] = None
 
 
-class AdmetResponse(BaseModel):
-    ok: bool
+class AdmetPrediction(BaseModel):
     absorption: Optional[Dict[str, Any]] = None
     distribution: Optional[Dict[str, Any]] = None
     metabolism: Optional[Dict[str, Any]] = None
@@ -16,4 +15,8 @@ class AdmetResponse(BaseModel):
     toxicity: Optional[Dict[str, Any]] = None
     overallAssessment: Optional[str] = None
     regulatoryOutlook: Optional[str] = None
+
+
+class AdmetResponse(AdmetPrediction):
+    ok: bool
     error: Optional[str] = None
@@ -1,4 +1,4 @@
-from typing import List, Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 from pydantic import BaseModel, Field
 
 Strategy = Literal['genetic', 'transformer', 'rnn', 'graph-ml']
@@ -21,6 +21,17 @@ class GeneratorRequest(BaseModel):
     count: int = Field(10, ge=1, le=200)
     strategy: Strategy = 'transformer'
     seedSmiles: Optional[str] = None
+    # only return candidates no earlier request for this target/constraints has seen
+    fresh: bool = False
+    # weighted: single score from DesiredProps; pareto: non-dominated fronts, ties by score
+    ranking: Literal['weighted', 'pareto'] = 'weighted'
+
+class ProposedCandidate(BaseModel):
+    smiles: str = Field(..., min_length=1)
+    rationale: Optional[str] = None
+
+class CandidateBatch(BaseModel):
+    candidates: List[ProposedCandidate] = []
 
 class CandidateProps(BaseModel):
     toxicity: Optional[dict] = None
@@ -39,9 +50,13 @@ class Candidate(BaseModel):
     filtered: bool = False
     score: float = 0.0
     properties: Optional[CandidateProps] = None
+    ranks: Optional[Dict[str, int]] = None  # 1-based rank per objective
+    paretoFront: Optional[int] = None
 
 class GeneratorResponse(BaseModel):
     ok: bool
     total: int
     generated: List[Candidate]
+    partial: bool = False  # True when the request deadline cut generation/enrichment short
+    search: Optional[Dict[str, Any]] = None  # genetic strategy: generations, molecules evaluated, seconds
     error: Optional[str] = None
@@ -0,0 +1,25 @@
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel
+
+JobStatus = Literal['queued', 'running', 'succeeded', 'failed', 'cancelled']
+
+class JobInfo(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    progress: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    cancelRequested: bool = False
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @classmethod
+    def from_job(cls, job: Dict[str, Any]) -> "JobInfo":
+        return cls(**{k: v for k, v in job.items() if k in cls.model_fields}, cancelRequested=job.get('cancel', False))
+
+class JobList(BaseModel):
+    total: int
+    counts: Dict[str, int]
+    jobs: List[JobInfo]
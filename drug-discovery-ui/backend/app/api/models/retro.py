@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class RetroConstraints(BaseModel):
@@ -42,6 +42,23 @@ class RetroMeta(BaseModel):
     alternatives: Dict[str, List[str]] = {}
 
 
+class RetroPlan(BaseModel):
+    routes: List[RetroRoute] = []
+    meta: Optional[RetroMeta] = None
+
+    @model_validator(mode='before')
+    @classmethod
+    def _default_route_ids(cls, data: Any) -> Any:
+        # The model frequently omits route ids; number them instead of rejecting the route
+        if isinstance(data, dict) and isinstance(data.get('routes'), list):
+            data = dict(data)
+            data['routes'] = [
+                {**r, 'id': r.get('id') or f"R{i+1}"} if isinstance(r, dict) else r
+                for i, r in enumerate(data['routes'])
+            ]
+        return data
+
+
 class RetroResponse(BaseModel):
     ok: bool
     routes: List[RetroRoute] = []
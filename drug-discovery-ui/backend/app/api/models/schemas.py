@@ -47,6 +47,21 @@ class PropertyPrediction(BaseModel):
     bbbPenetration: BBBModel
     lipinskiRules: LipinskiModel
 
+class KeyedPropertyPrediction(PropertyPrediction):
+    id: str
+
+class PropertyPredictionBatch(BaseModel):
+    results: List[KeyedPropertyPrediction] = []
+
+class ToxicityPrediction(BaseModel):
+    toxicity: ToxicityModel
+
+class KeyedToxicityPrediction(ToxicityPrediction):
+    id: str
+
+class ToxicityPredictionBatch(BaseModel):
+    results: List[KeyedToxicityPrediction] = []
+
 class PropertyPredictionResponse(BaseModel):
     success: bool
     molecule: str
@@ -55,6 +70,13 @@ class PropertyPredictionResponse(BaseModel):
     error: Optional[str] = None
     heuristic: Optional[bool] = False
 
+class BatchPropertyRequest(BaseModel):
+    molecules: List[MoleculeRequest] = Field(..., min_length=1, max_length=200)
+
+class BatchPropertyResponse(BaseModel):
+    total: int
+    results: List[PropertyPredictionResponse]
+
 class ExplainRequest(BaseModel):
     molecule: str
     property: str
@@ -1,16 +1,23 @@
-from fastapi import APIRouter
-from ..models.admet import AdmetRequest, AdmetResponse
+from fastapi import APIRouter, Depends, Request, Response
+from ..models.admet import AdmetPrediction, AdmetRequest, AdmetResponse
 from ...services.openai_service import OpenAIService
-from ...core.config import get_settings
+from ...core.deadline import Deadline
+from ...core.dependencies import get_openai_service, request_deadline
+from ...core.idempotency import idempotent
+from ...utils.response_cache import cached_response
 
 router = APIRouter(prefix="/admet")
 
 
 @router.post('/analyze', response_model=AdmetResponse)
-async def analyze(req: AdmetRequest):
+async def analyze(req: AdmetRequest, request: Request, response: Response, _deadline: Deadline = Depends(request_deadline()),
+                  oa: OpenAIService = Depends(get_openai_service)):
+    return await idempotent(request, response, "admet", req, lambda: _analyze(req, oa), AdmetResponse)
+
+
+@cached_response("admet", OpenAIService.admet_predict, AdmetPrediction)
+async def _analyze(req: AdmetRequest, oa: OpenAIService) -> AdmetResponse:
     try:
-        settings = get_settings()
-        oa = OpenAIService(model=settings.OPENAI_MODEL)
         obj = await oa.admet_predict(req.molecule, req.smiles)
         if not obj:
             return AdmetResponse(ok=False, error='Empty ADMET response')
@@ -1,57 +1,134 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, Query, Request, Response, HTTPException
 from ..models.docking import DockingRequest, DockingResponse, DockingAnalysis, BindingSite, Interaction, Pose
+from ..models.jobs import JobInfo
 from ...services.openai_service import OpenAIService
+from ...services.identity_service import molecule_key
 from ...core.config import get_settings
+from ...core.deadline import Deadline
+from ...core.dependencies import get_openai_service, request_deadline
+from ...core.idempotency import idempotent
+from ...core.jobs import job_runner
+from ...core import http_cache
+from ...utils.response_cache import cached_response
 from ...utils.chemo_utils import is_valid_smiles, comprehensive_validation, normalize_smiles
+from ...utils.sse import sse_event, sse_response, iter_once
 
 router = APIRouter(prefix="/docking")
 
+def _prepare(req: DockingRequest) -> Tuple[Optional[str], Optional[str]]:
+    """Validate the ligand in place and build the protein summary. Returns (summary, error)."""
+    # Validate ligand SMILES if provided
+    if req.ligand and isinstance(req.ligand, str):
+        # Try to extract SMILES from ligand description
+        if req.ligand.startswith("SMILES:"):
+            ligand_smiles = req.ligand.replace("SMILES:", "").strip()
+            if not is_valid_smiles(ligand_smiles):
+                return None, f"Invalid ligand SMILES: {ligand_smiles}"
+            # Canonicalize
+            canonical = normalize_smiles(ligand_smiles)
+            if canonical:
+                req.ligand = f"SMILES: {canonical}"
+    
+    # Build a simple protein summary from the provided source
+    summary = (req.proteinData or '').strip()
+    if req.proteinSource == 'pdb_id':
+        summary = f"PDB ID: {req.proteinData}"
+    elif req.proteinSource == 'url':
+        summary = f"Protein URL: {req.proteinData}"
+    return summary, None
+
+
+async def _cache_identity(req: DockingRequest) -> DockingRequest:
+    """The request with its ligand replaced by the canonical identity the molecule routes key on."""
+    ligand = req.ligand.strip()
+    if ligand.startswith("SMILES:"):
+        ligand = ligand[len("SMILES:"):].strip()
+        if not is_valid_smiles(ligand):
+            # _prepare rejects it and the error is not cached
+            return req
+    return req.model_copy(update={"ligand": await molecule_key("ligand", ligand)})
+
+
+def _to_analysis(obj: dict) -> DockingAnalysis:
+    return DockingAnalysis(
+        preparationSteps=obj.get('preparationSteps', []),
+        sites=[BindingSite(**s) for s in obj.get('sites', [])],
+        poseScore=obj.get('poseScore'),
+        bindingEnergy=obj.get('bindingEnergy'),
+        interactions=[Interaction(**i) for i in obj.get('interactions', [])],
+        comparedBinders=obj.get('comparedBinders', []),
+        affinity=obj.get('affinity'),
+        ic50=obj.get('ic50'),
+        ki=obj.get('ki'),
+        selectivityNotes=obj.get('selectivityNotes'),
+        energyDecomposition=obj.get('energyDecomposition'),
+        confidence=obj.get('confidence'),
+        poses=[Pose(**p) for p in obj.get('poses', [])],
+    )
+
+
 @router.post('/analyze', response_model=DockingResponse)
-async def analyze(req: DockingRequest):
+async def analyze(req: DockingRequest, request: Request, response: Response, _deadline: Deadline = Depends(request_deadline()),
+                  oa: OpenAIService = Depends(get_openai_service)):
+    return await idempotent(request, response, "docking", req, lambda: _analyze(req, oa), DockingResponse)
+
+
+@router.post('/analyze/jobs', response_model=JobInfo, status_code=202)
+async def submit_analysis(req: DockingRequest):
+    """Queue /analyze as a background job; poll /jobs/{id} and fetch /jobs/{id}/result."""
+    return JobInfo.from_job(await job_runner.submit("docking", req))
+
+
+async def _analyze_job(req: DockingRequest, report) -> DockingResponse:
+    return await _analyze(req, get_openai_service(get_settings()))
+
+
+job_runner.register("docking", DockingRequest, _analyze_job)
+
+
+@cached_response("docking", _prepare, OpenAIService._docking_messages, OpenAIService.docking_analyze, DockingAnalysis,
+                 canonical=_cache_identity)
+async def _analyze(req: DockingRequest, oa: OpenAIService) -> DockingResponse:
     try:
-        # Validate ligand SMILES if provided
-        if req.ligand and isinstance(req.ligand, str):
-            # Try to extract SMILES from ligand description
-            if req.ligand.startswith("SMILES:"):
-                ligand_smiles = req.ligand.replace("SMILES:", "").strip()
-                if not is_valid_smiles(ligand_smiles):
-                    return DockingResponse(ok=False, error=f"Invalid ligand SMILES: {ligand_smiles}")
-                # Canonicalize
-                canonical = normalize_smiles(ligand_smiles)
-                if canonical:
-                    req.ligand = f"SMILES: {canonical}"
-        
-        # Build a simple protein summary from the provided source
-        summary = (req.proteinData or '').strip()
-        if req.proteinSource == 'pdb_id':
-            summary = f"PDB ID: {req.proteinData}"
-        elif req.proteinSource == 'url':
-            summary = f"Protein URL: {req.proteinData}"
-        settings = get_settings()
-        oa = OpenAIService(model=settings.OPENAI_MODEL)
+        summary, error = _prepare(req)
+        if error:
+            return DockingResponse(ok=False, error=error)
         obj = await oa.docking_analyze(summary, req.ligand, req.params.model_dump())
         if not obj:
             return DockingResponse(ok=False, error="OpenAI returned empty analysis")
-        anal = DockingAnalysis(
-            preparationSteps=obj.get('preparationSteps', []),
-            sites=[BindingSite(**s) for s in obj.get('sites', [])],
-            poseScore=obj.get('poseScore'),
-            bindingEnergy=obj.get('bindingEnergy'),
-            interactions=[Interaction(**i) for i in obj.get('interactions', [])],
-            comparedBinders=obj.get('comparedBinders', []),
-            affinity=obj.get('affinity'),
-            ic50=obj.get('ic50'),
-            ki=obj.get('ki'),
-            selectivityNotes=obj.get('selectivityNotes'),
-            energyDecomposition=obj.get('energyDecomposition'),
-            confidence=obj.get('confidence'),
-            poses=[Pose(**p) for p in obj.get('poses', [])],
-        )
-        return DockingResponse(ok=True, analysis=anal)
+        return DockingResponse(ok=True, analysis=_to_analysis(obj))
     except Exception as e:
         return DockingResponse(ok=False, error=str(e))
 
 
+@router.post('/analyze/stream')
+async def analyze_stream(req: DockingRequest, _deadline: Deadline = Depends(request_deadline(120)),
+                         oa: OpenAIService = Depends(get_openai_service)):
+    """
+    SSE variant of /analyze. Each analysis field is sent as a validated
+    ``field`` event (list fields also item by item as ``item``) as soon as the
+    model closes it; ``done`` carries the full DockingResponse.
+    """
+    summary, error = _prepare(req)
+    if error:
+        return sse_response(iter_once(sse_event(DockingResponse(ok=False, error=error).model_dump(), "error")))
+
+    async def events():
+        try:
+            async for path, value in oa.docking_analyze_stream(summary, req.ligand, req.params.model_dump()):
+                if not path:
+                    yield sse_event(DockingResponse(ok=True, analysis=_to_analysis(value)).model_dump(), "done")
+                elif len(path) == 2:
+                    yield sse_event({"name": path[0], "index": path[1], "value": value}, "item")
+                else:
+                    yield sse_event({"name": path[0], "value": value}, "field")
+        except Exception as e:
+            yield sse_event(DockingResponse(ok=False, error=str(e)).model_dump(), "error")
+
+    return sse_response(events())
+
+
 @router.post('/validate-ligand')
 async def validate_ligand(payload: dict):
     """
@@ -64,7 +141,28 @@ async def validate_ligand(payload: dict):
     
     if not smiles:
         raise HTTPException(status_code=400, detail='SMILES is required for ligand validation')
-    
+    return _ligand_report(ligand_name, smiles)
+
+
+@router.get('/validate-ligand')
+async def validate_ligand_get(request: Request, response: Response, smiles: str = Query(..., min_length=1),
+                              ligand_name: str = Query('')):
+    """
+    Cacheable GET form of /validate-ligand; 304 on a matching If-None-Match
+    before any RDKit work (the ETag is derived from the input).
+    """
+    ligand_name, smiles = ligand_name.strip(), smiles.strip()
+    if not smiles:
+        raise HTTPException(status_code=400, detail='SMILES is required for ligand validation')
+    etag = http_cache.make_etag("validate-ligand", http_cache.VALIDATION_VERSION, ligand_name, smiles)
+    unchanged = http_cache.not_modified(request, "validate-ligand", etag)
+    if unchanged:
+        return unchanged
+    http_cache.apply(response, "validate-ligand", etag)
+    return _ligand_report(ligand_name, smiles)
+
+
+def _ligand_report(ligand_name: str, smiles: str) -> dict:
     if not is_valid_smiles(smiles):
         return {
             'ligand_name': ligand_name,
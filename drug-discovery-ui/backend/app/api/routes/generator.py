@@ -1,45 +1,123 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from typing import Any, Callable, Optional
+
+from fastapi import APIRouter, Depends, Request, Response, HTTPException
 from ..models.generator import GeneratorRequest, GeneratorResponse, Candidate
+from ..models.jobs import JobInfo
 from ...services.generator_service import GeneratorService
+from ...services.candidate_pool import CandidatePool
+from ...core.config import get_settings
+from ...core.deadline import Deadline, current_deadline
+from ...core.dependencies import request_deadline
+from ...core.idempotency import idempotent
+from ...core.jobs import job_runner
+from ...utils.sse import sse_event, sse_response
 from ...utils.chemo_utils import (
     is_valid_smiles,
     normalize_smiles,
     comprehensive_validation,
     score_candidate,
+    unknown_groups,
 )
 
 router = APIRouter(prefix="/generator")
 
+
+def _check_groups(req: GeneratorRequest) -> None:
+    """Reject functional groups that would otherwise be silently dropped from the constraint."""
+    unknown = unknown_groups(req.constraints.groups)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown functional groups: {', '.join(unknown)}")
+
+
 @router.post('/run', response_model=GeneratorResponse)
-async def run_generation(req: GeneratorRequest):
+async def run_generation(req: GeneratorRequest, request: Request, response: Response, deadline: Deadline = Depends(request_deadline())):
+    _check_groups(req)
+    return await idempotent(request, response, "generator", req, lambda: _run_generation(req, deadline), GeneratorResponse)
+
+
+@router.post('/run/stream')
+async def run_generation_stream(req: GeneratorRequest, deadline: Deadline = Depends(request_deadline(120))):
+    """
+    SSE variant of /run. Each candidate is sent as a ``candidate`` event as
+    soon as it passes validation and the constraint filter, then as an
+    ``enriched`` event (smiles, properties, score) once its properties are
+    predicted; ``done`` carries the ranked GeneratorResponse. Closing the
+    connection cancels the remaining generation and enrichment.
+    """
+    _check_groups(req)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def events():
+        task = asyncio.create_task(_run_generation(req, deadline, emit=lambda event, data: queue.put_nowait((event, data))))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (item := await queue.get()) is not None:
+                yield sse_event(item[1], item[0])
+            result = task.result()
+            yield sse_event(result.model_dump(), "done" if result.ok else "error")
+        finally:
+            # client went away (or the stream ended): stop paying for completions nobody reads
+            task.cancel()
+
+    return sse_response(events())
+
+
+@router.post('/run/jobs', response_model=JobInfo, status_code=202)
+async def submit_generation(req: GeneratorRequest):
+    """Queue /run as a background job; poll /jobs/{id} for progress and /jobs/{id}/result."""
+    _check_groups(req)
+    return JobInfo.from_job(await job_runner.submit("generator", req))
+
+
+async def _generation_job(req: GeneratorRequest, report) -> GeneratorResponse:
+    progress = {"requested": req.count, "candidates": 0, "enriched": 0}
+
+    def emit(event: str, data: Any) -> None:
+        if event == "candidate":
+            progress["candidates"] += 1
+        elif event == "enriched":
+            progress["enriched"] += 1
+        report(dict(progress))
+
+    return await _run_generation(req, current_deadline.get(), emit=emit)
+
+
+job_runner.register("generator", GeneratorRequest, _generation_job)
+
+
+async def _run_generation(req: GeneratorRequest, deadline: Deadline,
+                          emit: Optional[Callable[[str, Any], None]] = None) -> GeneratorResponse:
+    emit = emit or (lambda event, data: None)
     try:
-        svc = GeneratorService()
-        raw = await svc.propose_smiles(req.model_dump())
+        svc = GeneratorService(deadline=deadline)
+        desired = req.properties.model_dump()
+        # earlier requests for the same target/constraints already paid for these
+        pool = await CandidatePool.load(req.target, req.constraints.model_dump(), served=req.fresh)
+        drawn = pool.draw(req.count, desired, fresh=req.fresh)
+        for c in drawn:
+            emit("candidate", Candidate(**c).model_dump())
+        constraints = req.constraints.model_dump()
+        validated, rejected = [], []
+
+        def accept(batch: list) -> None:
+            # proposals that break the constraints are dropped locally and replaced by another round
+            kept, dropped = svc.apply_constraints(_validate(batch), constraints)
+            validated.extend(kept)
+            rejected.extend(dropped)
+            for c in kept:
+                emit("candidate", Candidate(**c).model_dump())
+
+        for _ in range(1 + max(0, get_settings().GENERATOR_FILTER_ROUNDS)):
+            shortfall = req.count - len(drawn) - len(validated)
+            if shortfall <= 0 or svc.used_mock or svc.partial:
+                break
+            exclude = pool.smiles() + [c['smiles'] for c in validated] + rejected
+            await svc.propose_smiles({**req.model_dump(), 'count': shortfall}, exclude=exclude, on_batch=accept)
         
-        # Validate each SMILES using RDKit
-        validated = []
-        for candidate in raw:
-            smiles = candidate.get('smiles')
-            if not smiles:
-                continue
-            
-            # Try to validate
-            try:
-                if not is_valid_smiles(smiles):
-                    continue
-                
-                # Normalize SMILES
-                canonical = normalize_smiles(smiles)
-                if canonical:
-                    candidate['smiles'] = canonical
-                    candidate['valid'] = True
-                    candidate['unique'] = candidate.get('unique', True)
-                    candidate['synthesizable'] = candidate.get('synthesizable', True)
-                    candidate['filtered'] = candidate.get('filtered', False)
-                    validated.append(candidate)
-            except Exception as e:
-                print(f"Validation error for {smiles}: {e}")
-                continue
+        if not svc.used_mock:
+            pool.add(validated)
+        validated = drawn + validated
         
         # If no valid candidates, return mock data
         if not validated:
@@ -49,17 +127,26 @@ async def run_generation(req: GeneratorRequest):
                 {'smiles': 'c1ccccc1', 'rationale': 'Benzene ring', 'valid': True, 'unique': True, 'synthesizable': True, 'filtered': False, 'score': 62.3},
                 {'smiles': 'CC(=O)Nc1ccc(O)cc1', 'rationale': 'Paracetamol-like', 'valid': True, 'unique': True, 'synthesizable': True, 'filtered': False, 'score': 81.2},
             ]
+            for c in validated:
+                emit("candidate", Candidate(**c).model_dump())
         
         # Score and rank candidates
-        ranked = await svc.enrich_properties_and_rank(validated, req.properties.model_dump())
+        ranked = await svc.enrich_properties_and_rank(
+            validated, desired, req.ranking, top=req.count,
+            on_enriched=lambda smi, props: emit("enriched", {'smiles': smi, 'properties': props, 'score': score_candidate(props, desired)}),
+        )
         top = ranked[: req.count]
+        pool.record(top)
+        await pool.save()
         
-        print(f"Returning {len(top)} candidates")
+        print(f"Returning {len(top)} candidates" + (" (partial: deadline reached)" if svc.partial else ""))
         
         return GeneratorResponse(
             ok=True,
             total=len(top),
-            generated=[Candidate(**c) for c in top]
+            generated=[Candidate(**c) for c in top],
+            partial=svc.partial,
+            search=svc.ga_stats,
         )
     except Exception as e:
         print(f"Generation error: {e}")
@@ -68,6 +155,34 @@ async def run_generation(req: GeneratorRequest):
         return GeneratorResponse(ok=False, total=0, generated=[], error=str(e))
 
 
+def _validate(raw: list) -> list:
+    """Validate each proposed SMILES using RDKit, keeping canonical forms."""
+    validated = []
+    for candidate in raw:
+        smiles = candidate.get('smiles')
+        if not smiles:
+            continue
+        
+        # Try to validate
+        try:
+            if not is_valid_smiles(smiles):
+                continue
+            
+            # Normalize SMILES
+            canonical = normalize_smiles(smiles)
+            if canonical:
+                candidate['smiles'] = canonical
+                candidate['valid'] = True
+                candidate['unique'] = candidate.get('unique', True)
+                candidate['synthesizable'] = candidate.get('synthesizable', True)
+                candidate['filtered'] = candidate.get('filtered', False)
+                validated.append(candidate)
+        except Exception as e:
+            print(f"Validation error for {smiles}: {e}")
+            continue
+    return validated
+
+
 @router.post('/validate-batch')
 async def validate_batch(payload: dict):
     """
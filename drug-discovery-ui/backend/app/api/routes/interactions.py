@@ -1,32 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from ..models.interactions import InteractionRequest, InteractionResponse, InteractionPair
 from ...core.config import Settings, get_settings
-from ...core.dependencies import require_openai
-from ...services.openai_service import OpenAIService
-from ...utils.molecule_utils import cache, cache_key_molecule, rate_limiter
+from ...core.dependencies import get_openai_service, require_openai
+from ...services.identity_service import molecule_key
+from ...services.prefetcher import prefetcher
+from ...utils.molecule_utils import rate_limiter
+from ...utils.swr import cached_call
 from ...utils.chemo_utils import is_valid_smiles, comprehensive_validation
 
 router = APIRouter(prefix="/interactions")
 
-@router.post('/analyze', response_model=InteractionResponse)
-async def analyze_interactions(payload: InteractionRequest, settings: Settings = Depends(require_openai)):
-    drugs = [d.strip() for d in payload.drugs if d and d.strip()]
-    if len(drugs) < 2:
-        raise HTTPException(status_code=400, detail='At least two drugs required')
-    
-    if len(drugs) > 5:
-        raise HTTPException(status_code=400, detail='Maximum 5 drugs per interaction analysis')
+async def _interactions_job(params: dict):
+    """Cache key and loader for an interaction check (also used by the prefetcher)."""
+    drugs = params["drugs"]
+    key = await molecule_key('interx', *drugs, ordered=False)
+    svc = get_openai_service(get_settings())
 
-    if not rate_limiter.allow('interactions'):
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail='Rate limit exceeded')
-
-    key = cache_key_molecule('interx:' + '|'.join(sorted(drugs)))
-    cached = cache.get(key)
-    if cached:
-        return cached
-
-    svc = OpenAIService(model=settings.OPENAI_MODEL)
-    try:
+    async def load():
         raw = await svc.analyze_interactions(drugs)
         if not raw:
             # heuristic fallback
@@ -46,12 +36,34 @@ async def analyze_interactions(payload: InteractionRequest, settings: Settings =
                 heuristic=True,
                 error='heuristic'
             )
-            cache.set(key, resp.model_dump())
-            return resp
+            return resp.model_dump()
         # Validate shape using Pydantic by constructing InteractionResponse
-        resp = InteractionResponse(**raw)
-        cache.set(key, resp.model_dump())
-        return resp
+        return InteractionResponse(**raw).model_dump()
+
+    return key, load
+
+
+prefetcher.register("interx", _interactions_job)
+
+
+@router.post('/analyze', response_model=InteractionResponse)
+async def analyze_interactions(payload: InteractionRequest, settings: Settings = Depends(require_openai)):
+    drugs = [d.strip() for d in payload.drugs if d and d.strip()]
+    if len(drugs) < 2:
+        raise HTTPException(status_code=400, detail='At least two drugs required')
+    
+    if len(drugs) > 5:
+        raise HTTPException(status_code=400, detail='Maximum 5 drugs per interaction analysis')
+
+    if not await rate_limiter.allow('interactions'):
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail='Rate limit exceeded')
+
+    params = {"drugs": drugs}
+    key, load = await _interactions_job(params)
+    prefetcher.observe(key, "interx", params)
+
+    try:
+        return await cached_call(key, load)
     except Exception as e:
         # heuristic on error
         resp = InteractionResponse(
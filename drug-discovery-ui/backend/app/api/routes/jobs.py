@@ -0,0 +1,32 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from ..models.jobs import JobInfo, JobList, JobStatus
+from ...core.jobs import job_runner
+
+router = APIRouter(prefix="/jobs")
+
+
+@router.get('', response_model=JobList)
+async def list_jobs(status: Optional[JobStatus] = None, limit: int = Query(50, ge=1, le=500)):
+    jobs = await job_runner.list(status, limit)
+    return JobList(total=len(jobs), counts=await job_runner.counts(), jobs=[JobInfo.from_job(j) for j in jobs])
+
+
+@router.get('/{job_id}', response_model=JobInfo)
+async def job_status(job_id: str):
+    return JobInfo.from_job(await job_runner.get(job_id))
+
+
+@router.get('/{job_id}/result')
+async def job_result(job_id: str):
+    """The job's response (same shape as the synchronous route), once it has finished."""
+    job = await job_runner.get(job_id)
+    if job['result'] is None:
+        raise HTTPException(status_code=409, detail=job['error'] or f"Job is {job['status']}")
+    return job['result']
+
+
+@router.delete('/{job_id}', response_model=JobInfo)
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or ask the worker running it to stop."""
+    return JobInfo.from_job(await job_runner.cancel(job_id))
@@ -0,0 +1,54 @@
+import asyncio
+
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+from ...core.metrics import usage_metrics
+from ...core import idempotency
+from ...utils.molecule_utils import cache
+from ...utils import response_cache, swr
+from ...services import identity_service
+from ...services.prefetcher import prefetcher
+from ...core.jobs import job_runner
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get("/usage")
+async def llm_usage(format: str = Query("json", description="json|prometheus")):
+    """Prompt/completion tokens and latency per (route, task), most expensive first."""
+    if format == "prometheus":
+        return PlainTextResponse(usage_metrics.prometheus(), media_type="text/plain; version=0.0.4")
+    rows = usage_metrics.snapshot()
+    return {
+        "totals": {
+            "calls": sum(r["calls"] for r in rows),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in rows),
+            "completion_tokens": sum(r["completion_tokens"] for r in rows),
+            "total_tokens": sum(r["total_tokens"] for r in rows),
+        },
+        "usage": rows,
+    }
+
+
+@router.get("/cache")
+async def cache_stats(format: str = Query("json", description="json|prometheus")):
+    """Hit/miss/eviction counters and current size of each response cache tier."""
+    # tier stats query the shared server and the disk database
+    stats = {**await asyncio.to_thread(cache.stats), "swr": dict(swr.stats), "identity": dict(identity_service.stats),
+             "responses": dict(response_cache.stats), "idempotency": dict(idempotency.stats)}
+    if format == "prometheus":
+        lines = [f'cache_{k}{{tier="{tier}"}} {v}' for tier, st in stats.items() for k, v in st.items() if v is not None]
+        return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+    return stats
+
+
+@router.get("/jobs")
+async def job_stats():
+    """Background job counters for this process and queue size by status."""
+    return await job_runner.snapshot()
+
+
+@router.get("/prefetch")
+async def prefetch_stats(limit: int = Query(20, ge=1, le=500)):
+    """Most requested cache keys as seen by the prefetcher, and its refresh counters."""
+    return prefetcher.snapshot(limit)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from ...api.models.schemas import (
     MoleculeRequest,
     MoleculeResponse,
@@ -6,11 +8,20 @@ from ...api.models.schemas import (
     PropertyPrediction,
     ExplainRequest,
     ExplainResponse,
+    BatchPropertyRequest,
+    BatchPropertyResponse,
 )
 from ...core.config import get_settings, Settings
-from ...core.dependencies import require_openai
+from ...core.dependencies import get_openai_service, require_openai
+from ...core import http_cache
 from ...services.openai_service import OpenAIService
-from ...utils.molecule_utils import cache, cache_key_molecule, rate_limiter
+from ...services import property_predictor
+from ...services.identity_service import molecule_key, molecule_key_local
+from ...services.prefetcher import prefetcher
+from ...utils.molecule_utils import cache, rate_limiter
+from ...utils.sse import sse_response, text_events
+from ...utils.swr import cached_call, store, unwrap
+from ...utils.response_cache import cached_response
 from ...utils.chemo_utils import (
     is_valid_smiles,
     comprehensive_validation,
@@ -29,15 +40,15 @@ async def test_analysis(
     name = payload.molecule.strip()
     smiles = (payload.smiles or '').strip() or None
     
-    if not rate_limiter.allow("global"):
+    if not await rate_limiter.allow("global"):
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
 
     # Validate SMILES if provided
     if smiles and not is_valid_smiles(smiles):
         raise HTTPException(status_code=400, detail=f"Invalid SMILES: {smiles}")
 
-    key = cache_key_molecule(name)
-    cached = cache.get(key)
+    key = await molecule_key("analysis", smiles or name)
+    cached = await cache.aget(key)
     if cached:
         return MoleculeResponse(success=True, analysis=cached, molecule=name)
 
@@ -52,10 +63,15 @@ async def test_analysis(
 
 # Compatibility endpoint for current frontend (/api/chat)
 @router.post("/compat-chat")
-async def compat_chat(payload: MoleculeRequest, settings: Settings = Depends(require_openai)):
+async def compat_chat(payload: MoleculeRequest, settings: Settings = Depends(require_openai),
+                      svc: OpenAIService = Depends(get_openai_service)):
+    return await _compat_chat(payload, svc, settings)
+
+
+@cached_response("compat_chat", OpenAIService._analyze_molecule_messages)
+async def _compat_chat(payload: MoleculeRequest, svc: OpenAIService, settings: Settings) -> dict:
     # mirror shape used by front-end chatAboutMolecule
     name = payload.molecule.strip()
-    svc = OpenAIService(model=settings.OPENAI_MODEL)
     try:
         analysis = await svc.analyze_molecule(name)
         return {"ok": True, "model": settings.OPENAI_MODEL, "content": analysis}
@@ -63,6 +79,18 @@ async def compat_chat(payload: MoleculeRequest, settings: Settings = Depends(req
         return {"ok": False, "error": "OpenAI API error", "details": str(e)}
 
 
+@router.post("/compat-chat/stream")
+async def compat_chat_stream(payload: MoleculeRequest, settings: Settings = Depends(require_openai),
+                             svc: OpenAIService = Depends(get_openai_service)):
+    """SSE variant of compat-chat: ``token`` events as text arrives, then the usual payload in ``done``."""
+    name = payload.molecule.strip()
+    return sse_response(text_events(
+        svc.analyze_molecule_stream(name),
+        done=lambda text: {"ok": True, "model": settings.OPENAI_MODEL, "content": text},
+        error=lambda e: {"ok": False, "error": "OpenAI API error", "details": str(e)},
+    ))
+
+
 @router.post("/validate-structure")
 async def validate_structure(payload: MoleculeRequest):
     """
@@ -72,7 +100,27 @@ async def validate_structure(payload: MoleculeRequest):
     smiles = (payload.smiles or '').strip()
     if not smiles:
         raise HTTPException(status_code=400, detail="SMILES is required for structure validation")
-    
+    return _structure_report(smiles)
+
+
+@router.get("/validate-structure")
+async def validate_structure_get(request: Request, response: Response, smiles: str = Query(..., min_length=1)):
+    """
+    Cacheable GET form of /validate-structure. The ETag comes from the SMILES
+    and the validation code version, so revalidation returns 304 without running RDKit.
+    """
+    smiles = smiles.strip()
+    if not smiles:
+        raise HTTPException(status_code=400, detail="SMILES is required for structure validation")
+    etag = http_cache.make_etag("validate-structure", http_cache.VALIDATION_VERSION, smiles)
+    unchanged = http_cache.not_modified(request, "validate-structure", etag)
+    if unchanged:
+        return unchanged
+    http_cache.apply(response, "validate-structure", etag)
+    return _structure_report(smiles)
+
+
+def _structure_report(smiles: str) -> dict:
     validation_report = comprehensive_validation(smiles)
     
     return {
@@ -98,63 +146,139 @@ async def validate_structure(payload: MoleculeRequest):
     }
 
 
+async def _props_job(params: dict):
+    """Cache key and loader for a predict-properties query (also used by the prefetcher)."""
+    name, smiles = params["molecule"], params.get("smiles")
+    # one entry per molecule, whether it was asked for by name or SMILES
+    key = await molecule_key("props", smiles or name, extra=property_predictor.cache_extra())
+    svc = get_openai_service(get_settings())
+
+    async def load():
+        raw = await property_predictor.predict(svc, name, smiles)
+        # Validate into Pydantic model to enforce schema
+        return PropertyPrediction(**raw).model_dump() if raw else None
+
+    return key, load
+
+
+prefetcher.register("props", _props_job)
+
+
+def _require_predictor(settings: Settings = Depends(get_settings)) -> Settings:
+    # local and hybrid modes can answer from RDKit alone
+    return require_openai(settings) if property_predictor.mode() == "llm" else settings
+
+
 @router.post("/predict-properties", response_model=PropertyPredictionResponse)
 async def predict_properties(
     payload: MoleculeRequest,
-    settings: Settings = Depends(require_openai),
+    settings: Settings = Depends(_require_predictor),
 ):
     name = payload.molecule.strip()
     smiles = (payload.smiles or '').strip() or None
     
-    if not rate_limiter.allow("predict-properties"):
+    if not await rate_limiter.allow("predict-properties"):
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
 
     # Validate SMILES if provided
     if smiles and not is_valid_smiles(smiles):
         raise HTTPException(status_code=400, detail=f"Invalid SMILES: {smiles}")
 
-    key = cache_key_molecule(f"props:{name}:{smiles or ''}")
-    cached = cache.get(key)
-    if cached:
-        return PropertyPredictionResponse(success=True, molecule=name, smiles=smiles, predictions=cached)
-
-    svc = OpenAIService(model=settings.OPENAI_MODEL)
+    params = {"molecule": name, "smiles": smiles}
+    key, load = await _props_job(params)
+    prefetcher.observe(key, "props", params)
     try:
-        raw = await svc.predict_properties(name, smiles)
-        if not raw:
-            # Heuristic fallback: minimal estimate flagged as heuristic
-            heuristic = {
-                "toxicity": {"score": 30, "level": "medium", "explanation": "Heuristic placeholder: model unavailable."},
-                "solubility": {"score": 50, "details": "Heuristic placeholder."},
-                "drugLikeness": {"score": 50, "passes": True},
-                "bioavailability": {"percentage": 50, "explanation": "Heuristic placeholder."},
-                "bbbPenetration": {"canCross": False, "confidence": "low"},
-                "lipinskiRules": {"passes": True, "violations": []},
-            }
-            return PropertyPredictionResponse(success=True, molecule=name, smiles=smiles, predictions=PropertyPrediction(**heuristic), error="heuristic", heuristic=True)
-        # Validate into Pydantic model to enforce schema
-        predictions = PropertyPrediction(**raw)
-        cache.set(key, predictions.model_dump())
+        predictions = await cached_call(key, load)
+        if not predictions:
+            return _heuristic_response(name, smiles, "No model prediction available.")
         return PropertyPredictionResponse(success=True, molecule=name, smiles=smiles, predictions=predictions)
     except Exception as e:
-        # Heuristic on failure
-        heuristic = {
-            "toxicity": {"score": 30, "level": "medium", "explanation": f"Heuristic due to error: {e}"},
-            "solubility": {"score": 50, "details": "Heuristic placeholder."},
-            "drugLikeness": {"score": 50, "passes": True},
-            "bioavailability": {"percentage": 50, "explanation": "Heuristic placeholder."},
-            "bbbPenetration": {"canCross": False, "confidence": "low"},
-            "lipinskiRules": {"passes": True, "violations": []},
-        }
-        return PropertyPredictionResponse(success=True, molecule=name, smiles=smiles, predictions=PropertyPrediction(**heuristic), error="heuristic", heuristic=True)
+        return _heuristic_response(name, smiles, f"Prediction failed: {e}")
+
+
+def _heuristic_response(name: str, smiles: Optional[str], explanation: str) -> PropertyPredictionResponse:
+    """RDKit-only prediction flagged as heuristic, or a failure when there is no usable SMILES."""
+    local = property_predictor.predict_local(smiles)
+    if local is None:
+        return PropertyPredictionResponse(success=False, molecule=name, smiles=smiles,
+                                          error=f"{explanation} No SMILES to compute properties locally.")
+    return PropertyPredictionResponse(success=True, molecule=name, smiles=smiles, predictions=PropertyPrediction(**local),
+                                      error=f"{explanation} Computed locally with RDKit.", heuristic=True)
+
+
+@router.post("/predict-properties/batch", response_model=BatchPropertyResponse)
+async def predict_properties_batch(
+    payload: BatchPropertyRequest,
+    settings: Settings = Depends(_require_predictor),
+    svc: OpenAIService = Depends(get_openai_service),
+):
+    """
+    Predict properties for up to 200 molecules. Cached predictions are reused
+    (same entries as /predict-properties); the rest go through property_predictor,
+    several per completion when the LLM is involved. The rate limit is charged
+    per completion, as if each had been a /predict-properties call.
+    """
+    if not await rate_limiter.allow("predict-properties"):
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
+
+    items = [(m.molecule.strip(), (m.smiles or '').strip() or None) for m in payload.molecules]
+    for _, smiles in items:
+        if smiles and not is_valid_smiles(smiles):
+            raise HTTPException(status_code=400, detail=f"Invalid SMILES: {smiles}")
+
+    extra = property_predictor.cache_extra()
+
+    async def key_for(name: str, smiles: Optional[str]) -> str:
+        # a SMILES resolves locally; only bare names may need PubChem
+        return molecule_key_local("props", smiles, extra=extra) if smiles else await molecule_key("props", name, extra=extra)
+
+    keys = await asyncio.gather(*(key_for(name, smiles) for name, smiles in items))
+    distinct = list(dict.fromkeys(keys))
+    entries = await asyncio.gather(*(cache.aget(key) for key in distinct))
+    found: dict = {key: unwrap(entry)[0] for key, entry in zip(distinct, entries) if entry is not None}
+    # one prediction per distinct molecule
+    todo = {key: item for key, item in zip(keys, items) if key not in found}
+    # the check above paid for one completion
+    extra_cost = property_predictor.completions_for(svc, len(todo)) - 1
+    if extra_cost > 0 and not await rate_limiter.allow("predict-properties", cost=extra_cost):
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
+    if todo:
+        predicted = await property_predictor.predict_many(svc, list(todo.values()))
+        for key, raw in zip(todo, predicted):
+            if raw:
+                found[key] = PropertyPrediction(**raw).model_dump()
+                store(key, found[key])
+
+    results = []
+    for key, (name, smiles) in zip(keys, items):
+        if found.get(key):
+            results.append(PropertyPredictionResponse(success=True, molecule=name, smiles=smiles, predictions=found[key]))
+        else:
+            results.append(_heuristic_response(name, smiles, "No model prediction available."))
+    return BatchPropertyResponse(total=len(results), results=results)
 
 
 @router.post("/explain", response_model=ExplainResponse)
-async def explain_property(payload: ExplainRequest, settings: Settings = Depends(require_openai)):
-    svc = OpenAIService(model=settings.OPENAI_MODEL)
+async def explain_property(payload: ExplainRequest, _settings: Settings = Depends(require_openai),
+                           svc: OpenAIService = Depends(get_openai_service)):
+    return await _explain(payload, svc)
+
+
+@cached_response("explain", OpenAIService._explain_messages)
+async def _explain(payload: ExplainRequest, svc: OpenAIService) -> ExplainResponse:
     try:
         text = await svc.explain_simple(payload.molecule, payload.property, payload.context)
         return ExplainResponse(success=True, text=text)
     except Exception as e:
         return ExplainResponse(success=False, text=f"Unable to explain: {e}")
 
+
+@router.post("/explain/stream")
+async def explain_property_stream(payload: ExplainRequest, _settings: Settings = Depends(require_openai),
+                                  svc: OpenAIService = Depends(get_openai_service)):
+    """SSE variant of /explain: ``token`` events as text arrives, then an ExplainResponse in ``done``."""
+    return sse_response(text_events(
+        svc.explain_simple_stream(payload.molecule, payload.property, payload.context),
+        done=lambda text: ExplainResponse(success=True, text=text).model_dump(),
+        error=lambda e: ExplainResponse(success=False, text=f"Unable to explain: {e}").model_dump(),
+    ))
@@ -3,17 +3,18 @@ from ..models.reactions import ReactionRequest, ReactionResponse, ReactionProduc
 from ...core.config import Settings, get_settings
 from ...core.dependencies import require_openai
 from ...services.openai_service import OpenAIService
-from ...utils.molecule_utils import cache, cache_key_molecule, rate_limiter
+from ...services.identity_service import molecule_key
+from ...utils.molecule_utils import cache, rate_limiter
 
 router = APIRouter(prefix="/reactions")
 
 @router.post('/predict', response_model=ReactionResponse)
 async def predict_reaction(payload: ReactionRequest, settings: Settings = Depends(require_openai)):
-    if not rate_limiter.allow('reactions'):
+    if not await rate_limiter.allow('reactions'):
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail='Rate limit exceeded')
 
-    key = cache_key_molecule('rxn:' + payload.reactantA.strip().lower() + '|' + payload.reactantB.strip().lower() + '|' + (payload.conditions.catalyst or ''))
-    cached = cache.get(key)
+    key = await molecule_key('rxn', payload.reactantA, payload.reactantB, extra=payload.conditions.catalyst or '')
+    cached = await cache.aget(key)
     if cached:
         return cached
 
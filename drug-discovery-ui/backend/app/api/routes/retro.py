@@ -1,34 +1,85 @@
-from fastapi import APIRouter
-from ..models.retro import RetroRequest, RetroResponse, RetroRoute, RetroStep, RetroMeta
+from fastapi import APIRouter, Depends, Request, Response
+from ..models.retro import RetroPlan, RetroRequest, RetroResponse, RetroRoute, RetroStep, RetroMeta
+from ..models.jobs import JobInfo
 from ...services.openai_service import OpenAIService
 from ...core.config import get_settings
+from ...core.deadline import Deadline
+from ...core.dependencies import get_openai_service, request_deadline
+from ...core.idempotency import idempotent
+from ...core.jobs import job_runner
+from ...utils.response_cache import cached_response
+from ...utils.sse import sse_event, sse_response
 
 router = APIRouter(prefix="/retro")
 
 
+def _to_response(obj: dict) -> RetroResponse:
+    routes = [
+        RetroRoute(
+            id=r.get('id') or f"R{i+1}",
+            steps=[RetroStep(**s) for s in r.get('steps', [])],
+            overallYield=r.get('overallYield'),
+            cost=r.get('cost'),
+            time=r.get('time'),
+            safety=r.get('safety'),
+            difficulty=r.get('difficulty'),
+            hazards=r.get('hazards'),
+            greenScore=r.get('greenScore'),
+            references=r.get('references'),
+        ) for i, r in enumerate(obj.get('routes', []))
+    ]
+    meta = obj.get('meta') or {}
+    return RetroResponse(ok=True, routes=routes, meta=RetroMeta(**meta) if meta else None)
+
+
 @router.post('/plan', response_model=RetroResponse)
-async def plan(req: RetroRequest):
+async def plan(req: RetroRequest, request: Request, response: Response, _deadline: Deadline = Depends(request_deadline()),
+               svc: OpenAIService = Depends(get_openai_service)):
+    return await idempotent(request, response, "retro", req, lambda: _plan(req, svc), RetroResponse)
+
+
+@router.post('/plan/jobs', response_model=JobInfo, status_code=202)
+async def submit_plan(req: RetroRequest):
+    """Queue /plan as a background job; poll /jobs/{id} and fetch /jobs/{id}/result."""
+    return JobInfo.from_job(await job_runner.submit("retro", req))
+
+
+async def _plan_job(req: RetroRequest, report) -> RetroResponse:
+    return await _plan(req, get_openai_service(get_settings()))
+
+
+job_runner.register("retro", RetroRequest, _plan_job)
+
+
+@cached_response("retro", OpenAIService._retro_messages, OpenAIService.retro_plan, RetroPlan)
+async def _plan(req: RetroRequest, svc: OpenAIService) -> RetroResponse:
     try:
-        settings = get_settings()
-        svc = OpenAIService(model=settings.OPENAI_MODEL)
         obj = await svc.retro_plan(req.target, req.constraints.model_dump(), req.starting, req.routes)
         if not obj:
             return RetroResponse(ok=False, error='Empty response from model')
-        routes = [
-            RetroRoute(
-                id=r.get('id') or f"R{i+1}",
-                steps=[RetroStep(**s) for s in r.get('steps', [])],
-                overallYield=r.get('overallYield'),
-                cost=r.get('cost'),
-                time=r.get('time'),
-                safety=r.get('safety'),
-                difficulty=r.get('difficulty'),
-                hazards=r.get('hazards'),
-                greenScore=r.get('greenScore'),
-                references=r.get('references'),
-            ) for i, r in enumerate(obj.get('routes', []))
-        ]
-        meta = obj.get('meta') or {}
-        return RetroResponse(ok=True, routes=routes, meta=RetroMeta(**meta) if meta else None)
+        return _to_response(obj)
     except Exception as e:
         return RetroResponse(ok=False, error=str(e))
+
+
+@router.post('/plan/stream')
+async def plan_stream(req: RetroRequest, _deadline: Deadline = Depends(request_deadline(120)),
+                      svc: OpenAIService = Depends(get_openai_service)):
+    """
+    SSE variant of /plan. Each route is sent as a ``route`` event as soon as
+    the model closes it, ``meta`` follows, and ``done`` carries the full RetroResponse.
+    """
+
+    async def events():
+        try:
+            async for path, value in svc.retro_plan_stream(req.target, req.constraints.model_dump(), req.starting, req.routes):
+                if not path:
+                    yield sse_event(_to_response(value).model_dump(), "done")
+                elif path[0] == 'routes' and len(path) == 2:
+                    yield sse_event({"index": path[1], "route": value}, "route")
+                elif path == ('meta',):
+                    yield sse_event(value, "meta")
+        except Exception as e:
+            yield sse_event(RetroResponse(ok=False, error=str(e)).model_dump(), "error")
+
+    return sse_response(events())
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 from ..models.structure import StructureResponse
 from ...services.structure_service import StructureService
 from ...services.openai_service import OpenAIService
-from ...utils.molecule_utils import cache, cache_key_molecule
-import json
+from ...core.deadline import Deadline
+from ...core.dependencies import request_deadline
+from ...core import http_cache
+from ...services.identity_service import molecule_key
+from ...utils.molecule_utils import cache
 
 router = APIRouter(prefix="/structure")
 
@@ -25,29 +28,56 @@ class StructureGenerationResponse(BaseModel):
     confidence: Optional[float] = None
     error: Optional[str] = None
 
+class AIStructure(BaseModel):
+    smiles: str
+    iupacName: Optional[str] = None
+    molecularFormula: Optional[str] = None
+    description: Optional[str] = None
+
 @router.get("")
-async def get_structure(query: str = Query(..., description="Name/SMILES/InChIKey"), format: str = Query("json")) -> StructureResponse:
-    key = cache_key_molecule(f"structure:{format}:{query.strip().lower()}")
-    cached = cache.get(key)
+async def get_structure(request: Request, response: Response,
+                        query: str = Query(..., description="Name/SMILES/InChIKey"), format: str = Query("json"),
+                        _deadline: Deadline = Depends(request_deadline())) -> StructureResponse:
+    # the etag index is keyed by the raw query so a revalidation needs no identity lookup
+    ident = f"{format}:{' '.join(query.split()).lower()}"
+    etag = await http_cache.indexed_etag("structure", ident)
+    unchanged = http_cache.not_modified(request, "structure", etag)
+    if unchanged:
+        return unchanged
+
+    resp, from_cache = await _load_structure(query, format)
+    if resp.ok:
+        if not (etag and from_cache):
+            etag = http_cache.index_etag("structure", ident, resp)
+        http_cache.apply(response, "structure", etag)
+    else:
+        response.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+async def _load_structure(query: str, format: str) -> Tuple[StructureResponse, bool]:
+    """(response, served from cache)"""
+    key = await molecule_key("structure", query, extra=format)
+    cached = await cache.aget(key)
     if cached:
-        return cached
+        return StructureResponse(**cached), True
 
     svc = StructureService()
     sdf = await svc.fetch_pubchem_sdf(query)
     if not sdf:
-        return StructureResponse(ok=False, format=format, error="Not found")
+        return StructureResponse(ok=False, format=format, error="Not found"), False
 
     if format == "sdf":
         resp = StructureResponse(ok=True, format="sdf", sdf=sdf)
         cache.set(key, resp.model_dump())
-        return resp
+        return resp, False
 
     js = svc.sdf_to_json(sdf)
     if not js:
-        return StructureResponse(ok=False, format="json", error="Failed to parse SDF")
+        return StructureResponse(ok=False, format="json", error="Failed to parse SDF"), False
     resp = StructureResponse(ok=True, format="json", data=js)  # type: ignore
     cache.set(key, resp.model_dump())
-    return resp
+    return resp, False
 
 @router.post("/generate-ai", response_model=StructureGenerationResponse)
 async def generate_structure_ai(req: StructureGenerationRequest) -> StructureGenerationResponse:
@@ -57,8 +87,8 @@ async def generate_structure_ai(req: StructureGenerationRequest) -> StructureGen
     """
     try:
         # Check cache first
-        cache_key = cache_key_molecule(f"ai_structure:{req.moleculeName.lower()}")
-        cached = cache.get(cache_key)
+        cache_key = await molecule_key("ai_structure", req.moleculeName)
+        cached = await cache.aget(cache_key)
         if cached:
             return StructureGenerationResponse(**cached)
         
@@ -73,19 +103,17 @@ async def generate_structure_ai(req: StructureGenerationRequest) -> StructureGen
             "Return JSON with: {\"smiles\": \"...\", \"iupacName\": \"...\", \"molecularFormula\": \"...\", \"description\": \"...\"}"
         )
         
-        response = await openai._chat(
-            messages=[
+        parsed = await openai._chat_json(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
+            AIStructure,
             temperature=0.3,
-            max_tokens=500
+            max_tokens=500,
+            task="generate_structure"
         )
         
-        content = openai._extract_content(response)
-        cleaned_json = openai._extract_json(content)
-        parsed = json.loads(cleaned_json)
-        
         result = StructureGenerationResponse(
             success=True,
             moleculeName=req.moleculeName,
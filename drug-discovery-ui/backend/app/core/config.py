@@ -8,6 +8,127 @@ class Settings(BaseSettings):
     AZURE_OPENAI_API_VERSION: str = "2024-02-15-preview"
     FRONTEND_URL: str = "http://localhost:5173"
     ENVIRONMENT: str = "development"
+    # JSON decoding: structured outputs need api-version >= 2024-08-01-preview, JSON mode >= 2023-12-01-preview
+    OPENAI_STRUCTURED_OUTPUTS: bool = True
+    OPENAI_JSON_REPAIR_ATTEMPTS: int = 1
+    # Prompt token budgets per task (input side); low-value context is trimmed to fit
+    PROMPT_BUDGET_DEFAULT: int = 3000
+    PROMPT_BUDGETS: dict[str, int] = {
+        "docking_analyze": 2500,
+        "explain_simple": 900,
+    }
+    # Request time budget in seconds (X-Request-Timeout header overrides, capped at the max);
+    # keep the default under the gateway's 30s connection cut-off
+    REQUEST_TIMEOUT_DEFAULT: float = 25.0
+    REQUEST_TIMEOUT_MAX: float = 300.0
+    # Concurrent Azure calls per generator run when enriching candidates (keep within deployment quota)
+    GENERATOR_ENRICH_CONCURRENCY: int = 8
+    # Candidate proposal: concurrent batches per run and top-up rounds for a shortfall after dedup
+    GENERATOR_PROPOSE_CONCURRENCY: int = 4
+    GENERATOR_TOPUP_ROUNDS: int = 2
+    # Extra proposal rounds to replace candidates dropped by the local constraint filter
+    GENERATOR_FILTER_ROUNDS: int = 2
+    # Candidates kept per (target, constraints) pool, shared by generator requests
+    GENERATOR_POOL_MAX: int = 1000
+    # Local genetic algorithm (strategy="genetic"): population, generation/time budget, pool size (0 = CPUs)
+    GA_POPULATION: int = 200
+    GA_GENERATIONS: int = 40
+    GA_TIME_BUDGET: float = 8.0
+    GA_CROSSOVER_RATE: float = 0.5
+    GA_MAX_HEAVY_ATOMS: int = 45
+    GA_WORKERS: int = 0
+    # Batched property prediction: completion budget per call, bounds on molecules per call,
+    # initial estimate of completion tokens per molecule (refined from observed output)
+    PROPS_BATCH_MAX_TOKENS: int = 4000
+    PROPS_BATCH_MAX_SIZE: int = 20
+    PROPS_BATCH_ITEM_TOKENS: int = 160
+    PROPS_BATCH_CONCURRENCY: int = 4
+    # Property prediction: "local" (RDKit only), "hybrid" (RDKit values, toxicity from the LLM)
+    # or "llm" (model only, RDKit as flagged fallback); applies to /molecule/predict-properties and the generator
+    PROPERTY_PREDICTOR_MODE: str = "llm"
+    # Background jobs (/jobs): SQLite queue ("" disables), jobs run at once per process, bound on queued+running
+    # jobs, time budget per job kind in seconds, restarts survived before a job fails, heartbeat/poll period
+    # (a running job without heartbeat for 3 periods is requeued) and how long finished jobs are kept
+    JOB_DB_PATH: str = "data/jobs.sqlite3"
+    JOB_WORKERS: int = 2
+    JOB_MAX_PENDING: int = 100
+    JOB_TIMEOUT_DEFAULT: float = 600.0
+    JOB_TIMEOUTS: dict[str, float] = {
+        "generator": 1800.0,
+    }
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_HEARTBEAT: float = 5.0
+    JOB_RETENTION: float = 7 * 86400.0
+    # Response cache front tier: "memory" (per process) or "shared" (RESP/Redis server
+    # at CACHE_SHARED_URL, e.g. python -m app.utils.resp_server, shared by all workers)
+    CACHE_BACKEND: str = "memory"
+    CACHE_SHARED_URL: str = "redis://127.0.0.1:6380/0"
+    # In-memory response cache: default TTL, LRU bounds and expiry sweep period
+    CACHE_TTL_SECONDS: int = 600
+    CACHE_MAX_ENTRIES: int = 4096
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_SWEEP_INTERVAL: float = 60.0
+    # Persistent tier behind the memory cache ("" disables); TTLs per task (cache key prefix)
+    CACHE_DISK_PATH: str = "data/cache.sqlite3"
+    CACHE_DISK_TTL_DEFAULT: float = 86400.0
+    CACHE_DISK_TTLS: dict[str, float] = {
+        "structure": 30 * 86400.0,
+        "ai_structure": 7 * 86400.0,
+        "props": 7 * 86400.0,
+        "rxn": 3 * 86400.0,
+        "interx": 3 * 86400.0,
+        "gen": 6 * 3600.0,
+    }
+    CACHE_WARM_ENTRIES: int = 2000
+    # Stale-while-revalidate (soft, hard) TTLs per task: stale entries are served
+    # between the two while one background refresh runs
+    CACHE_SWR_TTLS: dict[str, tuple[float, float]] = {
+        "props": (6 * 3600.0, 7 * 86400.0),
+        "interx": (6 * 3600.0, 3 * 86400.0),
+    }
+    # Molecule identity resolution (name/SMILES/InChIKey -> InChIKey) for cache keys;
+    # the synonyms file is a JSON object of name -> SMILES or InChIKey
+    IDENTITY_SYNONYMS_FILE: str = ""
+    IDENTITY_PUBCHEM_TIMEOUT: float = 5.0
+    IDENTITY_TTL: float = 30 * 86400.0
+    IDENTITY_NEGATIVE_TTL: float = 3600.0
+    # Background prefetch of popular entries: top-K keys (count-min sketch) with at least
+    # PREFETCH_MIN_HITS requests are refreshed PREFETCH_LEAD_SECONDS before going stale.
+    # Warmup items look like {"task": "props", "molecule": "aspirin"} or {"task": "interx", "drugs": [...]}
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_TOP_K: int = 100
+    PREFETCH_MIN_HITS: int = 3
+    PREFETCH_LEAD_SECONDS: float = 900.0
+    PREFETCH_INTERVAL: float = 60.0
+    PREFETCH_MAX_PER_MINUTE: int = 6
+    PREFETCH_MAX_INFLIGHT: int = 2
+    PREFETCH_DECAY_SECONDS: float = 3600.0
+    PREFETCH_WARMUP: list[dict] = []
+    # Outbound HTTP record/replay for offline load tests: "off" | "record" | "replay".
+    # Replay sleeps recorded latency x scale (0 = instant); recorded cache writes can seed the cache
+    HTTP_CASSETTE_MODE: str = "off"
+    HTTP_CASSETTE_PATH: str = "data/cassettes.sqlite3"
+    HTTP_REPLAY_LATENCY_SCALE: float = 0.0
+    CACHE_SEED_FROM_CASSETTE: bool = False
+    # Response-cache TTLs for LLM routes cached by request content and prompt version
+    CACHE_ROUTE_TTLS: dict[str, float] = {
+        "admet": 7 * 86400.0,
+        "docking": 86400.0,
+        "retro": 3 * 86400.0,
+        "explain": 7 * 86400.0,
+        "compat_chat": 86400.0,
+    }
+    # Cache-Control per deterministic route (GET /structure and the RDKit-only validators)
+    HTTP_CACHE_CONTROL: dict[str, str] = {
+        "structure": "public, max-age=86400, stale-while-revalidate=604800",
+        "validate-structure": "public, max-age=604800",
+        "validate-ligand": "public, max-age=604800",
+    }
+    # Idempotency-Key on expensive POST routes: results kept for IDEMPOTENCY_TTL seconds;
+    # a retry on another worker waits up to IDEMPOTENCY_WAIT seconds for the running attempt
+    IDEMPOTENCY_TTL: float = 86400.0
+    IDEMPOTENCY_LOCK_TTL: float = 600.0
+    IDEMPOTENCY_WAIT: float = 120.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,44 @@
+"""
+Per-request deadlines.
+A Deadline is created from the X-Request-Timeout header (or a route default)
+and stored in a context variable, so services deep in the call tree can shrink
+their own timeouts to the remaining budget and stop early with partial results.
+"""
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when the request's time budget is used up."""
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds: float) -> None:
+        self.budget = float(seconds)
+        self.expires_at = time.monotonic() + self.budget
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """Return ``default`` capped to the remaining budget; raise if nothing is left."""
+        left = self.remaining()
+        if left <= 0:
+            raise DeadlineExceeded(f"Request deadline of {self.budget:.1f}s exceeded")
+        return min(default, left)
+
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+
+def effective_timeout(default: float, deadline: Optional[Deadline] = None) -> float:
+    """Timeout for a downstream call: ``default`` shrunk to the active deadline, if any."""
+    deadline = deadline or current_deadline.get()
+    return deadline.timeout(default) if deadline else default
@@ -1,5 +1,9 @@
-from fastapi import Depends, HTTPException, status
+from functools import lru_cache
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, status
 from .config import get_settings, Settings
+from .deadline import Deadline, current_deadline
+from ..services.openai_service import OpenAIService
 
 
 def require_openai(settings: Settings = Depends(get_settings)) -> Settings:
@@ -7,3 +11,31 @@ def require_openai(settings: Settings = Depends(get_settings)) -> Settings:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail="OPENAI_API_KEY is not configured")
     return settings
+
+
+@lru_cache
+def _openai_service(model: str) -> OpenAIService:
+    return OpenAIService(model=model)
+
+
+def get_openai_service(settings: Settings = Depends(get_settings)) -> OpenAIService:
+    """
+    Shared OpenAIService for the configured deployment. The service is stateless
+    per call (deadlines come from the request context), so one instance serves all requests.
+    """
+    return _openai_service(settings.OPENAI_MODEL)
+
+
+def request_deadline(default: Optional[float] = None):
+    """
+    Dependency factory: start a Deadline for this request from the
+    X-Request-Timeout header (seconds) or ``default``, and make it current
+    for every service called while handling the request.
+    """
+    async def dependency(x_request_timeout: Optional[float] = Header(None)) -> Deadline:
+        settings = get_settings()
+        seconds = x_request_timeout or default or settings.REQUEST_TIMEOUT_DEFAULT
+        deadline = Deadline(max(0.1, min(seconds, settings.REQUEST_TIMEOUT_MAX)))
+        current_deadline.set(deadline)
+        return deadline
+    return dependency
@@ -0,0 +1,49 @@
+"""
+Client-disconnect cancellation for long-running handlers.
+FastAPI keeps running a handler after the client goes away; wrapping the
+work with cancel_on_disconnect cancels the task tree (and with it any
+in-flight httpx requests) as soon as the disconnect is noticed.
+"""
+import asyncio
+from typing import Awaitable, TypeVar
+
+from fastapi import HTTPException, Request
+
+T = TypeVar("T")
+
+# nginx convention for "client closed request"; never actually seen by the client
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T]) -> T:
+    """Await ``work``, cancelling it if the client disconnects first."""
+    task = asyncio.ensure_future(work)
+    disconnected = False
+
+    async def watch() -> None:
+        # The request body has already been read by the time the handler runs,
+        # so the watcher is the only consumer left on the receive channel.
+        nonlocal disconnected
+        while True:
+            message = await request.receive()
+            if message.get("type") == "http.disconnect":
+                disconnected = True
+                task.cancel()
+                return
+
+    watcher = asyncio.create_task(watch())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if disconnected:
+            print(f"[Disconnect] Client left {request.url.path}; cancelled upstream work")
+            raise ClientDisconnected()
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
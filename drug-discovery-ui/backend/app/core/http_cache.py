@@ -0,0 +1,83 @@
+"""
+HTTP conditional caching for deterministic endpoints.
+RDKit-only routes derive a strong ETag from their input plus the version of the
+code that computes the answer, so ``If-None-Match`` is answered with 304
+before any work is done. Routes whose content comes from elsewhere (PubChem)
+keep a small etag index next to the cached body instead. Cache-Control
+policies are configured per route in HTTP_CACHE_CONTROL.
+"""
+import hashlib
+import inspect
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from ..utils import chemo_utils
+from ..utils.molecule_utils import cache
+from ..utils.response_cache import prompt_version, request_hash
+from .config import get_settings
+
+try:
+    from rdkit import rdBase
+    _RDKIT_VERSION = rdBase.rdkitVersion
+except ImportError:
+    _RDKIT_VERSION = "none"
+
+# answers change only when the validation code or RDKit itself changes
+VALIDATION_VERSION = prompt_version(inspect.getsource(chemo_utils), _RDKIT_VERSION)
+
+
+def make_etag(*parts: Any) -> str:
+    return f'"{request_hash(*parts)[:32]}"'
+
+
+def content_etag(body: Any) -> str:
+    """ETag of a response body (pydantic model or JSON-compatible value)."""
+    if isinstance(body, BaseModel):
+        body = body.model_dump(mode="json")
+    blob = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def cache_headers(route: str, etag: Optional[str]) -> dict:
+    headers = {"Cache-Control": get_settings().HTTP_CACHE_CONTROL.get(route, "no-cache")}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified(request: Request, route: str, etag: Optional[str]) -> Optional[Response]:
+    """A 304 response if the client already holds ``etag``, else None."""
+    if etag and _matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(route, etag))
+    return None
+
+
+def apply(response: Response, route: str, etag: Optional[str]) -> None:
+    response.headers.update(cache_headers(route, etag))
+
+
+def _index_key(route: str, ident: str) -> str:
+    return f"etag:{route}:{ident}"
+
+
+async def indexed_etag(route: str, ident: str) -> Optional[str]:
+    """ETag last stored for ``ident`` (a few bytes; the body itself is not read)."""
+    return await cache.aget(_index_key(route, ident))
+
+
+def index_etag(route: str, ident: str, body: Any, ttl: Optional[float] = None) -> str:
+    etag = content_etag(body)
+    cache.set(_index_key(route, ident), etag, ttl=ttl)
+    return etag
@@ -0,0 +1,41 @@
+"""
+Process-wide httpx client.
+Reusing one AsyncClient keeps TLS connections to Azure OpenAI and PubChem
+alive between requests instead of paying a handshake per call. Timeouts are
+passed per request so callers can still bound each call by their deadline.
+"""
+import asyncio
+from typing import Optional
+
+import httpx
+
+from ..utils.cassette import RecordReplayTransport, get_store
+from .config import get_settings
+
+_client: Optional[httpx.AsyncClient] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client for the running event loop (recreated if the loop changed)."""
+    global _client, _loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _loop is not loop:
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        transport = None
+        store = get_store()
+        if store is not None:
+            settings = get_settings()
+            transport = RecordReplayTransport(httpx.AsyncHTTPTransport(limits=limits), store,
+                                              settings.HTTP_CASSETTE_MODE, settings.HTTP_REPLAY_LATENCY_SCALE)
+        _client = httpx.AsyncClient(timeout=60.0, limits=limits, transport=transport)
+        _loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _loop = None
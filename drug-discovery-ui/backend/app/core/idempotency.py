@@ -0,0 +1,131 @@
+"""
+Idempotency-Key support for expensive POST routes.
+A request carrying an ``Idempotency-Key`` header runs at most once per key:
+a retry while the first attempt is still running attaches to it, and a retry
+after it finished gets the stored result (marked ``Idempotent-Replayed: true``)
+until IDEMPOTENCY_TTL expires. Reusing a key with a different body is a 422.
+Stored results live in the response cache, so with the shared backend a retry
+landing on another worker waits for the attempt running elsewhere.
+"""
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type, TypeVar
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+
+from ..utils.molecule_utils import cache
+from ..utils.response_cache import request_hash, succeeded
+from .config import get_settings
+from .deadline import current_deadline
+from .disconnect import cancel_on_disconnect
+
+T = TypeVar("T")
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# storage key -> [task, request fingerprint, attached callers]
+_inflight: Dict[str, List[Any]] = {}
+
+stats = {"started": 0, "attached": 0, "replayed": 0, "waited": 0, "mismatched": 0}
+
+
+def _dump(result: Any) -> Any:
+    return result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+
+
+def _mismatch() -> HTTPException:
+    stats["mismatched"] += 1
+    return HTTPException(status_code=422, detail=f"{HEADER} was already used with a different request body")
+
+
+async def _lock(key: str, ttl: float) -> bool:
+    """True if this worker may run ``key``; fails open when the backend can't count."""
+    try:
+        count = await cache.tiers[0].aincr(f"idem-lock:{key}", ttl=ttl)
+    except NotImplementedError:
+        return True
+    return count <= 1
+
+
+async def _wait_elsewhere(key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Poll for the result of an attempt running on another worker."""
+    settings = get_settings()
+    deadline = current_deadline.get()
+    limit = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while time.monotonic() < limit and not (deadline and deadline.expired):
+        await asyncio.sleep(0.5)
+        stored = await cache.aget(key)
+        if stored is not None:
+            return stored
+        if await cache.tiers[0].aget(f"idem-lock:{key}") is None:
+            # the other attempt ended without a storable result
+            return None
+    raise HTTPException(status_code=409, detail=f"A request with this {HEADER} is still in progress")
+
+
+async def _run(key: str, fingerprint: str, work: Callable[[], Awaitable[T]]) -> T:
+    settings = get_settings()
+    try:
+        result = await work()
+        if succeeded(result):
+            cache.set(key, {"fingerprint": fingerprint, "result": _dump(result)}, ttl=settings.IDEMPOTENCY_TTL)
+        return result
+    finally:
+        cache.tiers[0].delete(f"idem-lock:{key}")
+
+
+async def idempotent(request: Request, response: Response, scope: str, body: Any,
+                     work: Callable[[], Awaitable[T]], model: Optional[Type[BaseModel]] = None) -> T:
+    """
+    Run ``work()`` for this request (cancelled if the client disconnects),
+    deduplicated by the request's Idempotency-Key within ``scope``. ``body``
+    is the request model the key must keep matching; ``model`` rebuilds a
+    stored result.
+    """
+    header = request.headers.get(HEADER)
+    if not header:
+        return await cancel_on_disconnect(request, work())
+    if len(header) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{HEADER} must be at most {MAX_KEY_LENGTH} characters")
+
+    key = f"idem:{scope}:{hashlib.sha256(header.encode('utf-8')).hexdigest()}"
+    fingerprint = request_hash(body)
+
+    stored = await cache.aget(key)
+    if stored is None and key not in _inflight:
+        locked = await _lock(key, get_settings().IDEMPOTENCY_LOCK_TTL)
+        # a retry on this worker may have started the attempt while the lock was taken
+        if not locked and key not in _inflight:
+            stats["waited"] += 1
+            stored = await cancel_on_disconnect(request, _wait_elsewhere(key, fingerprint))
+    entry = _inflight.get(key)
+    if stored is not None:
+        if stored.get("fingerprint") != fingerprint:
+            raise _mismatch()
+        stats["replayed"] += 1
+        response.headers["Idempotent-Replayed"] = "true"
+        result = stored.get("result")
+        return model(**result) if model else result
+
+    if entry is None:
+        stats["started"] += 1
+        entry = [asyncio.create_task(_run(key, fingerprint, work)), fingerprint, 0]
+        _inflight[key] = entry
+        entry[0].add_done_callback(lambda t: _inflight.pop(key, None) if _inflight.get(key) is entry else None)
+    elif entry[1] != fingerprint:
+        raise _mismatch()
+    else:
+        stats["attached"] += 1
+
+    task = entry[0]
+    entry[2] += 1
+    try:
+        # shield: a caller leaving must not cancel an attempt others are attached to
+        return await cancel_on_disconnect(request, asyncio.shield(task))
+    finally:
+        entry[2] -= 1
+        if entry[2] == 0 and not task.done():
+            task.cancel()
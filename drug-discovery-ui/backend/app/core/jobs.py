@@ -0,0 +1,218 @@
+"""
+Background jobs for long-running pipelines.
+Routes register a job kind with its request model and a handler; a submitted
+job is stored in the SQLite queue (JOB_DB_PATH) and its id returned at once.
+A lifespan task runs JOB_WORKERS jobs at a time, each under a Deadline of
+its kind's JOB_TIMEOUTS budget, and records progress, result or error in the
+queue. Jobs interrupted by a restart are picked up again, up to
+JOB_MAX_ATTEMPTS times; a cancel request reaches the job in whichever worker
+process runs it within one heartbeat. Queue statements run in a worker
+thread: with several processes sharing the database one can wait seconds for
+the write lock, and that must not stall the event loop.
+"""
+import asyncio
+from time import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from ..utils.job_store import JobStore
+from ..utils.response_cache import succeeded
+from .config import get_settings
+from .deadline import Deadline, current_deadline
+from .metrics import current_route
+
+# handler(request model, report(progress dict)) -> result (pydantic model or JSON-compatible)
+Handler = Callable[[BaseModel, Callable[[Dict[str, Any]], None]], Awaitable[Any]]
+
+# seconds past its deadline before a job that ignores it is cancelled outright
+_GRACE = 10.0
+# minimum seconds between progress writes for one job
+_PROGRESS_INTERVAL = 1.0
+
+
+class JobRunner:
+    def __init__(self):
+        self.kinds: Dict[str, Tuple[Type[BaseModel], Handler]] = {}
+        self.running: Dict[str, asyncio.Task] = {}
+        self.stats = {"submitted": 0, "started": 0, "succeeded": 0, "failed": 0, "cancelled": 0,
+                      "timed_out": 0, "requeued": 0}
+        self._store: Optional[JobStore] = None
+        self._cancelled: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        # progress writes in flight (held so they are not garbage-collected)
+        self._writes: Set["asyncio.Task[None]"] = set()
+
+    def register(self, kind: str, model: Type[BaseModel], handler: Handler) -> None:
+        self.kinds[kind] = (model, handler)
+
+    @property
+    def store(self) -> Optional[JobStore]:
+        path = get_settings().JOB_DB_PATH
+        if self._store is None and path:
+            self._store = JobStore(path)
+        return self._store
+
+    def _require_store(self) -> JobStore:
+        if self.store is None:
+            raise HTTPException(status_code=503, detail="Background jobs are disabled (JOB_DB_PATH is empty)")
+        return self.store
+
+    async def submit(self, kind: str, req: BaseModel) -> Dict[str, Any]:
+        store = self._require_store()
+        settings = get_settings()
+        pending = await asyncio.to_thread(store.counts)
+        if pending.get("queued", 0) + pending.get("running", 0) >= settings.JOB_MAX_PENDING:
+            raise HTTPException(status_code=429, detail="Too many pending jobs; try again later")
+        job = await asyncio.to_thread(store.create, kind, req.model_dump(mode="json"))
+        self.stats["submitted"] += 1
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    async def get(self, job_id: str) -> Dict[str, Any]:
+        job = await asyncio.to_thread(self._require_store().get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        return job
+
+    async def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._require_store().list, status, limit)
+
+    async def counts(self) -> Dict[str, int]:
+        return await asyncio.to_thread(self._require_store().counts)
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        await self.get(job_id)
+        job = await asyncio.to_thread(self.store.request_cancel, job_id)
+        task = self.running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+        return job
+
+    async def snapshot(self) -> Dict[str, Any]:
+        store = self.store
+        counts = await asyncio.to_thread(store.counts) if store else {}
+        return {**self.stats, "running_here": len(self.running), "by_status": counts}
+
+    def _reporter(self, job_id: str) -> Tuple[Callable[[Dict[str, Any]], None], Callable[[], Awaitable[None]]]:
+        """
+        (report, flush): report starts a write at most every _PROGRESS_INTERVAL
+        without waiting for it; flush writes the last one held back.
+        """
+        state: Dict[str, Any] = {"last": 0.0, "pending": None}
+
+        def report(progress: Dict[str, Any]) -> None:
+            now = time()
+            if now - state["last"] >= _PROGRESS_INTERVAL:
+                state["last"], state["pending"] = now, None
+                task = asyncio.create_task(asyncio.to_thread(self.store.progress, job_id, progress))
+                self._writes.add(task)
+                task.add_done_callback(self._writes.discard)
+            else:
+                state["pending"] = progress
+
+        async def flush() -> None:
+            if state["pending"] is not None:
+                await asyncio.to_thread(self.store.progress, job_id, state["pending"])
+        return report, flush
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        settings = get_settings()
+        job_id, kind = job["id"], job["kind"]
+        if kind not in self.kinds:
+            await asyncio.to_thread(self.store.finish, job_id, "failed", error=f"Unknown job kind: {kind}")
+            return
+        model, handler = self.kinds[kind]
+        budget = settings.JOB_TIMEOUTS.get(kind, settings.JOB_TIMEOUT_DEFAULT)
+        report, flush = self._reporter(job_id)
+
+        async def body() -> Any:
+            # services stop early with partial results when the budget runs out
+            current_deadline.set(Deadline(budget))
+            # LLM usage is filed under the job kind rather than the "-" of no request
+            current_route.set(f"job:{kind}")
+            return await handler(model(**job["payload"]), report)
+
+        self.stats["started"] += 1
+        print(f"[Jobs] Running {kind} job {job_id} (attempt {job['attempts']})")
+        task = asyncio.create_task(body())
+        self.running[job_id] = task
+        try:
+            result = await asyncio.wait_for(task, budget + _GRACE)
+            await flush()
+            if isinstance(result, BaseModel):
+                result = result.model_dump(mode="json")
+            ok = succeeded(result)
+            error = None if ok else (result.get("error") if isinstance(result, dict) else None) or "Job failed"
+            await asyncio.to_thread(self.store.finish, job_id, "succeeded" if ok else "failed", result=result, error=error)
+            self.stats["succeeded" if ok else "failed"] += 1
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            await asyncio.to_thread(self.store.finish, job_id, "failed", error=f"Job exceeded its {budget:.0f}s limit")
+        except asyncio.CancelledError:
+            if job_id not in self._cancelled:
+                # worker shutting down: leave the job for the next start
+                self.stats["requeued"] += 1
+                await asyncio.to_thread(self.store.requeue, job_id)
+                raise
+            self.stats["cancelled"] += 1
+            await asyncio.to_thread(self.store.finish, job_id, "cancelled")
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"[Jobs] {kind} job {job_id} failed: {e}")
+            await asyncio.to_thread(self.store.finish, job_id, "failed", error=str(e))
+        finally:
+            self.running.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+    async def _worker(self) -> None:
+        settings = get_settings()
+        while True:
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                # submissions in this process wake us; other processes' are seen on the next poll
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), settings.JOB_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _maintain(self) -> None:
+        settings = get_settings()
+        while True:
+            for job_id in await asyncio.to_thread(self.store.heartbeat, list(self.running)):
+                # cancel requested through another worker process
+                task = self.running.get(job_id)
+                if task is not None and job_id not in self._cancelled:
+                    self._cancelled.add(job_id)
+                    task.cancel()
+            requeued, failed = await asyncio.to_thread(self.store.recover, time() - 3 * settings.JOB_HEARTBEAT,
+                                                       settings.JOB_MAX_ATTEMPTS)
+            if requeued or failed:
+                print(f"[Jobs] Recovered {requeued} interrupted jobs ({failed} gave up)")
+                self._wake.set()
+            await asyncio.to_thread(self.store.purge, time() - settings.JOB_RETENTION)
+            await asyncio.sleep(settings.JOB_HEARTBEAT)
+
+    async def run(self) -> None:
+        """Lifespan task: resume interrupted jobs, then run queued ones on JOB_WORKERS workers."""
+        settings = get_settings()
+        if self.store is None:
+            return
+        self._wake = asyncio.Event()
+        tasks = [asyncio.create_task(self._maintain())]
+        tasks += [asyncio.create_task(self._worker()) for _ in range(max(1, settings.JOB_WORKERS))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_runner = JobRunner()
@@ -0,0 +1,84 @@
+"""
+In-process metrics for LLM usage.
+Token counts and latency are aggregated per (route, task) so the most
+expensive and slowest prompts can be found from /api/v1/metrics.
+"""
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+# Path of the inbound request currently being served; set by RouteTagMiddleware
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+
+class RouteTagMiddleware:
+    """ASGI middleware tagging the request context with its path for usage accounting."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_route.set(scope.get("path") or "-")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
+
+
+class UsageMetrics:
+    """Thread-safe token and latency counters keyed by (route, task)."""
+
+    FIELDS = ("calls", "errors", "prompt_tokens", "completion_tokens", "total_tokens", "latency_ms_total", "latency_ms_max")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(self, task: str, usage: Optional[Dict[str, Any]], latency_s: float,
+               error: bool = False, route: Optional[str] = None) -> None:
+        route = route or current_route.get()
+        usage = usage or {}
+        latency_ms = latency_s * 1000.0
+        with self._lock:
+            st = self._stats.setdefault((route, task), {f: 0 for f in self.FIELDS})
+            st["calls"] += 1
+            st["errors"] += 1 if error else 0
+            st["prompt_tokens"] += int(usage.get("prompt_tokens") or 0)
+            st["completion_tokens"] += int(usage.get("completion_tokens") or 0)
+            st["total_tokens"] += int(usage.get("total_tokens") or 0)
+            st["latency_ms_total"] += latency_ms
+            st["latency_ms_max"] = max(st["latency_ms_max"], latency_ms)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [(k, dict(v)) for k, v in self._stats.items()]
+        out = []
+        for (route, task), st in items:
+            calls = st["calls"] or 1
+            out.append({
+                "route": route,
+                "task": task,
+                **{k: round(v, 1) if isinstance(v, float) else v for k, v in st.items()},
+                "avg_total_tokens": round(st["total_tokens"] / calls, 1),
+                "avg_latency_ms": round(st["latency_ms_total"] / calls, 1),
+            })
+        return sorted(out, key=lambda x: x["total_tokens"], reverse=True)
+
+    def prometheus(self) -> str:
+        lines = []
+        for name in self.FIELDS:
+            metric = f"llm_{name}"
+            lines.append(f"# TYPE {metric} {'gauge' if name.endswith('_max') else 'counter'}")
+            for row in self.snapshot():
+                lines.append(f'{metric}{{route="{row["route"]}",task="{row["task"]}"}} {row[name]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+usage_metrics = UsageMetrics()
@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import get_settings
@@ -11,10 +14,49 @@ from .api.routes.docking import router as docking_router
 from .api.routes.admet import router as admet_router
 from .api.routes.retro import router as retro_router
 from .api.routes.feedback import router as feedback_router
+from .api.routes.metrics import router as metrics_router
+from .api.routes.jobs import router as jobs_router
+from .core.metrics import RouteTagMiddleware
+from .core.http_client import close_http_client
+from .core.jobs import job_runner
+from .utils.cassette import get_store, seed_cache
+from .services.prefetcher import prefetcher
+from .services import genetic_engine
+from .utils.molecule_utils import cache, sweep_periodically
 
 settings = get_settings()
 
-app = FastAPI(title="AI Drug Discovery API", version="0.1.0", openapi_url="/openapi.json")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    store = get_store()
+    if store is not None:
+        if settings.HTTP_CASSETTE_MODE == "record":
+            cache.listeners.append(store.record_cache_set)
+        if settings.CACHE_SEED_FROM_CASSETTE:
+            seeded = await asyncio.to_thread(seed_cache, store, cache)
+            print(f"[Cassette] Seeded {seeded} cache entries")
+    warmed = await asyncio.to_thread(cache.warm, settings.CACHE_WARM_ENTRIES)
+    if warmed:
+        print(f"[Cache] Warmed {warmed} entries from disk")
+    tasks = [asyncio.create_task(sweep_periodically(cache, settings.CACHE_SWEEP_INTERVAL))]
+    if settings.PREFETCH_ENABLED and settings.OPENAI_API_KEY:
+        tasks.append(asyncio.create_task(prefetcher.run()))
+    if settings.JOB_DB_PATH:
+        tasks.append(asyncio.create_task(job_runner.run()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        # let running jobs put themselves back in the queue
+        await asyncio.gather(*tasks, return_exceptions=True)
+        cache.close()
+        genetic_engine.shutdown_pool()
+        await close_http_client()
+
+
+app = FastAPI(title="AI Drug Discovery API", version="0.1.0", openapi_url="/openapi.json", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,7 +64,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Idempotent-Replayed"],
 )
+app.add_middleware(RouteTagMiddleware)
 
 api_prefix = "/api/v1"
 app.include_router(health_router, prefix=api_prefix)
@@ -35,6 +79,8 @@ app.include_router(docking_router, prefix=api_prefix)
 app.include_router(admet_router, prefix=api_prefix)
 app.include_router(retro_router, prefix=api_prefix)
 app.include_router(feedback_router, prefix=api_prefix)
+app.include_router(metrics_router, prefix=api_prefix)
+app.include_router(jobs_router, prefix=api_prefix)
 
 # Frontend compatibility route: /api/chat
 @app.post("/api/chat")
@@ -0,0 +1,147 @@
+"""
+Candidate pool shared by generator requests.
+Validated candidates are kept per canonical (target, constraints), together
+with their validation flags and predicted properties, so a request for 20
+molecules after one for 50 is served from the pool and the LLM is only asked
+for the shortfall. The pool lives in the response cache (and so in its disk
+tier) under the "gen" task TTL: a small index per pool, each member under its
+own key, and "served" counts as atomic counters in the front tier, so
+concurrent requests on one pool never overwrite each other's updates.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from ..core.config import get_settings
+from ..utils.ranking import score_many
+from ..utils.molecule_utils import cache, cache_key_molecule
+from . import property_predictor
+
+# fields of a generator candidate that are worth keeping between requests
+_MEMBER_FIELDS = ("smiles", "rationale", "valid", "unique", "synthesizable", "filtered", "properties")
+
+
+def pool_key(target: str, constraints: Optional[Dict[str, Any]]) -> str:
+    """
+    Key for a (target, constraints) pair, ignoring case, spacing and group
+    order. Members carry predicted properties, so each predictor mode keeps
+    its own pool.
+    """
+    constraints = constraints or {}
+    groups = sorted({g.strip().lower() for g in (constraints.get("groups") or "").split(",") if g.strip()})
+    canon = {
+        "target": " ".join((target or "").split()).lower(),
+        "mwMin": constraints.get("mwMin"),
+        "mwMax": constraints.get("mwMax"),
+        "groups": groups,
+        "predictor": property_predictor.cache_extra(),
+    }
+    digest = hashlib.sha256(json.dumps(canon, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+    return cache_key_molecule(f"gen:pool:{digest}")
+
+
+def _member_key(pool: str, smiles: str) -> str:
+    return f"{pool}:{hashlib.sha256(smiles.encode('utf-8')).hexdigest()[:24]}"
+
+
+def _served_key(pool: str, smiles: str) -> str:
+    return _member_key(pool, smiles) + ":served"
+
+
+class CandidatePool:
+    def __init__(self, key: str, members: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.key = key
+        # canonical SMILES -> member (candidate fields plus "served" count and "added" time)
+        self.members: Dict[str, Dict[str, Any]] = members or {}
+        # members added or enriched since load, and members returned by this request
+        self._changed: Set[str] = set()
+        self._served: List[str] = []
+
+    @classmethod
+    async def load(cls, target: str, constraints: Optional[Dict[str, Any]], served: bool = False) -> "CandidatePool":
+        """
+        The pool for (target, constraints). ``served`` also reads the served
+        counts, which draw(fresh=True) needs.
+        """
+        key = pool_key(target, constraints)
+        index = await cache.aget(key) or {}
+        smiles = list(index)
+        found = await asyncio.gather(*(cache.aget(_member_key(key, smi)) for smi in smiles))
+        counts = [0] * len(smiles)
+        if served:
+            counts = await asyncio.gather(*(cache.tiers[0].aget(_served_key(key, smi)) for smi in smiles))
+        members = {}
+        for smi, member, count in zip(smiles, found, counts):
+            # a member whose own entry expired before the index is simply gone
+            if member is not None:
+                members[smi] = {**member, "served": int(count or 0), "added": index[smi].get("added", 0)}
+        return cls(key, members)
+
+    def smiles(self) -> List[str]:
+        return list(self.members)
+
+    def draw(self, count: int, desired: Optional[Dict[str, Any]] = None, fresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Up to ``count`` usable members, best first: enriched members by score
+        for ``desired``, then members not yet enriched. With ``fresh`` only
+        members never returned by an earlier request are drawn (the pool must
+        have been loaded with ``served``).
+        """
+        usable = [m for m in self.members.values() if m.get("valid") and not m.get("filtered")]
+        if fresh:
+            usable = [m for m in usable if not m.get("served")]
+
+        scores = score_many([m.get("properties") for m in usable], desired)
+        order = sorted(range(len(usable)), key=lambda i: (usable[i].get("properties") is not None, scores[i]), reverse=True)
+        return [{k: usable[i].get(k) for k in _MEMBER_FIELDS} for i in order[:count]]
+
+    def add(self, candidates: Iterable[Dict[str, Any]]) -> None:
+        now = time.time()
+        for c in candidates:
+            smi = c.get("smiles")
+            if smi and smi not in self.members:
+                self.members[smi] = {**{k: c.get(k) for k in _MEMBER_FIELDS}, "served": 0, "added": now}
+                self._changed.add(smi)
+
+    def record(self, served: Iterable[Dict[str, Any]]) -> None:
+        """Keep enrichment results and count what was returned to the client."""
+        for c in served:
+            member = self.members.get(c.get("smiles"))
+            if member is None:
+                continue
+            member["served"] = member.get("served", 0) + 1
+            self._served.append(c["smiles"])
+            if c.get("properties") and not member.get("properties"):
+                member["properties"] = c["properties"]
+                self._changed.add(c["smiles"])
+
+    async def save(self) -> None:
+        """
+        Write new and newly enriched members under their own keys, add the
+        served counts with increments and merge this request's members into
+        the index another request may have changed meanwhile.
+        """
+        front = cache.tiers[0]
+        settings = get_settings()
+        ttl = settings.CACHE_DISK_TTLS.get("gen", settings.CACHE_DISK_TTL_DEFAULT)
+        for smi in self._changed:
+            cache.set(_member_key(self.key, smi), {k: self.members[smi].get(k) for k in _MEMBER_FIELDS})
+        await asyncio.gather(*(front.aincr(_served_key(self.key, smi), ttl=ttl) for smi in self._served))
+        if self._changed:
+            index = await cache.aget(self.key) or {}
+            for smi in self._changed:
+                entry = index.get(smi) or {"added": self.members[smi]["added"], "enriched": False}
+                entry["enriched"] = entry.get("enriched", False) or self.members[smi].get("properties") is not None
+                index[smi] = entry
+            if len(index) > settings.GENERATOR_POOL_MAX:
+                # evict the oldest members that never received a prediction first
+                order = sorted(index.items(), key=lambda kv: (kv[1].get("enriched", False), kv[1].get("added", 0)))
+                for smi, _ in order[:len(index) - settings.GENERATOR_POOL_MAX]:
+                    del index[smi]
+                    cache.delete(_member_key(self.key, smi))
+                    front.delete(_served_key(self.key, smi))
+            cache.set(self.key, index)
+        self._changed.clear()
+        self._served.clear()
@@ -1,9 +1,16 @@
+import asyncio
 import json
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional, Tuple
 from ..core.config import get_settings
-from .openai_service import OpenAIService
-from ..utils.chemo_utils import is_valid_smiles, detect_toxicophores, is_synthesizable, score_candidate
-from ..utils.molecule_utils import cache, cache_key_molecule
+from ..core.deadline import Deadline, DeadlineExceeded, current_deadline
+from .openai_service import OpenAIService, LLMResponseError
+from ..api.models.generator import CandidateBatch
+from ..utils.chemo_utils import RDKIT_AVAILABLE, constraint_mask, is_valid_smiles, normalize_smiles, detect_toxicophores, is_synthesizable
+from ..utils.molecule_utils import cache
+from ..utils import swr
+from ..utils.ranking import rank_candidates
+from .identity_service import molecule_key_local
+from . import genetic_engine, property_predictor
 
 PROMPT_TEMPLATE = (
     "You are a molecular designer. Propose diverse, novel small molecules as SMILES for the target below. "
@@ -12,22 +19,57 @@ PROMPT_TEMPLATE = (
     "}. Ensure diversity (Tanimoto-like diversity conceptually), avoid trivial variants."
 )
 
+# one per concurrent batch so parallel completions explore different chemistry
+DIVERSITY_HINTS = [
+    "favour heteroaromatic cores (pyridines, pyrimidines, azoles)",
+    "favour sp3-rich, saturated or spirocyclic scaffolds",
+    "favour amide- or sulfonamide-linked biaryl designs",
+    "favour small fragment-like molecules (MW under 350)",
+    "favour fused bicyclic ring systems",
+    "favour bioisosteres of carboxylic acids, phenols and amides",
+    "favour polar, solubility-enhancing substituents",
+    "favour varied substitution patterns around one privileged scaffold",
+]
+
 class GeneratorService:
-    def __init__(self) -> None:
+    def __init__(self, deadline: Optional[Deadline] = None) -> None:
         settings = get_settings()
-        self.oa = OpenAIService(model=settings.OPENAI_MODEL)
+        self.deadline = deadline or current_deadline.get()
+        self.oa = OpenAIService(model=settings.OPENAI_MODEL, deadline=self.deadline)
+        # set when the deadline cut generation or enrichment short
+        self.partial = False
+        self.ga_stats: Optional[Dict] = None
+        # set when proposals are placeholders rather than model output
+        self.used_mock = False
+
+    def _out_of_time(self) -> bool:
+        if self.deadline and self.deadline.expired:
+            self.partial = True
+        return self.partial
 
-    async def propose_smiles(self, req: dict) -> List[Dict]:
+    async def propose_smiles(self, req: dict, exclude: Optional[List[str]] = None,
+                             on_batch: Optional[Callable[[List[Dict]], None]] = None) -> List[Dict]:
+        """
+        Propose ``req['count']`` new unique candidates (canonical SMILES),
+        skipping any in ``exclude`` (e.g. members of the candidate pool).
+        ``on_batch`` receives each completion's new candidates as it arrives.
+        """
+        on_batch = on_batch or (lambda batch: None)
         target = req.get('target')
         props = req.get('properties')
         constraints = req.get('constraints') or {}
         count = int(req.get('count') or 10)
         seed = req.get('seedSmiles')
-        # cache key for identical requests
-        cache_key = cache_key_molecule(f"gen:{target}:{props}:{constraints}:{count}:{seed}")
-        cached = cache.get(cache_key)
-        if cached:
-            return cached  # type: ignore
+        strategy = req.get('strategy') or 'transformer'
+        known = set(exclude or ())
+
+        if strategy == 'genetic' and RDKIT_AVAILABLE:
+            # local search, no LLM cost; only the elite goes on to enrichment
+            elite, stats = await genetic_engine.run_genetic(count + min(len(known), 500), constraints, seed, self.deadline)
+            self.ga_stats = stats
+            fresh = [c for c in elite if c['smiles'] not in known][:count]
+            on_batch(fresh)
+            return fresh
         
         user = (
             f"Target: {target}.\nDesired: {json.dumps(props)}.\nConstraints: {json.dumps(constraints)}.\n"
@@ -35,49 +77,66 @@ class GeneratorService:
             "Return compact JSON only."
         )
         
+        settings = get_settings()
+        # unique canonical SMILES, filled as batches arrive
         results: List[Dict] = []
-        
-        try:
-            # Use Azure-only OpenAIService for chat calls
-            client_svc = self.oa
-            # process in chunks to avoid long prompts/timeouts
-            per_batch = min(25, max(5, count // 4 or 5))
-            
-            while len(results) < count:
-                want = min(per_batch, count - len(results))
-                batch_user = user.replace(f"Count: {count}", f"Count: {want}")
-                resp = await client_svc._chat([
-                    {"role": "system", "content": PROMPT_TEMPLATE},
-                    {"role": "user", "content": batch_user},
-                ], temperature=0.6, max_tokens=1200)
-                
-                if isinstance(resp, dict):
-                    content = resp.get("choices", [])[0].get("message", {}).get("content", "{}") if resp.get("choices") else "{}"
-                else:
-                    content = resp.choices[0].message.content or "{}"
-                
-                s = content.strip('`')
-                i = s.find('{')
-                if i != -1:
-                    s = s[i:]
-                j = s.rfind('}')
-                if j != -1:
-                    s = s[: j + 1]
-                
+        seen = set(known)
+        errors: List[Exception] = []
+        limit = asyncio.Semaphore(max(1, settings.GENERATOR_PROPOSE_CONCURRENCY))
+        # process in chunks to avoid long prompts/timeouts
+        per_batch = min(25, max(5, count // 4 or 5))
+        batch_no = 0
+
+        async def run_batch(n: int, want: int) -> None:
+            hint = DIVERSITY_HINTS[n % len(DIVERSITY_HINTS)]
+            batch_user = user.replace(f"Count: {count}", f"Count: {want}") + f"\nBatch {n + 1}: {hint}."
+            avoid = [c['smiles'] for c in results[:20]] or list(known)[:20]
+            if avoid:
+                # top-up rounds (or a pool top-up): steer away from molecules we already have
+                batch_user += f"\nAlready proposed (do not repeat): {', '.join(avoid)}."
+            async with limit:
+                if self._out_of_time():
+                    return
                 try:
-                    obj = json.loads(s)
-                    cand = obj.get('candidates') or []
-                    results.extend(cand)
+                    obj = await self.oa._chat_json([
+                        {"role": "system", "content": PROMPT_TEMPLATE},
+                        {"role": "user", "content": batch_user},
+                    ], CandidateBatch, temperature=0.6 + 0.05 * (n % 5), max_tokens=1200, drop_invalid=True,
+                        task="propose_smiles")
+                except DeadlineExceeded:
+                    self.partial = True
+                    return
+                except LLMResponseError as e:
+                    # a bad batch only costs that batch; the others carry on
+                    print(f"JSON parse error: {e}")
+                    return
                 except Exception as e:
-                    print(f"JSON parse error: {e}, response: {content}")
-                    break
-        except Exception as e:
-            print(f"OpenAI API error: {e}, falling back to mock generation")
+                    errors.append(e)
+                    return
+            added = len(results)
+            for cand in obj.get('candidates') or []:
+                canonical = normalize_smiles(cand.get('smiles') or '') if is_valid_smiles(cand.get('smiles') or '') else None
+                if canonical and canonical not in seen and len(results) < count:
+                    seen.add(canonical)
+                    results.append({**cand, 'smiles': canonical})
+            if len(results) > added:
+                on_batch(results[added:])
+
+        for _ in range(1 + max(0, settings.GENERATOR_TOPUP_ROUNDS)):
+            shortfall = count - len(results)
+            if shortfall <= 0 or self._out_of_time():
+                break
+            sizes = [min(per_batch, shortfall - i) for i in range(0, shortfall, per_batch)]
+            await asyncio.gather(*(run_batch(batch_no + i, want) for i, want in enumerate(sizes)))
+            batch_no += len(sizes)
+
+        if not results and errors:
+            print(f"OpenAI API error: {errors[0]}, falling back to mock generation")
+            self.used_mock = True
             # Fallback: generate mock molecules
-            results = self._generate_mock_candidates(target, count)
-        
-        # cache
-        cache.set(cache_key, results)
+            mock = self._generate_mock_candidates(target, count)
+            on_batch(mock)
+            return mock
         return results
     
     def _generate_mock_candidates(self, target: str, count: int) -> List[Dict]:
@@ -127,20 +186,73 @@ class GeneratorService:
             })
         return out
 
-    async def enrich_properties_and_rank(self, candidates: List[Dict], desired: Dict) -> List[Dict]:
-        # Call OpenAIService.predict_properties for each (best-effort). Process in small batches.
-        props_results: List[Dict] = []
+    @staticmethod
+    def apply_constraints(candidates: List[Dict], constraints: Optional[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        Drop candidates outside the MW window or missing a required group
+        before any enrichment is paid for. Returns (kept, rejected SMILES).
+        """
+        constraints = constraints or {}
+        if not candidates or not any(constraints.get(k) for k in ('mwMin', 'mwMax', 'groups')):
+            return candidates, []
+        keep, reasons = constraint_mask([c['smiles'] for c in candidates], constraints.get('mwMin'),
+                                        constraints.get('mwMax'), constraints.get('groups'))
+        kept = [c for c, ok in zip(candidates, keep) if ok]
+        rejected = [c['smiles'] for c, ok in zip(candidates, keep) if not ok]
+        if rejected:
+            print(f"[Generator] Constraint filter dropped {len(rejected)}/{len(candidates)}: {next(r for r in reasons if r)}")
+        return kept, rejected
+
+    @staticmethod
+    def _props_key(smiles: str) -> str:
+        # same identity-based key /molecule/predict-properties uses
+        return molecule_key_local("props", smiles, extra=property_predictor.cache_extra())
+
+    @classmethod
+    async def _cached_props(cls, smiles: str) -> Optional[Dict[str, Any]]:
+        entry = await cache.aget(cls._props_key(smiles))
+        if entry is None:
+            return None
+        # a stale prediction is still good enough to rank by
+        value, _ = swr.unwrap(entry)
+        return value
+
+    async def enrich_properties_and_rank(self, candidates: List[Dict], desired: Dict, mode: str = 'weighted',
+                                         top: Optional[int] = None,
+                                         on_enriched: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> List[Dict]:
+        """
+        Attach predicted properties to each candidate, then rank them with
+        ranking.rank_candidates (``mode`` weighted or pareto; ``top`` bounds
+        how many Pareto fronts are peeled). ``on_enriched(smiles, props)`` is
+        called as soon as each distinct SMILES has its properties.
+        Predictions come from the property cache when possible; the rest come
+        from property_predictor in the configured mode, LLM batches running at
+        most GENERATOR_ENRICH_CONCURRENCY calls at a time. A failed prediction leaves only that candidate unscored.
+        """
+        # one prediction per distinct SMILES, even if a candidate repeats
+        wanted = list(dict.fromkeys(c['smiles'] for c in candidates if c['valid'] and not c['filtered']))
+        # pool members arrive with their earlier predictions attached
+        known = {c['smiles']: c['properties'] for c in candidates if c.get('properties')}
+        lookups = [smi for smi in wanted if not known.get(smi)]
+        cached = dict(zip(lookups, await asyncio.gather(*(self._cached_props(smi) for smi in lookups))))
+        props_by_smiles: Dict[str, Optional[Dict[str, Any]]] = {smi: known.get(smi) or cached[smi] for smi in wanted}
+        missing = [smi for smi, props in props_by_smiles.items() if props is None]
+        if on_enriched:
+            for smi, props in props_by_smiles.items():
+                if props is not None:
+                    on_enriched(smi, props)
+        if missing and not self._out_of_time():
+            def arrived(i: int, props: Dict[str, Any]) -> None:
+                swr.store(self._props_key(missing[i]), props)
+                props_by_smiles[missing[i]] = props
+                if on_enriched:
+                    on_enriched(missing[i], props)
+
+            await property_predictor.predict_many(self.oa, [(smi, smi) for smi in missing],
+                                                  concurrency=get_settings().GENERATOR_ENRICH_CONCURRENCY,
+                                                  on_result=arrived)
+            # out of budget: chunks past the deadline leave their candidates unscored
+            self._out_of_time()
         for c in candidates:
-            if not c['valid'] or c['filtered']:
-                c['score'] = 0.0
-                c['properties'] = None
-                continue
-            try:
-                props = await self.oa.predict_properties(c['smiles'])
-                c['properties'] = props
-                c['score'] = score_candidate(props, desired)
-            except Exception:
-                c['properties'] = None
-                c['score'] = 0.0
-        ranked = sorted(candidates, key=lambda x: x.get('score', 0.0), reverse=True)
-        return ranked
+            c['properties'] = props_by_smiles.get(c['smiles'])
+        return rank_candidates(candidates, desired, mode, needed=top)
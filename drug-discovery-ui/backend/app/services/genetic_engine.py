@@ -0,0 +1,424 @@
+"""
+Local genetic-algorithm molecule generator (strategy="genetic").
+Graph-based mutation (atom, bond, ring and fragment edits) and crossover
+(joining fragments of two parents cut at acyclic single bonds) on RDKit
+molecules. Fitness is a cheap local objective: QED, synthetic accessibility,
+Lipinski compliance and the request constraints. Offspring are bred and
+scored in a process pool, under a generation and wall-clock budget, and only
+the final elite is handed on for LLM enrichment.
+"""
+import asyncio
+import importlib.util
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.config import get_settings
+from ..core.deadline import Deadline
+from ..utils.chemo_utils import RDKIT_AVAILABLE, compile_group_patterns
+
+try:
+    from rdkit import Chem, RDConfig, RDLogger
+    from rdkit.Chem import QED, rdMolDescriptors
+except ImportError:
+    pass
+
+
+def _load_sascorer() -> Any:
+    """RDKit's contrib SA scorer, loaded from its file so sys.path is left alone."""
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "sascorer", os.path.join(RDConfig.RDContribDir, "SA_Score", "sascorer.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except Exception:
+        return None
+
+
+sascorer = _load_sascorer()
+
+# Drug-like starting points when the request has no seedSmiles
+DEFAULT_SEEDS = [
+    "CC(=O)Oc1ccccc1C(=O)O",
+    "CC(=O)Nc1ccc(O)cc1",
+    "CC(C)Cc1ccc(C(C)C(=O)O)cc1",
+    "Cn1cnc2c1c(=O)n(C)c(=O)n2C",
+    "NC(=O)c1ccc(O)cc1",
+    "c1ccc2[nH]ccc2c1",
+    "O=C(Nc1ccccc1)c1ccncc1",
+    "CN1CCN(c2ccccc2)CC1",
+    "COc1ccc2nc(S(=O)Cc3ncc(C)c(OC)c3C)[nH]c2c1",
+    "Cc1ccc(NC(=O)c2ccccc2)cc1",
+]
+
+# Substituents for fragment mutation; atom 0 is the attachment point
+FRAGMENTS = [
+    "C", "O", "N", "F", "Cl", "C#N", "C(F)(F)F", "OC", "C(=O)O", "C(=O)N", "NC(=O)C",
+    "S(=O)(=O)N", "c1ccccc1", "c1ccncc1", "C1CC1", "N1CCOCC1", "N1CCNCC1", "c1ccsc1", "c1cn[nH]c1",
+]
+
+ELEMENTS = [6, 6, 6, 7, 7, 8, 9, 16, 17]
+
+
+# --- molecule edits (run in pool workers) --------------------------------------------------------
+
+def _editable(smiles: str):
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None, None
+    rw = Chem.RWMol(mol)
+    Chem.Kekulize(rw, clearAromaticFlags=True)
+    return mol, rw
+
+
+def _use_h(atom) -> None:
+    # a new bond replaces one hydrogen; explicit H counts (e.g. [nH]) must drop with it
+    if atom.GetNumExplicitHs() > 0:
+        atom.SetNumExplicitHs(atom.GetNumExplicitHs() - 1)
+
+
+def _finish(rw) -> Optional[str]:
+    try:
+        mol = rw.GetMol()
+        Chem.SanitizeMol(mol)
+        smiles = Chem.MolToSmiles(mol)
+    except Exception:
+        return None
+    if not smiles or "." in smiles:
+        return None
+    return smiles
+
+
+def _with_h(mol) -> List[int]:
+    return [a.GetIdx() for a in mol.GetAtoms() if a.GetTotalNumHs() > 0]
+
+
+def _mutate_append_atom(smiles: str, rng: random.Random) -> Optional[str]:
+    mol, rw = _editable(smiles)
+    sites = _with_h(mol) if mol is not None else []
+    if not sites:
+        return None
+    i = rng.choice(sites)
+    _use_h(rw.GetAtomWithIdx(i))
+    j = rw.AddAtom(Chem.Atom(rng.choice(ELEMENTS)))
+    rw.AddBond(i, j, Chem.BondType.SINGLE)
+    return _finish(rw)
+
+
+def _mutate_insert_atom(smiles: str, rng: random.Random) -> Optional[str]:
+    mol, rw = _editable(smiles)
+    if mol is None:
+        return None
+    bonds = [b for b in rw.GetBonds() if b.GetBondType() == Chem.BondType.SINGLE]
+    if not bonds:
+        return None
+    b = rng.choice(bonds)
+    i, j = b.GetBeginAtomIdx(), b.GetEndAtomIdx()
+    rw.RemoveBond(i, j)
+    k = rw.AddAtom(Chem.Atom(rng.choice([6, 6, 7, 8])))
+    rw.AddBond(i, k, Chem.BondType.SINGLE)
+    rw.AddBond(k, j, Chem.BondType.SINGLE)
+    return _finish(rw)
+
+
+def _mutate_delete_atom(smiles: str, rng: random.Random) -> Optional[str]:
+    mol, rw = _editable(smiles)
+    if mol is None or mol.GetNumAtoms() < 3:
+        return None
+    terminal = [a.GetIdx() for a in mol.GetAtoms() if a.GetDegree() == 1]
+    if not terminal:
+        return None
+    rw.RemoveAtom(rng.choice(terminal))
+    return _finish(rw)
+
+
+def _mutate_change_atom(smiles: str, rng: random.Random) -> Optional[str]:
+    mol, rw = _editable(smiles)
+    if mol is None:
+        return None
+    atom = rw.GetAtomWithIdx(rng.randrange(rw.GetNumAtoms()))
+    atom.SetAtomicNum(rng.choice([e for e in ELEMENTS if e != atom.GetAtomicNum()]))
+    atom.SetNumExplicitHs(0)
+    atom.SetFormalCharge(0)
+    return _finish(rw)
+
+
+def _mutate_bond_order(smiles: str, rng: random.Random) -> Optional[str]:
+    mol, rw = _editable(smiles)
+    if mol is None:
+        return None
+    bonds = [b for b in rw.GetBonds() if b.GetBondType() in (Chem.BondType.SINGLE, Chem.BondType.DOUBLE)]
+    if not bonds:
+        return None
+    b = rng.choice(bonds)
+    if b.GetBondType() == Chem.BondType.DOUBLE:
+        b.SetBondType(Chem.BondType.SINGLE)
+    else:
+        a1, a2 = mol.GetAtomWithIdx(b.GetBeginAtomIdx()), mol.GetAtomWithIdx(b.GetEndAtomIdx())
+        if a1.GetTotalNumHs() == 0 or a2.GetTotalNumHs() == 0:
+            return None
+        _use_h(b.GetBeginAtom())
+        _use_h(b.GetEndAtom())
+        b.SetBondType(Chem.BondType.DOUBLE)
+    return _finish(rw)
+
+
+def _mutate_ring(smiles: str, rng: random.Random) -> Optional[str]:
+    """Close a 5/6-membered ring between two atoms, or open a non-aromatic ring bond."""
+    mol, rw = _editable(smiles)
+    if mol is None:
+        return None
+    ring_bonds = [b for b in mol.GetBonds() if b.IsInRing() and not b.GetIsAromatic()]
+    if ring_bonds and rng.random() < 0.3:
+        b = rng.choice(ring_bonds)
+        rw.RemoveBond(b.GetBeginAtomIdx(), b.GetEndAtomIdx())
+        return _finish(rw)
+    dist = Chem.GetDistanceMatrix(mol)
+    sites = _with_h(mol)
+    pairs = [(i, j) for i in sites for j in sites if i < j and dist[i][j] in (4, 5)]
+    if not pairs:
+        return None
+    i, j = rng.choice(pairs)
+    _use_h(rw.GetAtomWithIdx(i))
+    _use_h(rw.GetAtomWithIdx(j))
+    rw.AddBond(i, j, Chem.BondType.SINGLE)
+    return _finish(rw)
+
+
+def _mutate_fragment(smiles: str, rng: random.Random) -> Optional[str]:
+    """Attach a substituent, replacing a terminal atom half of the time."""
+    mol, rw = _editable(smiles)
+    if mol is None:
+        return None
+    terminal = [a.GetIdx() for a in mol.GetAtoms() if a.GetDegree() == 1]
+    if terminal and rng.random() < 0.5:
+        t = rng.choice(terminal)
+        anchor = mol.GetAtomWithIdx(t).GetNeighbors()[0].GetIdx()
+        if mol.GetBondBetweenAtoms(t, anchor).GetBondType() != Chem.BondType.SINGLE:
+            return None
+        rw.RemoveAtom(t)
+        anchor = anchor if anchor < t else anchor - 1
+    else:
+        sites = _with_h(mol)
+        if not sites:
+            return None
+        anchor = rng.choice(sites)
+        _use_h(rw.GetAtomWithIdx(anchor))
+    frag = Chem.MolFromSmiles(rng.choice(FRAGMENTS))
+    Chem.Kekulize(frag, clearAromaticFlags=True)
+    offset = rw.GetNumAtoms()
+    combo = Chem.RWMol(Chem.CombineMols(rw.GetMol(), frag))
+    combo.AddBond(anchor, offset, Chem.BondType.SINGLE)
+    return _finish(combo)
+
+
+MUTATIONS = [
+    _mutate_append_atom, _mutate_insert_atom, _mutate_delete_atom, _mutate_change_atom,
+    _mutate_bond_order, _mutate_ring, _mutate_fragment, _mutate_fragment,
+]
+
+
+def _cut(smiles: str, rng: random.Random):
+    """Split at a random acyclic single bond; both halves keep a dummy atom (map number 1)."""
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    bonds = [b.GetIdx() for b in mol.GetBonds()
+             if b.GetBondType() == Chem.BondType.SINGLE and not b.IsInRing()]
+    if not bonds:
+        return None
+    pieces = Chem.GetMolFrags(Chem.FragmentOnBonds(mol, [rng.choice(bonds)], addDummies=True), asMols=True)
+    if len(pieces) != 2:
+        return None
+    for piece in pieces:
+        for atom in piece.GetAtoms():
+            if atom.GetAtomicNum() == 0:
+                atom.SetAtomMapNum(1)
+                atom.SetIsotope(0)
+    return pieces
+
+
+def crossover(a: str, b: str, rng: random.Random) -> Optional[str]:
+    ca, cb = _cut(a, rng), _cut(b, rng)
+    if not ca or not cb:
+        return None
+    try:
+        child = Chem.molzip(rng.choice(ca), rng.choice(cb))
+    except Exception:
+        return None
+    return _finish(Chem.RWMol(child))
+
+
+def mutate(smiles: str, rng: random.Random) -> Optional[str]:
+    for _ in range(3):
+        child = rng.choice(MUTATIONS)(smiles, rng)
+        if child and child != smiles:
+            return child
+    return None
+
+
+# --- fitness -------------------------------------------------------------------------------------
+
+def _sa_score(mol) -> float:
+    """Synthetic accessibility, 1 (easy) to 10 (hard); a complexity proxy without the RDKit contrib scorer."""
+    if sascorer is not None:
+        return float(sascorer.calculateScore(mol))
+    stereo = len(Chem.FindMolChiralCenters(mol, includeUnassigned=True))
+    spiro = rdMolDescriptors.CalcNumSpiroAtoms(mol)
+    bridge = rdMolDescriptors.CalcNumBridgeheadAtoms(mol)
+    macro = sum(1 for r in mol.GetRingInfo().AtomRings() if len(r) > 8)
+    return max(1.0, min(10.0, 1.0 + 0.04 * mol.GetNumHeavyAtoms() + 0.5 * (stereo + spiro + bridge) + macro))
+
+
+def fitness(smiles: str, constraints: Dict[str, Any]) -> Optional[Tuple[float, Dict[str, float]]]:
+    """(fitness, components) for a SMILES, or None if it is unusable."""
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None or mol.GetNumHeavyAtoms() > constraints.get("_max_heavy", 50):
+        return None
+    try:
+        # QED's descriptor set doubles as the Ro5 inputs, so logP etc. are computed once
+        props = QED.properties(mol)
+        qed = QED.qed(mol, qedProperties=props)
+        sa = _sa_score(mol)
+    except Exception:
+        return None
+    mw = props.MW
+    violations = sum([mw > 500, props.ALOGP > 5, props.HBD > 5, props.HBA > 10])
+    penalty = 0.0
+    if constraints.get("mwMin") and mw < constraints["mwMin"]:
+        penalty += (constraints["mwMin"] - mw) / 100.0
+    if constraints.get("mwMax") and mw > constraints["mwMax"]:
+        penalty += (mw - constraints["mwMax"]) / 100.0
+    groups = compile_group_patterns(constraints.get("groups"))
+    if groups:
+        missing = sum(1 for _, patt in groups if not mol.HasSubstructMatch(patt))
+        penalty += 0.5 * missing / len(groups)
+    score = 0.5 * qed + 0.3 * (10.0 - sa) / 9.0 + 0.2 * (1.0 - violations / 4.0) - penalty
+    return score, {"qed": round(qed, 3), "sa": round(sa, 2), "ro5_violations": violations, "mw": round(mw, 1)}
+
+
+def _score_many(smiles_list: List[str], constraints: Dict[str, Any]) -> List[Tuple[str, float, Dict[str, float]]]:
+    RDLogger.DisableLog("rdApp.*")
+    out = []
+    for smi in smiles_list:
+        mol = Chem.MolFromSmiles(smi)
+        if mol is None:
+            continue
+        canonical = Chem.MolToSmiles(mol)
+        scored = fitness(canonical, constraints)
+        if scored:
+            out.append((canonical, scored[0], scored[1]))
+    return out
+
+
+def _breed(parents: List[str], weights: List[float], n: int, seed: int, crossover_rate: float,
+           constraints: Dict[str, Any]) -> List[Tuple[str, float, Dict[str, float]]]:
+    """Pool worker: make and score ``n`` children from fitness-weighted parents."""
+    RDLogger.DisableLog("rdApp.*")
+    rng = random.Random(seed)
+    children = []
+    for _ in range(n * 3):
+        if len(children) >= n:
+            break
+        if len(parents) > 1 and rng.random() < crossover_rate:
+            a, b = rng.choices(parents, weights=weights, k=2)
+            child = crossover(a, b, rng)
+            if child and rng.random() < 0.5:
+                child = mutate(child, rng) or child
+        else:
+            child = mutate(rng.choices(parents, weights=weights, k=1)[0], rng)
+        if child:
+            children.append(child)
+    return _score_many(children, constraints)
+
+
+# --- driver --------------------------------------------------------------------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def _get_pool() -> Tuple[ProcessPoolExecutor, int]:
+    """The shared process pool and the number of workers it was built with."""
+    global _pool, _pool_workers
+    if _pool is None:
+        _pool_workers = get_settings().GA_WORKERS or os.cpu_count() or 1
+        _pool = ProcessPoolExecutor(max_workers=_pool_workers)
+    return _pool, _pool_workers
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def parse_seeds(seed_smiles: Optional[str]) -> List[str]:
+    seeds = [s for s in (seed_smiles or "").replace(",", " ").split() if Chem.MolFromSmiles(s) is not None]
+    return seeds or list(DEFAULT_SEEDS)
+
+
+async def run_genetic(count: int, constraints: Optional[Dict[str, Any]] = None, seed_smiles: Optional[str] = None,
+                      deadline: Optional[Deadline] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Evolve a population from ``seed_smiles`` and return the ``count`` fittest
+    unique molecules as candidates, plus run statistics. Seeds breed but are
+    never returned as generated molecules. Stops after
+    GA_GENERATIONS generations, GA_TIME_BUDGET seconds or the request deadline.
+    """
+    if not RDKIT_AVAILABLE:
+        raise RuntimeError("RDKit not installed. Run: pip install rdkit")
+    settings = get_settings()
+    constraints = {**(constraints or {}), "_max_heavy": settings.GA_MAX_HEAVY_ATOMS}
+    loop = asyncio.get_running_loop()
+    pool, workers = _get_pool()
+    size = max(settings.GA_POPULATION, count * 2)
+    started = time.monotonic()
+    rng = random.Random()
+
+    population: Dict[str, Tuple[float, Dict[str, float]]] = {}
+    for smi, score, parts in await loop.run_in_executor(pool, _score_many, parse_seeds(seed_smiles), constraints):
+        population[smi] = (score, parts)
+    if not population:
+        return [], {"generations": 0, "evaluated": 0, "seconds": 0.0}
+    seeds = set(population)
+
+    evaluated, generation = len(population), 0
+    while generation < settings.GA_GENERATIONS and time.monotonic() - started < settings.GA_TIME_BUDGET:
+        if deadline and deadline.remaining() < 1.0:
+            break
+        ranked = sorted(population.items(), key=lambda kv: kv[1][0], reverse=True)[:size]
+        parents = [smi for smi, _ in ranked]
+        low = ranked[-1][1][0]
+        weights = [score - low + 0.05 for _, (score, _) in ranked]
+        per_worker = max(1, size // workers)
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(pool, _breed, parents, weights, per_worker, rng.randrange(1 << 30),
+                                 settings.GA_CROSSOVER_RATE, constraints)
+            for _ in range(workers)
+        ))
+        # elitism: survivors compete with their children for the next generation
+        population = dict(ranked)
+        for batch in batches:
+            evaluated += len(batch)
+            for smi, score, parts in batch:
+                population.setdefault(smi, (score, parts))
+        generation += 1
+
+    offspring = [kv for kv in population.items() if kv[0] not in seeds]
+    elite = sorted(offspring, key=lambda kv: kv[1][0], reverse=True)[:count]
+    seconds = time.monotonic() - started
+    stats = {"generations": generation, "evaluated": evaluated, "seconds": round(seconds, 2),
+             "per_second": round(evaluated / seconds, 1) if seconds else None}
+    print(f"[GA] {generation} generations, {evaluated} molecules in {seconds:.1f}s")
+    return [
+        {
+            "smiles": smi,
+            "rationale": f"GA fitness {score:.2f} (QED {parts['qed']}, SA {parts['sa']}, Ro5 violations {parts['ro5_violations']})",
+        }
+        for smi, (score, parts) in elite
+    ], stats
@@ -0,0 +1,194 @@
+"""
+Molecule identity resolution.
+Maps a user-supplied name, SMILES or InChIKey to a canonical InChIKey so that
+"Aspirin", "acetylsalicylic acid" and CC(=O)Oc1ccccc1C(=O)O share one cache
+entry. Resolution order: identity cache (including negative results), InChIKey
+syntax, local synonym table, RDKit SMILES parsing, then PubChem.
+"""
+import json
+import re
+from typing import Dict, Optional
+from urllib.parse import quote
+
+import httpx
+
+from ..core.config import get_settings
+from ..core.deadline import current_deadline, effective_timeout
+from ..core.http_client import get_http_client
+from ..utils.chemo_utils import RDKIT_AVAILABLE
+from ..utils.molecule_utils import cache, cache_key_molecule
+
+try:
+    from rdkit import Chem, rdBase
+except ImportError:
+    pass
+
+PUBCHEM_BASE = "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound"
+
+_INCHIKEY = re.compile(r"^[A-Z]{14}-[A-Z]{10}-[A-Z]$")
+_SMILES_CHARS = re.compile(r"^[A-Za-z0-9@+\-=#()\[\]\\/%.:*]+$")
+
+# Common drug names -> SMILES; extended at startup from IDENTITY_SYNONYMS_FILE
+_SYNONYMS: Dict[str, str] = {
+    "aspirin": "CC(=O)Oc1ccccc1C(=O)O",
+    "acetylsalicylic acid": "CC(=O)Oc1ccccc1C(=O)O",
+    "paracetamol": "CC(=O)Nc1ccc(O)cc1",
+    "acetaminophen": "CC(=O)Nc1ccc(O)cc1",
+    "ibuprofen": "CC(C)Cc1ccc(C(C)C(=O)O)cc1",
+    "naproxen": "COc1ccc2cc(C(C)C(=O)O)ccc2c1",
+    "caffeine": "Cn1cnc2c1c(=O)n(C)c(=O)n2C",
+    "metformin": "CN(C)C(=N)N=C(N)N",
+    "warfarin": "CC(=O)CC(c1ccccc1)c1c(O)c2ccccc2oc1=O",
+    "atorvastatin": "CC(C)c1c(C(=O)Nc2ccccc2)c(-c2ccccc2)c(-c2ccc(F)cc2)n1CCC(O)CC(O)CC(=O)O",
+    "simvastatin": "CCC(C)(C)C(=O)OC1CC(C)C=C2C=CC(C)C(CCC3CC(O)CC(=O)O3)C21",
+    "omeprazole": "COc1ccc2[nH]c(S(=O)Cc3ncc(C)c(OC)c3C)nc2c1",
+    "amoxicillin": "CC1(C)SC2C(NC(=O)C(N)c3ccc(O)cc3)C(=O)N2C1C(=O)O",
+    "penicillin g": "CC1(C)SC2C(NC(=O)Cc3ccccc3)C(=O)N2C1C(=O)O",
+    "diazepam": "CN1C(=O)CN=C(c2ccccc2)c2cc(Cl)ccc21",
+    "morphine": "CN1CCC23C4Oc5c(O)ccc(CC1C2C=CC4O)c53",
+    "nicotine": "CN1CCCC1c1cccnc1",
+    "sildenafil": "CCCc1nn(C)c2c(=O)[nH]c(-c3cc(S(=O)(=O)N4CCN(C)CC4)ccc3OCC)nc12",
+    "lisinopril": "NCCCCC(NC(CCc1ccccc1)C(=O)O)C(=O)N1CCCC1C(=O)O",
+    "fluoxetine": "CNCCC(Oc1ccc(C(F)(F)F)cc1)c1ccccc1",
+    "sertraline": "CNC1CCC(c2ccc(Cl)c(Cl)c2)c2ccccc21",
+    "clopidogrel": "COC(=O)C(c1ccccc1Cl)N1CCc2sccc2C1",
+    "imatinib": "Cc1ccc(NC(=O)c2ccc(CN3CCN(C)CC3)cc2)cc1Nc1nccc(-c2cccnc2)n1",
+    "dopamine": "NCCc1ccc(O)c(O)c1",
+    "serotonin": "NCCc1c[nH]c2ccc(O)cc12",
+    "ethanol": "CCO",
+    "glucose": "OCC1OC(O)C(O)C(O)C1O",
+}
+
+stats = {"cache_hits": 0, "inchikey": 0, "synonym": 0, "rdkit": 0, "pubchem": 0, "unresolved": 0}
+
+_synonyms_loaded = False
+
+
+def _normalize(query: str) -> str:
+    return " ".join((query or "").strip().split())
+
+
+def _load_synonyms() -> None:
+    global _synonyms_loaded
+    if _synonyms_loaded:
+        return
+    _synonyms_loaded = True
+    path = get_settings().IDENTITY_SYNONYMS_FILE
+    if not path:
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            extra = json.load(f)
+        _SYNONYMS.update({_normalize(k).lower(): v for k, v in extra.items() if isinstance(v, str)})
+        print(f"[Identity] Loaded {len(extra)} synonyms from {path}")
+    except (OSError, ValueError) as e:
+        print(f"[Identity] Could not load synonyms from {path}: {e}")
+
+
+def _smiles_to_inchikey(smiles: str) -> Optional[str]:
+    if not RDKIT_AVAILABLE or not _SMILES_CHARS.match(smiles):
+        return None
+    # names like "aspirin" are valid SMILES characters; keep RDKit's parse errors quiet
+    # (for this call only, without re-enabling logs other code has disabled)
+    with rdBase.BlockLogs():
+        try:
+            mol = Chem.MolFromSmiles(smiles)
+            return (Chem.MolToInchiKey(mol) or None) if mol is not None else None
+        except Exception:
+            return None
+
+
+def resolve_local(query: str) -> Optional[str]:
+    """Resolve without network access: InChIKey syntax, synonym table, then RDKit."""
+    _load_synonyms()
+    q = _normalize(query)
+    if not q:
+        return None
+    if _INCHIKEY.match(q.upper()):
+        stats["inchikey"] += 1
+        return q.upper()
+    synonym = _SYNONYMS.get(q.lower())
+    if synonym:
+        ik = synonym if _INCHIKEY.match(synonym) else _smiles_to_inchikey(synonym)
+        if ik:
+            stats["synonym"] += 1
+            return ik
+    ik = _smiles_to_inchikey(q)
+    if ik:
+        stats["rdkit"] += 1
+    return ik
+
+
+async def _resolve_pubchem(query: str) -> Optional[str]:
+    deadline = current_deadline.get()
+    if deadline and deadline.expired:
+        return None
+    timeout = effective_timeout(get_settings().IDENTITY_PUBCHEM_TIMEOUT, deadline)
+    namespaces = ["smiles", "name"] if _SMILES_CHARS.match(query) and not query.isalpha() else ["name"]
+    client = get_http_client()
+    for ns in namespaces:
+        r = await client.get(f"{PUBCHEM_BASE}/{ns}/{quote(query, safe='')}/property/InChIKey/JSON", timeout=timeout)
+        if r.status_code == 429 or r.status_code >= 500:
+            # PubChem busy says nothing about the molecule; don't cache it as unknown
+            raise httpx.HTTPError(f"PubChem returned {r.status_code}")
+        if r.status_code != 200:
+            continue
+        try:
+            props = r.json()["PropertyTable"]["Properties"]
+            ik = props[0].get("InChIKey")
+        except (ValueError, KeyError, IndexError, TypeError):
+            continue
+        if ik:
+            return ik
+    return None
+
+
+async def resolve_inchikey(query: str) -> Optional[str]:
+    """Canonical InChIKey for a name, SMILES or InChIKey, or None if unknown."""
+    q = _normalize(query)
+    if not q:
+        return None
+    ik = resolve_local(q)
+    if ik:
+        return ik
+    key = f"identity:{q.lower()}"
+    cached = await cache.aget(key)
+    if cached is not None:
+        stats["cache_hits"] += 1
+        return cached.get("inchikey")
+    settings = get_settings()
+    try:
+        ik = await _resolve_pubchem(q)
+    except (httpx.HTTPError, OSError) as e:
+        print(f"[Identity] PubChem lookup failed for {q!r}: {e}")
+        return None
+    if ik:
+        stats["pubchem"] += 1
+        cache.set(key, {"inchikey": ik}, ttl=settings.IDENTITY_TTL)
+    else:
+        stats["unresolved"] += 1
+        cache.set(key, {"inchikey": None}, ttl=settings.IDENTITY_NEGATIVE_TTL)
+    return ik
+
+
+async def molecule_key(task: str, *queries: str, extra: str = "", ordered: bool = True) -> str:
+    """
+    Cache key for molecule-scoped results, built from the canonical identity of
+    each query. Unresolvable queries fall back to their lowercased text.
+    Pass ``ordered=False`` when the molecules form a set (e.g. interaction checks).
+    """
+    parts = []
+    for q in queries:
+        ik = await resolve_inchikey(q)
+        parts.append(ik or "q=" + _normalize(q).lower())
+    if not ordered:
+        parts.sort()
+    key = f"{task}:{'|'.join(parts)}"
+    return cache_key_molecule(f"{key}:{extra}" if extra else key)
+
+
+def molecule_key_local(task: str, smiles: str, extra: str = "") -> str:
+    """Synchronous molecule_key for a single SMILES, without PubChem."""
+    ik = resolve_local(smiles)
+    key = f"{task}:{ik or 'q=' + _normalize(smiles).lower()}"
+    return cache_key_molecule(f"{key}:{extra}" if extra else key)
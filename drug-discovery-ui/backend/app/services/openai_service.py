@@ -1,10 +1,80 @@
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, AsyncIterator, Callable, Dict, List, Tuple, Type
+import asyncio
 import json
 import os
+import time
 import httpx
+from pydantic import BaseModel
+from ..core.config import get_settings
+from ..core.metrics import usage_metrics
+from ..core.deadline import Deadline, DeadlineExceeded, current_deadline, effective_timeout
+from ..core.http_client import get_http_client
+from .prompt_builder import PromptBuilder, estimate_tokens, estimate_messages_tokens, summarize_pdb, is_pdb_text, trim_lines, trim_json
+from ..utils.json_utils import (
+    JSONExtractionError,
+    StreamingJSONExtractor,
+    extract_json,
+    validate_fields,
+    validate_path,
+    drop_invalid_items,
+)
+from ..api.models.schemas import (
+    PropertyPrediction,
+    PropertyPredictionBatch,
+    ToxicityPrediction,
+    ToxicityPredictionBatch,
+)
+from ..api.models.docking import DockingAnalysis
+from ..api.models.admet import AdmetPrediction
+from ..api.models.retro import RetroPlan
+from ..api.models.interactions import InteractionResponse
+from ..api.models.reactions import ReactionResponse
+
+
+class LLMResponseError(ValueError):
+    """Raised when model output cannot be decoded into the requested schema, even after repair."""
+    pass
+
+
+_PROPS_SYSTEM = (
+    "You are a pharmaceutical AI system specialized in early-phase molecule assessment. "
+    "Provide non-clinical, high-level insights only."
+)
+
+_PROPS_SCHEMA = (
+    "  \"toxicity\": {\"score\": 0-100, \"level\": \"low|medium|high\", \"explanation\": string},\n"
+    "  \"solubility\": {\"score\": 0-100, \"details\": string},\n"
+    "  \"drugLikeness\": {\"score\": 0-100, \"passes\": boolean},\n"
+    "  \"bioavailability\": {\"percentage\": 0-100, \"explanation\": string},\n"
+    "  \"bbbPenetration\": {\"canCross\": boolean, \"confidence\": string},\n"
+    "  \"lipinskiRules\": {\"passes\": boolean, \"violations\": string[]}\n"
+)
+
+_TOX_SCHEMA = "  \"toxicity\": {\"score\": 0-100, \"level\": \"low|medium|high\", \"explanation\": string}\n"
+
+# per prediction kind: usage-metrics task (batches add "_batch"), prompt task,
+# schema, models, max_tokens for one molecule, and completion tokens per
+# molecule until a batch has been observed
+_PREDICTIONS: Dict[str, Dict[str, Any]] = {
+    "properties": {
+        "name": "predict_properties", "task": "Predict molecular properties", "schema": _PROPS_SCHEMA,
+        "model": PropertyPrediction, "batch_model": PropertyPredictionBatch, "max_tokens": 600,
+        "item_tokens": lambda: get_settings().PROPS_BATCH_ITEM_TOKENS,
+    },
+    # one of the six fields, so a fraction of the output
+    "toxicity": {
+        "name": "predict_toxicity", "task": "Predict the toxicity", "schema": _TOX_SCHEMA,
+        "model": ToxicityPrediction, "batch_model": ToxicityPredictionBatch, "max_tokens": 200,
+        "item_tokens": lambda: get_settings().PROPS_BATCH_ITEM_TOKENS / 4,
+    },
+}
+
 
 class OpenAIService:
-    def __init__(self, api_key: str = None, model: str = "gpt-4o") -> None:
+    # running estimate of completion tokens per molecule in a batched prediction, by kind
+    _item_tokens: Dict[str, float] = {}
+
+    def __init__(self, api_key: str = None, model: str = "gpt-4o", deadline: Optional[Deadline] = None) -> None:
         # Azure-only configuration
         self.provider = "azure"
         self.model = model
@@ -15,10 +85,24 @@ class OpenAIService:
         self.azure_api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
         # no local SDK client; we will call Azure OpenAI HTTP endpoints via httpx
         self.client = None
+        settings = get_settings()
+        self.structured_outputs = settings.OPENAI_STRUCTURED_OUTPUTS
+        self.repair_attempts = settings.OPENAI_JSON_REPAIR_ATTEMPTS
+        # explicit deadline; falls back to the request's current deadline at call time
+        self.deadline = deadline
 
-    async def _chat(self, messages: List[Dict[str, str]], temperature: float = 0.5, max_tokens: int = 400) -> Any:
-        """Dispatch chat completion to configured provider and return raw response-like object."""
-        # Azure-compatible HTTP call
+    def _timeout(self, default: float = 60.0) -> float:
+        return effective_timeout(default, self.deadline)
+
+    def _deadline_error(self) -> Optional[DeadlineExceeded]:
+        deadline = self.deadline or current_deadline.get()
+        if deadline and deadline.expired:
+            return DeadlineExceeded(f"Request deadline of {deadline.budget:.1f}s exceeded")
+        return None
+
+    def _request(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                 response_format: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Build the Azure chat-completions URL, headers and payload."""
         if not (self.azure_endpoint and self.azure_deployment and self.api_key):
             print(self.azure_endpoint, self.azure_deployment, self.api_key)
             raise RuntimeError("Azure OpenAI config missing: set AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT, AZURE_OPENAI_API_KEY/OPENAI_API_KEY")
@@ -30,11 +114,87 @@ class OpenAIService:
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            r = await client.post(url, headers=headers, json=payload)
+        if response_format:
+            payload["response_format"] = response_format
+        return url, headers, payload
+
+    async def _chat(self, messages: List[Dict[str, str]], temperature: float = 0.5, max_tokens: int = 400,
+                    response_format: Optional[Dict[str, Any]] = None, task: str = "chat") -> Any:
+        """
+        Dispatch chat completion to configured provider and return raw response-like object.
+        The response ``usage`` block is recorded against the current route and ``task``.
+        """
+        # Azure-compatible HTTP call
+        url, headers, payload = self._request(messages, temperature, max_tokens, response_format)
+        timeout = self._timeout(60.0)
+        started = time.perf_counter()
+        try:
+            client = get_http_client()
+            r = await asyncio.wait_for(client.post(url, headers=headers, json=payload, timeout=timeout), timeout)
             r.raise_for_status()
-            return r.json()
+            data = r.json()
+        except Exception as e:
+            usage_metrics.record(task, None, time.perf_counter() - started, error=True)
+            if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)):
+                raise (self._deadline_error() or e) from e
+            raise
+        usage_metrics.record(task, data.get("usage") if isinstance(data, dict) else None, time.perf_counter() - started)
+        return data
+
+    async def _chat_stream(self, messages: List[Dict[str, str]], temperature: float = 0.5, max_tokens: int = 400,
+                           response_format: Optional[Dict[str, Any]] = None, task: str = "chat") -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+        Usage is taken from the final chunk when the api-version supports
+        ``stream_options``; otherwise it is estimated from the text.
+        """
+        url, headers, payload = self._request(messages, temperature, max_tokens, response_format)
+        timeout = self._timeout(60.0)
+        payload["stream"] = True
+        if self.azure_api_version[:10] >= "2024-09-01":
+            payload["stream_options"] = {"include_usage": True}
+        started = time.perf_counter()
+        usage: Optional[Dict[str, Any]] = None
+        parts: List[str] = []
+        error = False
+        try:
+            client = get_http_client()
+            async with client.stream("POST", url, headers=headers, json=payload, timeout=timeout) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    expired = self._deadline_error()
+                    if expired:
+                        raise expired
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        chunk = None
+                    if not isinstance(chunk, dict):
+                        # keep-alives and other non-JSON payloads carry no content
+                        continue
+                    if chunk.get("usage"):
+                        usage = chunk["usage"]
+                    for choice in chunk.get("choices") or []:
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+        except Exception as e:
+            error = True
+            if isinstance(e, httpx.TimeoutException):
+                raise (self._deadline_error() or e) from e
+            raise
+        finally:
+            if not usage:
+                prompt = estimate_messages_tokens(messages)
+                completion = estimate_tokens("".join(parts))
+                usage = {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+            usage_metrics.record(task, usage, time.perf_counter() - started, error=error)
 
     def _extract_content(self, resp: Any) -> str:
         """Extract content from response, handling both dict and object formats."""
@@ -44,76 +204,287 @@ class OpenAIService:
 
     def _extract_json(self, text: str) -> str:
         """Clean and extract JSON from response text."""
-        cleaned = text.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.strip('`')
-            # remove leading language hints like json\n
-            idx = cleaned.find('{')
-            if idx != -1:
-                cleaned = cleaned[idx:]
-        # Trim trailing text after matching final '}'
-        last = cleaned.rfind('}')
-        if last != -1:
-            cleaned = cleaned[: last + 1]
-        return cleaned
+        try:
+            return json.dumps(extract_json(text))
+        except JSONExtractionError:
+            return text.strip()
+
+    def _response_format(self, schema: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+        """Pick the strongest JSON enforcement the configured api-version supports."""
+        version = self.azure_api_version[:10]
+        if self.structured_outputs and version >= "2024-08-01":
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema(), "strict": False},
+            }
+        if version >= "2023-12-01":
+            return {"type": "json_object"}
+        return None
+
+    async def _chat_json(self, messages: List[Dict[str, str]], schema: Type[BaseModel], temperature: float = 0.3,
+                         max_tokens: int = 800, drop_invalid: bool = False, task: str = "chat") -> Dict[str, Any]:
+        """
+        Run a JSON completion and validate it straight into ``schema``.
+        Fields that fail validation are re-requested on their own instead of
+        discarding the whole completion. With ``drop_invalid`` bad list items
+        are dropped rather than repaired.
+        """
+        resp = await self._chat(messages, temperature=temperature, max_tokens=max_tokens,
+                                response_format=self._response_format(schema), task=task)
+        text = self._extract_content(resp)
+        try:
+            data = extract_json(text)
+        except JSONExtractionError:
+            data = {}
+        return await self._finalize_json(messages, text, data, schema, max_tokens, drop_invalid, task)
+
+    async def _chat_json_stream(self, messages: List[Dict[str, str]], schema: Type[BaseModel], temperature: float = 0.3,
+                                max_tokens: int = 800, task: str = "chat") -> AsyncIterator[Tuple[Tuple[Any, ...], Any]]:
+        """
+        Stream a JSON completion, yielding ``(path, value)`` for each top-level
+        field and each element of a top-level list as soon as it closes and
+        validates. The last item is ``((), result)`` with the full validated object.
+        """
+        ext = StreamingJSONExtractor()
+        parts: List[str] = []
+        async for delta in self._chat_stream(messages, temperature=temperature, max_tokens=max_tokens,
+                                             response_format=self._response_format(schema), task=task):
+            parts.append(delta)
+            for path, value in ext.feed(delta):
+                validated = validate_path(schema, path, value)
+                if validated is not None:
+                    yield path, validated
+        try:
+            data = ext.result()
+        except JSONExtractionError:
+            data = {}
+        yield (), await self._finalize_json(messages, "".join(parts), data, schema, max_tokens, False, task)
+
+    async def _finalize_json(self, messages: List[Dict[str, str]], text: str, data: Dict[str, Any], schema: Type[BaseModel],
+                             max_tokens: int, drop_invalid: bool, task: str) -> Dict[str, Any]:
+        """Validate extracted data, repairing failed fields before giving up."""
+        if drop_invalid:
+            data = drop_invalid_items(schema, data)
+        value, failed = validate_fields(schema, data)
+
+        attempts = 0
+        while failed and attempts < self.repair_attempts:
+            attempts += 1
+            data.update(await self._repair_fields(messages, text, schema, failed, max_tokens, task))
+            if drop_invalid:
+                data = drop_invalid_items(schema, data)
+            value, failed = validate_fields(schema, data)
+
+        if failed:
+            # Last resort: drop failing fields that have defaults and keep the rest
+            fields = schema.model_fields
+            salvage = {k: v for k, v in data.items() if k not in failed or (k in fields and fields[k].is_required())}
+            value, failed = validate_fields(schema, salvage)
+        if failed:
+            raise LLMResponseError(f"{schema.__name__} validation failed: {'; '.join(failed.values())}")
+        return value.model_dump(exclude_unset=True)
+
+    async def _repair_fields(self, messages: List[Dict[str, str]], text: str, schema: Type[BaseModel],
+                             failed: Dict[str, str], max_tokens: int, task: str = "chat") -> Dict[str, Any]:
+        """Ask the model to re-emit only the fields that failed validation."""
+        keys = [k for k in failed if k in schema.model_fields] or list(schema.model_fields)
+        share = len(keys) / max(1, len(schema.model_fields))
+        repair = list(messages) + [
+            {"role": "assistant", "content": text or "{}"},
+            {"role": "user", "content": (
+                "Some fields were missing or invalid:\n" + "\n".join(f"- {e}" for e in failed.values()) + "\n"
+                f"Return ONLY a JSON object with corrected values for just these keys: {json.dumps(keys)}."
+            )},
+        ]
+        fmt = self._response_format(schema)
+        if fmt and len(keys) < len(schema.model_fields):
+            # the full schema would demand every required field again
+            fmt = {"type": "json_object"}
+        resp = await self._chat(repair, temperature=0.0, max_tokens=max(200, int(max_tokens * share)),
+                                response_format=fmt, task=f"{task}:repair")
+        try:
+            patch = extract_json(self._extract_content(resp))
+        except JSONExtractionError:
+            return {}
+        return {k: v for k, v in patch.items() if k in keys}
 
     async def predict_properties(self, molecule_name: str, smiles: Optional[str] = None) -> Dict[str, Any]:
-        system = (
-            "You are a pharmaceutical AI system specialized in early-phase molecule assessment. "
-            "Provide non-clinical, high-level insights only."
-        )
+        return await self._predict("properties", molecule_name, smiles)
+
+    async def predict_toxicity(self, molecule_name: str, smiles: Optional[str] = None) -> Dict[str, Any]:
+        """Toxicity alone (``{"toxicity": ...}``), for callers that compute the other properties locally."""
+        return await self._predict("toxicity", molecule_name, smiles)
+
+    async def _predict(self, kind: str, molecule_name: str, smiles: Optional[str]) -> Dict[str, Any]:
+        spec = _PREDICTIONS[kind]
         user = (
-            "Task: Predict molecular properties.\n"
+            f"Task: {spec['task']}.\n"
             f"Molecule: {molecule_name}\n"
             f"SMILES: {smiles or 'N/A'}\n\n"
             "Return ONLY valid JSON (no backticks, no extra commentary) with the schema: {\n"
-            "  \"toxicity\": {\"score\": 0-100, \"level\": \"low|medium|high\", \"explanation\": string},\n"
-            "  \"solubility\": {\"score\": 0-100, \"details\": string},\n"
-            "  \"drugLikeness\": {\"score\": 0-100, \"passes\": boolean},\n"
-            "  \"bioavailability\": {\"percentage\": 0-100, \"explanation\": string},\n"
-            "  \"bbbPenetration\": {\"canCross\": boolean, \"confidence\": string},\n"
-            "  \"lipinskiRules\": {\"passes\": boolean, \"violations\": string[]}\n"
+            + spec["schema"] +
             "}. If unsure, estimate conservatively."
         )
 
-        resp = await self._chat([
-            {"role": "system", "content": system},
+        return await self._chat_json([
+            {"role": "system", "content": _PROPS_SYSTEM},
             {"role": "user", "content": user},
-        ], temperature=0.3, max_tokens=600)
-        
-        text = self._extract_content(resp)
-        cleaned = self._extract_json(text)
-        
-        try:
-            return json.loads(cleaned)
-        except Exception:
-            return {}
+        ], spec["model"], temperature=0.3, max_tokens=spec["max_tokens"], task=spec["name"])
 
-    async def explain_simple(self, molecule_name: str, prop: str, context: Optional[str] = None) -> str:
+    def props_chunk_size(self, kind: str = "properties") -> int:
+        """Molecules per completion in predict_properties_batch (or predict_toxicity_batch)."""
+        settings = get_settings()
+        per_item = OpenAIService._item_tokens.get(kind) or _PREDICTIONS[kind]["item_tokens"]()
+        # leave headroom for the array wrapper and estimation error
+        return max(1, min(settings.PROPS_BATCH_MAX_SIZE, int(settings.PROPS_BATCH_MAX_TOKENS * 0.8 // per_item)))
+
+    async def _predict_chunk(self, kind: str, molecules: List[Tuple[str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+        """One completion for several molecules; returns {id: prediction} for the entries that came back valid."""
+        spec = _PREDICTIONS[kind]
+        lines = []
+        for i, (name, smiles) in enumerate(molecules):
+            label = smiles if smiles and smiles == name else f"{name} (SMILES: {smiles or 'N/A'})"
+            lines.append(f"m{i}: {label}")
+        user = (
+            f"Task: {spec['task']} for each molecule below.\n"
+            + "\n".join(lines) + "\n\n"
+            "Return ONLY valid JSON (no backticks, no extra commentary): {\"results\": [ one object per molecule, "
+            "in the same order, each with \"id\" (the m-number above) and the schema: {\n"
+            + spec["schema"] +
+            "} ]}. If unsure, estimate conservatively."
+        )
+        obj = await self._chat_json([
+            {"role": "system", "content": _PROPS_SYSTEM},
+            {"role": "user", "content": user},
+        ], spec["batch_model"], temperature=0.3, max_tokens=get_settings().PROPS_BATCH_MAX_TOKENS,
+            drop_invalid=True, task=spec["name"] + "_batch")
+        out: Dict[str, Dict[str, Any]] = {}
+        for item in obj.get('results') or []:
+            key = item.pop('id', None)
+            if key is not None:
+                out[str(key).strip()] = item
+        if out:
+            observed = sum(estimate_tokens(json.dumps(v)) for v in out.values()) / len(out) + 10
+            prev = OpenAIService._item_tokens.get(kind)
+            OpenAIService._item_tokens[kind] = observed if prev is None else 0.7 * prev + 0.3 * observed
+        return out
+
+    async def predict_properties_batch(self, molecules: List[Tuple[str, Optional[str]]],
+                                       concurrency: Optional[int] = None,
+                                       on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Predict properties for many ``(name, smiles)`` pairs, several per
+        completion. Chunk size follows PROPS_BATCH_MAX_TOKENS and the observed
+        output size per molecule. Entries missing or invalid in a batch are
+        retried one by one with predict_properties. Results are aligned with
+        ``molecules``; None where no prediction could be made. ``on_result(i, props)``
+        is called as each prediction arrives, for callers that stream them.
+        """
+        return await self._predict_batch("properties", molecules, concurrency, on_result)
+
+    async def predict_toxicity_batch(self, molecules: List[Tuple[str, Optional[str]]],
+                                     concurrency: Optional[int] = None,
+                                     on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Optional[Dict[str, Any]]]:
+        """predict_properties_batch for toxicity alone."""
+        return await self._predict_batch("toxicity", molecules, concurrency, on_result)
+
+    async def _predict_batch(self, kind: str, molecules: List[Tuple[str, Optional[str]]], concurrency: Optional[int],
+                             on_result: Optional[Callable[[int, Dict[str, Any]], None]]) -> List[Optional[Dict[str, Any]]]:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(molecules)
+        limit = asyncio.Semaphore(max(1, concurrency or get_settings().PROPS_BATCH_CONCURRENCY))
+        size = self.props_chunk_size(kind)
+        chunks = [list(range(i, min(i + size, len(molecules)))) for i in range(0, len(molecules), size)]
+
+        async def run_chunk(idxs: List[int]) -> None:
+            async with limit:
+                if self._deadline_error():
+                    return
+                if len(idxs) > 1:
+                    try:
+                        got = await self._predict_chunk(kind, [molecules[i] for i in idxs])
+                    except DeadlineExceeded:
+                        return
+                    except Exception as e:
+                        print(f"[OpenAI] Batched {kind} prediction failed, falling back per molecule: {e}")
+                        got = {}
+                    for j, i in enumerate(idxs):
+                        results[i] = got.get(f"m{j}")
+                        if on_result and results[i] is not None:
+                            on_result(i, results[i])
+            missing = [i for i in idxs if results[i] is None]
+            await asyncio.gather(*(run_one(i) for i in missing))
+
+        async def run_one(i: int) -> None:
+            async with limit:
+                if self._deadline_error():
+                    return
+                try:
+                    results[i] = await self._predict(kind, *molecules[i])
+                    if on_result:
+                        on_result(i, results[i])
+                except Exception as e:
+                    print(f"[OpenAI] {kind.capitalize()} prediction failed for {molecules[i][0]}: {e}")
+
+        await asyncio.gather(*(run_chunk(c) for c in chunks))
+        return results
+
+    def _explain_messages(self, molecule_name: str, prop: str, context: Optional[str] = None) -> List[Dict[str, str]]:
         system = (
             "You simplify scientific outputs for a general audience without medical advice. "
             "Use short sentences and plain language."
         )
         user = (
-            f"Molecule: {molecule_name}. Property: {prop}.\n"
-            f"Context (may be JSON): {context or 'N/A'}.\n"
-            "Explain in simple terms (2-4 sentences)."
+            PromptBuilder("explain_simple")
+            .add(f"Molecule: {molecule_name}. Property: {prop}.\nContext (may be JSON): ")
+            .add(context or 'N/A', priority=1, trimmer=trim_json)
+            .add(".\nExplain in simple terms (2-4 sentences).")
+            .build(reserved=estimate_tokens(system))
         )
         
-        resp = await self._chat([
+        return [
             {"role": "system", "content": system},
             {"role": "user", "content": user},
-        ], temperature=0.4, max_tokens=220)
-        
+        ]
+
+    async def explain_simple(self, molecule_name: str, prop: str, context: Optional[str] = None) -> str:
+        resp = await self._chat(self._explain_messages(molecule_name, prop, context),
+                                temperature=0.4, max_tokens=220, task="explain_simple")
         return self._extract_content(resp)
 
-    async def docking_analyze(self, protein_summary: str, ligand: str, params: dict) -> Dict[str, Any]:
+    def explain_simple_stream(self, molecule_name: str, prop: str, context: Optional[str] = None) -> AsyncIterator[str]:
+        return self._chat_stream(self._explain_messages(molecule_name, prop, context),
+                                 temperature=0.4, max_tokens=220, task="explain_simple")
+
+    def _analyze_molecule_messages(self, molecule_name: str) -> List[Dict[str, str]]:
+        system = (
+            "You are a pharmaceutical AI assistant. Give concise, non-clinical overviews of molecules "
+            "for researchers and students. No medical advice."
+        )
+        user = (
+            f"Molecule: {molecule_name}.\n"
+            "Describe its structure class, mechanism of action or main uses, key physicochemical properties, "
+            "and notable safety considerations in 4 short paragraphs."
+        )
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+
+    async def analyze_molecule(self, molecule_name: str) -> str:
+        resp = await self._chat(self._analyze_molecule_messages(molecule_name),
+                                temperature=0.4, max_tokens=700, task="analyze_molecule")
+        return self._extract_content(resp)
+
+    def analyze_molecule_stream(self, molecule_name: str) -> AsyncIterator[str]:
+        return self._chat_stream(self._analyze_molecule_messages(molecule_name),
+                                 temperature=0.4, max_tokens=700, task="analyze_molecule")
+
+    def _docking_messages(self, protein_summary: str, ligand: str, params: dict) -> List[Dict[str, str]]:
         system = (
             "You are a structural bioinformatics assistant. Analyze protein structure summaries, find likely binding sites, "
             "and describe preparation steps and expected interactions for docking. Return JSON only."
         )
-        user = (
-            "Protein summary (PDB text or ID-derived info):\n" + protein_summary[:4000] + "\n"
+        instructions = (
             f"Ligand: {ligand}. Parameters: {json.dumps(params)}.\n"
             "Return ONLY JSON with schema: {\n"
             "  \"preparationSteps\": [string],\n"
@@ -129,19 +500,26 @@ class OpenAIService:
             "  \"poses\": [{\"id\": string, \"score\": number, \"bindingEnergy\": number, \"interactions\": [{\"type\": string, \"residues\": [string]}], \"residues\": [string]}]\n"
             "}"
         )
+        user = (
+            PromptBuilder("docking_analyze")
+            .add("Protein summary (PDB text or ID-derived info):\n")
+            .add(protein_summary, priority=1, trimmer=summarize_pdb if is_pdb_text(protein_summary) else trim_lines)
+            .add("\n" + instructions)
+            .build(reserved=estimate_tokens(system))
+        )
         
-        resp = await self._chat([
-            {"role": "system", "content": system}, 
-            {"role": "user", "content": user}
-        ], temperature=0.3, max_tokens=1000)
-        
-        text = self._extract_content(resp)
-        cleaned = self._extract_json(text)
-        
-        try:
-            return json.loads(cleaned)
-        except Exception:
-            return {}
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+
+    async def docking_analyze(self, protein_summary: str, ligand: str, params: dict) -> Dict[str, Any]:
+        return await self._chat_json(self._docking_messages(protein_summary, ligand, params), DockingAnalysis,
+                                     temperature=0.3, max_tokens=1000, task="docking_analyze")
+
+    def docking_analyze_stream(self, protein_summary: str, ligand: str, params: dict) -> AsyncIterator[Tuple[Tuple[Any, ...], Any]]:
+        return self._chat_json_stream(self._docking_messages(protein_summary, ligand, params), DockingAnalysis,
+                                      temperature=0.3, max_tokens=1000, task="docking_analyze")
 
     async def admet_predict(self, molecule: str, smiles: Optional[str] = None) -> Dict[str, Any]:
         system = (
@@ -160,20 +538,12 @@ class OpenAIService:
             "}"
         )
         
-        resp = await self._chat([
+        return await self._chat_json([
             {"role": "system", "content": system}, 
             {"role": "user", "content": user}
-        ], temperature=0.3, max_tokens=1000)
-        
-        text = self._extract_content(resp)
-        cleaned = self._extract_json(text)
-        
-        try:
-            return json.loads(cleaned)
-        except Exception:
-            return {}
+        ], AdmetPrediction, temperature=0.3, max_tokens=1000, task="admet_predict")
 
-    async def retro_plan(self, target: str, constraints: Dict[str, Any], starting: Optional[list], routes: int) -> Dict[str, Any]:
+    def _retro_messages(self, target: str, constraints: Dict[str, Any], starting: Optional[list], routes: int) -> List[Dict[str, str]]:
         system = (
             "You are a retrosynthesis planning assistant. Work backwards from a target molecule to propose multiple feasible synthesis routes. "
             "Return clear JSON only. Use conservative yields and include costs/time/safety qualitatively. Prefer green chemistry where possible."
@@ -188,18 +558,18 @@ class OpenAIService:
             "}"
         )
         
-        resp = await self._chat([
-            {"role": "system", "content": system}, 
-            {"role": "user", "content": user}
-        ], temperature=0.6, max_tokens=1800)
-        
-        text = self._extract_content(resp)
-        cleaned = self._extract_json(text)
-        
-        try:
-            return json.loads(cleaned)
-        except Exception:
-            return {}
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+
+    async def retro_plan(self, target: str, constraints: Dict[str, Any], starting: Optional[list], routes: int) -> Dict[str, Any]:
+        return await self._chat_json(self._retro_messages(target, constraints, starting, routes), RetroPlan,
+                                     temperature=0.6, max_tokens=1800, task="retro_plan")
+
+    def retro_plan_stream(self, target: str, constraints: Dict[str, Any], starting: Optional[list], routes: int) -> AsyncIterator[Tuple[Tuple[Any, ...], Any]]:
+        return self._chat_json_stream(self._retro_messages(target, constraints, starting, routes), RetroPlan,
+                                      temperature=0.6, max_tokens=1800, task="retro_plan")
 
     async def analyze_interactions(self, drugs: list[str]) -> Dict[str, Any]:
         system = (
@@ -225,18 +595,10 @@ class OpenAIService:
             "}. Consider pairwise interactions and combined multi-drug effects."
         )
         
-        resp = await self._chat([
+        return await self._chat_json([
             {"role": "system", "content": system},
             {"role": "user", "content": user},
-        ], temperature=0.3, max_tokens=900)
-        
-        text = self._extract_content(resp)
-        cleaned = self._extract_json(text)
-        
-        try:
-            return json.loads(cleaned)
-        except Exception:
-            return {}
+        ], InteractionResponse, temperature=0.3, max_tokens=900, task="analyze_interactions")
 
     async def predict_reaction(self, reactant_a: str, reactant_b: str, conditions: Dict[str, Any]) -> Dict[str, Any]:
         system = (
@@ -257,15 +619,7 @@ class OpenAIService:
             "}. If uncertain, be conservative."
         )
         
-        resp = await self._chat([
+        return await self._chat_json([
             {"role": "system", "content": system},
             {"role": "user", "content": user},
-        ], temperature=0.3, max_tokens=800)
-        
-        text = self._extract_content(resp)
-        cleaned = self._extract_json(text)
-        
-        try:
-            return json.loads(cleaned)
-        except Exception:
-            return {}
\ No newline at end of file
+        ], ReactionResponse, temperature=0.3, max_tokens=800, task="predict_reaction")
\ No newline at end of file
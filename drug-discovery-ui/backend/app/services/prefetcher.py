@@ -0,0 +1,156 @@
+"""
+Background cache prefetcher.
+Request handlers report each cache lookup to the prefetcher, which counts key
+frequency in a count-min sketch and keeps the current top-K keys. A lifespan
+task refreshes popular entries shortly before they go stale, at a bounded
+rate, so hot molecules and drug combinations are always served from cache.
+"""
+import asyncio
+import hashlib
+from array import array
+from time import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..core.config import get_settings
+from ..core.metrics import current_route
+from ..utils import swr
+from ..utils.molecule_utils import cache
+
+# builder(params) -> (cache key, loader); registered per task by the routes that own it
+Builder = Callable[[Dict[str, Any]], Awaitable[Tuple[str, Callable[[], Awaitable[Any]]]]]
+
+
+class CountMinSketch:
+    """Approximate per-key counts in fixed memory; ``decay()`` halves all counters."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("I", [0]) * width for _ in range(depth)]
+
+    def _indexes(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8 * self.depth).digest()
+        for i in range(self.depth):
+            yield i, int.from_bytes(digest[8 * i:8 * i + 8], "little") % self.width
+
+    def add(self, key: str, count: int = 1) -> int:
+        est = None
+        for i, j in self._indexes(key):
+            row = self.rows[i]
+            row[j] = min(row[j] + count, 0xFFFFFFFF)
+            est = row[j] if est is None else min(est, row[j])
+        return est or 0
+
+    def estimate(self, key: str) -> int:
+        return min(self.rows[i][j] for i, j in self._indexes(key))
+
+    def decay(self) -> None:
+        for row in self.rows:
+            for j in range(self.width):
+                row[j] >>= 1
+
+
+class Prefetcher:
+    def __init__(self, top_k: int = 100, width: int = 2048, depth: int = 4):
+        self.sketch = CountMinSketch(width, depth)
+        self.top_k = top_k
+        # key -> [estimated count, task, params]
+        self.top: Dict[str, List[Any]] = {}
+        self.builders: Dict[str, Builder] = {}
+        self.stats = {"observed": 0, "refreshes": 0, "refresh_errors": 0, "warmed": 0}
+
+    def register(self, task: str, builder: Builder) -> None:
+        self.builders[task] = builder
+
+    def observe(self, key: str, task: str, params: Dict[str, Any]) -> None:
+        """Count one request for ``key`` (cheap; called on the request path)."""
+        self.stats["observed"] += 1
+        est = self.sketch.add(key)
+        entry = self.top.get(key)
+        if entry is not None:
+            entry[0] = est
+            return
+        if len(self.top) < self.top_k:
+            self.top[key] = [est, task, params]
+            return
+        coldest = min(self.top, key=lambda k: self.top[k][0])
+        if est > self.top[coldest][0]:
+            del self.top[coldest]
+            self.top[key] = [est, task, params]
+
+    def hot_keys(self, min_count: int = 1) -> List[Tuple[str, int, str, Dict[str, Any]]]:
+        rows = [(k, v[0], v[1], v[2]) for k, v in self.top.items() if v[0] >= min_count]
+        return sorted(rows, key=lambda r: r[1], reverse=True)
+
+    def decay(self) -> None:
+        self.sketch.decay()
+        for key, entry in list(self.top.items()):
+            entry[0] = self.sketch.estimate(key)
+            if entry[0] == 0:
+                del self.top[key]
+
+    async def _due(self, key: str, lead: float) -> bool:
+        entry = await cache.aget(key)
+        if entry is None:
+            return True
+        _, fresh_until = swr.unwrap(entry)
+        return fresh_until - time() < lead
+
+    async def _refresh(self, task: str, params: Dict[str, Any]) -> None:
+        builder = self.builders.get(task)
+        if builder is None:
+            return
+        # the load task swr starts copies this, so its LLM usage is filed under the task
+        token = current_route.set(f"prefetch:{task}")
+        try:
+            key, loader = await builder(params)
+            await swr.refresh(key, loader)
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            print(f"[Prefetch] Refresh of {task} {params} failed: {e}")
+        finally:
+            current_route.reset(token)
+
+    async def warmup(self, items: List[Dict[str, Any]]) -> None:
+        """Load ``[{"task": ..., **params}]`` entries that are missing or stale."""
+        settings = get_settings()
+        for item in items:
+            params = dict(item)
+            task = params.pop("task", None)
+            if task not in self.builders:
+                continue
+            key, _ = await self.builders[task](params)
+            if await self._due(key, settings.PREFETCH_LEAD_SECONDS):
+                await self._refresh(task, params)
+                self.stats["warmed"] += 1
+                await asyncio.sleep(60.0 / max(1, settings.PREFETCH_MAX_PER_MINUTE))
+
+    async def run(self) -> None:
+        """Lifespan task: warm up, then periodically refresh hot entries before they go stale."""
+        settings = get_settings()
+        await self.warmup(settings.PREFETCH_WARMUP)
+        pause = 60.0 / max(1, settings.PREFETCH_MAX_PER_MINUTE)
+        last_decay = time()
+        while True:
+            await asyncio.sleep(settings.PREFETCH_INTERVAL)
+            if time() - last_decay > settings.PREFETCH_DECAY_SECONDS:
+                self.decay()
+                last_decay = time()
+            for key, count, task, params in self.hot_keys(settings.PREFETCH_MIN_HITS):
+                # low priority: yield to user-triggered loads already in flight
+                if swr.inflight_count() >= settings.PREFETCH_MAX_INFLIGHT:
+                    break
+                if await self._due(key, settings.PREFETCH_LEAD_SECONDS):
+                    await self._refresh(task, params)
+                    await asyncio.sleep(pause)
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "tracked": len(self.top),
+            "top": [{"key": k, "count": c, "task": t} for k, c, t, _ in self.hot_keys()[:limit]],
+        }
+
+
+prefetcher = Prefetcher(top_k=get_settings().PREFETCH_TOP_K)
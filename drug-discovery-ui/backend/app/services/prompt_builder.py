@@ -0,0 +1,141 @@
+"""
+Token-budgeted prompt assembly.
+Sections are added with a priority; when the estimated prompt exceeds the
+task budget, the lowest-priority sections are shrunk with their own trimmer
+(dropping low-value lines) before anything is removed outright.
+"""
+import json
+from typing import Callable, Dict, List, Optional
+
+from ..core.config import get_settings
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+# Roughly 4 characters per token for English/JSON prompts on GPT-4 class tokenizers
+_CHARS_PER_TOKEN = 4
+
+# PDB record types ranked by how much they tell the model about binding sites
+_PDB_RECORD_PRIORITY = {
+    "HEADER": 0, "TITLE": 0, "COMPND": 0, "SOURCE": 1, "KEYWDS": 1,
+    "HET": 0, "HETNAM": 0, "HETSYN": 1, "FORMUL": 1, "SITE": 0,
+    "SEQRES": 2, "HELIX": 3, "SHEET": 3, "SSBOND": 3, "LINK": 2,
+    "HETATM": 2, "REMARK": 5, "ATOM": 4,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text (exact when tiktoken is installed)."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    # ~4 tokens of chat framing per message
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
+
+
+def trim_lines(text: str, max_tokens: int) -> str:
+    """Keep whole lines from the top until the budget is reached."""
+    out: List[str] = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        out.append(line)
+        used += cost
+    return "\n".join(out)
+
+
+def trim_json(text: str, max_tokens: int) -> str:
+    """
+    Shrink a JSON context one top-level key per line, keeping short facts
+    (scores, flags) ahead of long free-text fields. Non-JSON falls back to lines.
+    """
+    try:
+        obj = json.loads(text)
+    except (TypeError, ValueError):
+        return trim_lines(text, max_tokens)
+    if not isinstance(obj, dict):
+        return trim_lines(text, max_tokens)
+    items = sorted((json.dumps({k: v}, separators=(",", ":"))[1:-1] for k, v in obj.items()), key=len)
+    return trim_lines("\n".join(items), max_tokens)
+
+
+def summarize_pdb(text: str, max_tokens: int) -> str:
+    """
+    Reduce PDB text to the records most useful for binding-site analysis.
+    Header, ligand (HET/HETNAM/SITE) and sequence records are kept first;
+    C-alpha ATOM lines are used only if budget remains; other coordinates go.
+    Original record order is preserved.
+    """
+    lines = text.splitlines()
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    ranked = []
+    for i, line in enumerate(lines):
+        rec = line[:6].strip()
+        prio = _PDB_RECORD_PRIORITY.get(rec, 6)
+        if rec == "ATOM":
+            # keep only C-alpha trace from the coordinate block
+            if line[12:16].strip() != "CA":
+                continue
+        elif rec in ("ANISOU", "CONECT", "MASTER", "END", "TER"):
+            continue
+        ranked.append((prio, i, line))
+    ranked.sort()
+    keep = set()
+    used = 0
+    for prio, i, line in ranked:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            continue
+        keep.add(i)
+        used += cost
+    return "\n".join(lines[i] for i in sorted(keep))
+
+
+def is_pdb_text(text: str) -> bool:
+    head = text.lstrip()[:6].strip()
+    return head in _PDB_RECORD_PRIORITY or "\nATOM  " in text
+
+
+class PromptBuilder:
+    """Assemble a prompt from prioritized sections under a per-task token budget."""
+
+    def __init__(self, task: str, budget: Optional[int] = None) -> None:
+        settings = get_settings()
+        self.task = task
+        self.budget = budget or settings.PROMPT_BUDGETS.get(task, settings.PROMPT_BUDGET_DEFAULT)
+        self._sections: List[Dict] = []
+
+    def add(self, text: str, priority: int = 0, trimmer: Optional[Callable[[str, int], str]] = None) -> "PromptBuilder":
+        """
+        Add a section. Priority 0 is never trimmed; higher numbers are trimmed first.
+        ``trimmer(text, max_tokens)`` shrinks a section; without one it can only be dropped.
+        """
+        self._sections.append({"text": text or "", "priority": priority, "trimmer": trimmer})
+        return self
+
+    def build(self, reserved: int = 0) -> str:
+        """Join sections, trimming low-value ones until the estimate fits ``budget - reserved``."""
+        limit = max(0, self.budget - reserved)
+        costs = [estimate_tokens(s["text"]) for s in self._sections]
+        order = sorted((i for i, s in enumerate(self._sections) if s["priority"] > 0),
+                       key=lambda i: -self._sections[i]["priority"])
+        for i in order:
+            over = sum(costs) - limit
+            if over <= 0:
+                break
+            sec = self._sections[i]
+            allowed = max(0, costs[i] - over)
+            sec["text"] = sec["trimmer"](sec["text"], allowed) if sec["trimmer"] and allowed else ""
+            costs[i] = estimate_tokens(sec["text"])
+        return "".join(s["text"] for s in self._sections)
@@ -0,0 +1,213 @@
+"""
+Local RDKit property predictor filling the PropertyPrediction schema.
+Solubility is the ESOL logS estimate (Delaney 2004), drug-likeness is QED,
+Lipinski comes from calculate_lipinski_properties, BBB penetration is a
+TPSA/logP/MW/HBD rule and bioavailability counts Veber and Egan violations.
+Toxicity is only a structural-alert count, which is why "hybrid" mode lets
+the LLM supply it. PROPERTY_PREDICTOR_MODE selects:
+  local  - RDKit only, no LLM call
+  hybrid - RDKit values, toxicity from the LLM when it answers (the model is
+           only asked for toxicity unless RDKit could not handle the molecule)
+  llm    - model prediction only; RDKit values are served (flagged heuristic)
+           by /molecule/predict-properties when the model fails
+"""
+import asyncio
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.config import get_settings
+from ..utils.chemo_utils import (
+    RDKIT_AVAILABLE,
+    calculate_lipinski_properties,
+    check_structural_alerts,
+    detect_toxicophores,
+    smiles_to_mol,
+)
+
+try:
+    from rdkit.Chem import QED, Crippen, Descriptors
+except ImportError:
+    pass
+
+MODES = ("local", "hybrid", "llm")
+
+_SEVERITY_POINTS = {"high": 30, "medium": 20, "low": 10}
+
+
+def mode() -> str:
+    value = (get_settings().PROPERTY_PREDICTOR_MODE or "").lower()
+    return value if value in MODES else "llm"
+
+
+def cache_extra() -> str:
+    """
+    Key suffix for predictions, so switching modes never serves another
+    mode's answers; the key's task stays ``props`` so its TTLs still apply.
+    """
+    current = mode()
+    return "" if current == "llm" else current
+
+
+def completions_for(oa: Any, count: int) -> int:
+    """LLM completions predict_many makes for ``count`` molecules (none in local mode)."""
+    current = mode()
+    if current == "local" or count <= 0:
+        return 0
+    return math.ceil(count / oa.props_chunk_size("toxicity" if current == "hybrid" else "properties"))
+
+
+def _clip(value: float, low: int = 0, high: int = 100) -> int:
+    return int(max(low, min(high, round(value))))
+
+
+def esol_log_s(mol: Any) -> float:
+    """ESOL aqueous solubility, log10(mol/L)."""
+    heavy = mol.GetNumHeavyAtoms() or 1
+    aromatic = sum(1 for atom in mol.GetAtoms() if atom.GetIsAromatic()) / heavy
+    return (0.16 - 0.63 * Crippen.MolLogP(mol) - 0.0062 * Descriptors.MolWt(mol)
+            + 0.066 * Descriptors.NumRotatableBonds(mol) - 0.74 * aromatic)
+
+
+def _solubility(log_s: float) -> Dict[str, Any]:
+    if log_s > -2:
+        label = "highly soluble"
+    elif log_s > -4:
+        label = "soluble"
+    elif log_s > -6:
+        label = "poorly soluble"
+    else:
+        label = "insoluble"
+    # logS 0 and above maps to 100, -8 and below to 0
+    return {"score": _clip((log_s + 8) * 12.5), "details": f"ESOL logS {log_s:.2f} ({label})."}
+
+
+def _toxicity(smiles: str, qed_alerts: int) -> Dict[str, Any]:
+    toxicophores = detect_toxicophores(smiles)
+    alerts = check_structural_alerts(smiles)
+    score = _clip(10 + sum(_SEVERITY_POINTS.get(t["severity"], 10) for t in toxicophores)
+                  + 10 * len(alerts) + 8 * min(qed_alerts, 5))
+    level = "low" if score < 35 else "medium" if score < 65 else "high"
+    found = [t["name"] for t in toxicophores] + [a.replace("_", " ") for a in alerts]
+    if qed_alerts:
+        found.append(f"{qed_alerts} unwanted-group alert{'s' if qed_alerts > 1 else ''}")
+    explanation = ("Structural alerts: " + ", ".join(found) + ".") if found else "No structural alerts matched."
+    return {"score": score, "level": level, "explanation": explanation}
+
+
+def _bbb(tpsa: float, logp: float, mw: float, hbd: int) -> Dict[str, Any]:
+    failed = 4 - sum((tpsa <= 90, -1.5 <= logp <= 5, mw <= 450, hbd <= 3))
+    if failed == 0:
+        confidence = "high" if tpsa <= 60 else "medium"
+    else:
+        # a single miss is borderline
+        confidence = "low" if failed == 1 else "high"
+    return {"canCross": failed == 0, "confidence": confidence}
+
+
+def _bioavailability(tpsa: float, logp: float, rotb: int, ro5_violations: int) -> Dict[str, Any]:
+    veber = [r for r, bad in (("rotatable bonds > 10", rotb > 10), ("TPSA > 140", tpsa > 140)) if bad]
+    egan = [r for r, bad in (("logP > 5.88", logp > 5.88), ("TPSA > 131.6", tpsa > 131.6)) if bad]
+    percentage = _clip(85 - 20 * len(veber) - 15 * len(egan) - 10 * ro5_violations, 5, 95)
+    issues = veber + egan
+    explanation = ("Veber/Egan: " + ", ".join(issues) + "." if issues else "Passes Veber and Egan rules.")
+    if ro5_violations:
+        explanation += f" {ro5_violations} Lipinski violation{'s' if ro5_violations > 1 else ''}."
+    return {"percentage": percentage, "explanation": explanation}
+
+
+def predict_local(smiles: Optional[str]) -> Optional[Dict[str, Any]]:
+    """PropertyPrediction-shaped dict for ``smiles``, or None without RDKit or a parsable SMILES."""
+    if not RDKIT_AVAILABLE or not smiles:
+        return None
+    mol = smiles_to_mol(smiles)
+    lipinski = calculate_lipinski_properties(smiles)
+    if mol is None or lipinski is None:
+        return None
+    try:
+        # MW, ALOGP, HBA, HBD, PSA, ROTB, AROM, ALERTS in one pass
+        desc = QED.properties(mol)
+        qed = QED.qed(mol, qedProperties=desc)
+        violations = [v for v in lipinski["violations"] if v]
+        return {
+            "toxicity": _toxicity(smiles, desc.ALERTS),
+            "solubility": _solubility(esol_log_s(mol)),
+            "drugLikeness": {"score": _clip(qed * 100), "passes": qed >= 0.5},
+            "bioavailability": _bioavailability(desc.PSA, desc.ALOGP, desc.ROTB, len(violations)),
+            "bbbPenetration": _bbb(desc.PSA, desc.ALOGP, desc.MW, desc.HBD),
+            "lipinskiRules": {"passes": lipinski["passes"], "violations": violations},
+        }
+    except Exception as e:
+        print(f"[Predictor] Local prediction failed for {smiles}: {e}")
+        return None
+
+
+def combine(local: Optional[Dict[str, Any]], llm: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Hybrid result: computed properties from RDKit, toxicity from the model when it answered."""
+    if local is None or llm is None:
+        return local or llm
+    return {**local, "toxicity": llm.get("toxicity") or local["toxicity"]}
+
+
+async def predict(oa: Any, name: str, smiles: Optional[str]) -> Optional[Dict[str, Any]]:
+    """One prediction in the configured mode; None when nothing could be predicted."""
+    current = mode()
+    local = predict_local(smiles) if current != "llm" else None
+    if current == "local":
+        return local
+    try:
+        if local is not None:
+            # hybrid only keeps the model's toxicity
+            llm = await oa.predict_toxicity(name, smiles)
+        else:
+            llm = await oa.predict_properties(name, smiles)
+    except Exception as e:
+        if local is None:
+            raise
+        print(f"[Predictor] LLM prediction failed for {name}, using local values: {e}")
+        llm = None
+    return combine(local, llm)
+
+
+async def predict_many(oa: Any, molecules: List[Tuple[str, Optional[str]]], concurrency: Optional[int] = None,
+                       on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Predictions for many ``(name, smiles)`` pairs in the configured mode,
+    aligned with ``molecules``. The LLM is only asked for batches in hybrid
+    and llm modes (in hybrid, for toxicity alone where RDKit has the rest, and
+    a local-only answer stands for a molecule the model could not score);
+    ``on_result`` is called as each one is final.
+    """
+    current = mode()
+    local = [predict_local(smiles) for _, smiles in molecules] if current != "llm" else [None] * len(molecules)
+    if current == "local":
+        for i, props in enumerate(local):
+            if props is not None and on_result:
+                on_result(i, props)
+        return local
+
+    def arrived_for(indices: List[int]) -> Callable[[int, Dict[str, Any]], None]:
+        def arrived(j: int, props: Dict[str, Any]) -> None:
+            if on_result:
+                on_result(indices[j], combine(local[indices[j]], props))
+        return arrived
+
+    toxicity_only = [i for i, props in enumerate(local) if props is not None]
+    full = [i for i, props in enumerate(local) if props is None]
+    batches = []
+    if toxicity_only:
+        batches.append((toxicity_only, oa.predict_toxicity_batch([molecules[i] for i in toxicity_only], concurrency=concurrency,
+                                                                 on_result=arrived_for(toxicity_only))))
+    if full:
+        batches.append((full, oa.predict_properties_batch([molecules[i] for i in full], concurrency=concurrency,
+                                                          on_result=arrived_for(full))))
+    predicted: List[Optional[Dict[str, Any]]] = [None] * len(molecules)
+    for (indices, _), got in zip(batches, await asyncio.gather(*(batch for _, batch in batches))):
+        for i, props in zip(indices, got):
+            predicted[i] = props
+    results = [combine(mine, theirs) for mine, theirs in zip(local, predicted)]
+    if on_result:
+        # molecules the model never answered for still get their local values
+        for i, (mine, theirs) in enumerate(zip(local, predicted)):
+            if theirs is None and mine is not None:
+                on_result(i, mine)
+    return results
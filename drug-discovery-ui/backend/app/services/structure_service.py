@@ -1,31 +1,37 @@
-import httpx
 from typing import Optional, Tuple
 from urllib.parse import quote
+from ..core.deadline import Deadline, current_deadline, effective_timeout
+from ..core.http_client import get_http_client
 
 PUBCHEM_BASE = "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound"
 
 class StructureService:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, deadline: Optional[Deadline] = None) -> None:
+        self.deadline = deadline
 
     async def fetch_pubchem_sdf(self, query: str) -> Optional[str]:
-        # Try name/SMILES/InChIKey paths with 3D first then 2D
-        async with httpx.AsyncClient(timeout=20) as client:
-            for path in [
-                f"/name/{quote(query)}/SDF?record_type=3d",
-                f"/smiles/{quote(query)}/SDF?record_type=3d",
-                f"/inchikey/{quote(query)}/SDF?record_type=3d",
-                f"/name/{quote(query)}/SDF",
-                f"/smiles/{quote(query)}/SDF",
-                f"/inchikey/{quote(query)}/SDF",
-            ]:
-                url = PUBCHEM_BASE + path
-                try:
-                    r = await client.get(url)
-                    if r.status_code == 200 and r.text.strip():
-                        return r.text
-                except Exception:
-                    continue
+        # Try name/SMILES/InChIKey paths with 3D first then 2D, each bounded by the remaining request budget
+        deadline = self.deadline or current_deadline.get()
+        if deadline and deadline.expired:
+            return None
+        client = get_http_client()
+        for path in [
+            f"/name/{quote(query)}/SDF?record_type=3d",
+            f"/smiles/{quote(query)}/SDF?record_type=3d",
+            f"/inchikey/{quote(query)}/SDF?record_type=3d",
+            f"/name/{quote(query)}/SDF",
+            f"/smiles/{quote(query)}/SDF",
+            f"/inchikey/{quote(query)}/SDF",
+        ]:
+            url = PUBCHEM_BASE + path
+            if deadline and deadline.expired:
+                break
+            try:
+                r = await client.get(url, timeout=effective_timeout(20, deadline))
+                if r.status_code == 200 and r.text.strip():
+                    return r.text
+            except Exception:
+                continue
         return None
 
     def sdf_to_json(self, sdf: str) -> Optional[dict]:
@@ -0,0 +1,61 @@
+"""
+Cache backend interface.
+Every cache tier (in-process LRU, shared RESP/Redis server, SQLite disk)
+implements this so TieredCache and RateLimiter can work against any of them.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+
+def task_of(key: str) -> str:
+    """Task type of a cache key: ``molecule:props:...`` -> ``props``."""
+    parts = key.split(":", 2)
+    return parts[1] if len(parts) > 2 else parts[0]
+
+
+class CacheBackend:
+    """Key/value store with per-entry expiry. Values must be JSON-serializable."""
+
+    name = "backend"
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) or None if absent or expired."""
+        raise NotImplementedError
+
+    def get(self, key: str):
+        entry = self.lookup(key)
+        return entry[0] if entry else None
+
+    async def alookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """lookup() for coroutines; backends doing network I/O run it off the event loop."""
+        return self.lookup(key)
+
+    async def aget(self, key: str):
+        entry = await self.alookup(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        """
+        Atomically add ``amount`` to a counter and return its new value. The
+        expiry is set when the counter is created, giving fixed windows for
+        rate limiting.
+        """
+        raise NotImplementedError
+
+    async def aincr(self, key: str, ttl: float, amount: int = 1) -> int:
+        """incr() for coroutines."""
+        return self.incr(key, ttl, amount)
+
+    def sweep(self) -> int:
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
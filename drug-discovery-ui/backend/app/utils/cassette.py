@@ -0,0 +1,186 @@
+"""
+Record/replay of outbound HTTP traffic (Azure OpenAI, PubChem).
+In ``record`` mode every request/response pair made through the shared httpx
+client is written to a SQLite cassette keyed by a normalized request hash,
+together with every cache write, so the same file can later pre-seed the
+cache tiers. In ``replay`` mode responses are served from the cassette with
+optionally simulated latency and nothing leaves the machine.
+
+    python -m app.utils.cassette seed data/cassettes.sqlite3
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+from ..core.config import get_settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exchanges (
+    hash TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    request_body BLOB,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    latency_ms REAL NOT NULL,
+    recorded REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache_sets (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    ttl REAL,
+    recorded REAL NOT NULL
+);
+"""
+
+
+class CassetteMiss(httpx.TransportError):
+    """Replay mode found no recorded response for a request."""
+    pass
+
+
+def request_hash(request: httpx.Request) -> str:
+    """
+    Hash of method, URL (query params sorted) and body (JSON keys sorted).
+    Headers are left out so API keys and client versions don't split cassettes.
+    """
+    url = request.url
+    query = urlencode(sorted(parse_qsl(url.query.decode("ascii", "ignore"), keep_blank_values=True)))
+    body = request.content or b""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8")
+    except ValueError:
+        pass
+    h = hashlib.sha256()
+    for part in (request.method.encode(), f"{url.scheme}://{url.host}{url.path}?{query}".encode(), body):
+        h.update(part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class CassetteStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[Tuple[int, List[Tuple[str, str]], bytes, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT status, headers, body, latency_ms FROM exchanges WHERE hash = ?", (key,)).fetchone()
+        if not row:
+            return None
+        return row[0], [tuple(h) for h in json.loads(row[1])], row[2], row[3]
+
+    def put(self, key: str, request: httpx.Request, status: int, headers: List[Tuple[str, str]], body: bytes, latency_ms: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO exchanges (hash, method, url, request_body, status, headers, body, latency_ms, recorded) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, request.method, str(request.url.copy_with(query=None)), request.content, status,
+                 json.dumps(headers), body, latency_ms, time.time()),
+            )
+
+    def record_cache_set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        try:
+            blob = json.dumps(value, default=str)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO cache_sets (key, value, ttl, recorded) VALUES (?, ?, ?, ?)",
+                               (key, blob, ttl, time.time()))
+
+    def cache_sets(self) -> List[Tuple[str, Any, Optional[float]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value, ttl FROM cache_sets ORDER BY recorded").fetchall()
+        return [(k, json.loads(v), ttl) for k, v, ttl in rows]
+
+
+class RecordReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper for the shared httpx client. Recording buffers each
+    response body (streamed completions arrive in one piece while recording)
+    and hands the client an identical copy.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, store: CassetteStore, mode: str, latency_scale: float = 0.0):
+        self.inner = inner
+        self.store = store
+        self.mode = mode
+        self.latency_scale = latency_scale
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_hash(request)
+        if self.mode == "replay":
+            hit = await asyncio.to_thread(self.store.get, key)
+            if hit is None:
+                raise CassetteMiss(f"No recorded response for {request.method} {request.url.copy_with(query=None)}", request=request)
+            status, headers, body, latency_ms = hit
+            if self.latency_scale > 0:
+                await asyncio.sleep(latency_ms / 1000.0 * self.latency_scale)
+            return httpx.Response(status, headers=headers, stream=httpx.ByteStream(body), request=request)
+
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            # raw (still content-encoded) bytes, so the copy decodes exactly like the original
+            body = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in response.headers.raw]
+        await asyncio.to_thread(self.store.put, key, request, response.status_code, headers, body, latency_ms)
+        return httpx.Response(response.status_code, headers=headers, stream=httpx.ByteStream(body),
+                              request=request, extensions=response.extensions)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+_store: Optional[CassetteStore] = None
+
+
+def get_store() -> Optional[CassetteStore]:
+    """Cassette store for the configured mode, or None when record/replay is off."""
+    global _store
+    settings = get_settings()
+    if settings.HTTP_CASSETTE_MODE not in ("record", "replay"):
+        return None
+    if _store is None:
+        _store = CassetteStore(settings.HTTP_CASSETTE_PATH)
+    return _store
+
+
+def seed_cache(store: CassetteStore, target: Any) -> int:
+    """Replay recorded cache writes into ``target`` (a cache or TieredCache)."""
+    entries = store.cache_sets()
+    for key, value, ttl in entries:
+        target.set(key, value, ttl=ttl)
+    return len(entries)
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) != 2 or argv[0] != "seed":
+        print("usage: python -m app.utils.cassette seed <cassette.sqlite3>")
+        raise SystemExit(2)
+    from .molecule_utils import cache
+    count = seed_cache(CassetteStore(argv[1]), cache)
+    cache.close()
+    print(f"[Cassette] Seeded {count} cache entries from {argv[1]}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -7,9 +7,13 @@ import re
 from typing import List, Dict, Optional, Tuple, Any
 from functools import lru_cache
 
+import numpy as np
+
+from .ranking import score_many
+
 try:
-    from rdkit import Chem
-    from rdkit.Chem import Descriptors, Crippen, Lipinski, Allchem, Scaffolds
+    from rdkit import Chem, rdBase
+    from rdkit.Chem import Descriptors, Crippen, Lipinski, AllChem, Scaffolds
     RDKIT_AVAILABLE = True
 except ImportError:
     RDKIT_AVAILABLE = False
@@ -42,6 +46,60 @@ _STRUCTURAL_ALERTS = {
 }
 
 
+# Functional groups accepted in Constraints.groups (entries with non-letter
+# characters are tried as SMARTS; unknown plain words are rejected)
+_GROUP_SMARTS = {
+    'amide': 'C(=O)[NX3]',
+    'amine': '[NX3;!$(NC=O);!$(N-a)]',
+    'primary amine': '[NX3;H2;!$(NC=[O,S,N]);!$(N-a)]',
+    'basic amine': '[NX3;!$(N-a);!$(N-[#6,#16]=[O,S,N]);!$(N-S(=O)=O);!$(N-[#7,#8])]',
+    'aniline': '[NX3;H2,H1]-c',
+    'hydroxyl': '[OX2H][#6;!$(C=O)]',
+    'hydroxy': '[OX2H][#6;!$(C=O)]',
+    'alcohol': '[OX2H][CX4]',
+    'phenol': '[OX2H]c',
+    'carboxylic acid': 'C(=O)[OX2H1]',
+    'carboxyl': 'C(=O)[OX2H1]',
+    'ester': 'C(=O)O[#6]',
+    'ether': '[OD2]([#6])[#6]',
+    'carbonyl': '[CX3]=O',
+    'ketone': '[#6][CX3](=O)[#6]',
+    'aldehyde': '[CX3H1](=O)',
+    'carbamate': '[NX3]C(=O)O[#6]',
+    'lactam': '[NX3;R][CX3;R](=O)',
+    'nitrile': 'C#N',
+    'cyano': 'C#N',
+    'nitro': '[$([NX3](=O)=O),$([NX3+](=O)[O-])]',
+    'halogen': '[F,Cl,Br,I]',
+    'fluorine': '[F]',
+    'chlorine': '[Cl]',
+    'bromine': '[Br]',
+    'trifluoromethyl': 'C(F)(F)F',
+    'thiol': '[SX2H]',
+    'thioether': '[SX2]([#6])[#6]',
+    'sulfone': '[#6][SX4](=O)(=O)[#6]',
+    'sulfonamide': 'S(=O)(=O)[NX3]',
+    'urea': '[NX3]C(=O)[NX3]',
+    'alkene': 'C=C',
+    'alkyne': 'C#C',
+    'aromatic': 'a',
+    'aromatic ring': 'a1aaaaa1',
+    'phenyl': 'c1ccccc1',
+    'benzene': 'c1ccccc1',
+    'heterocycle': '[!#6;!#1;R]',
+    'heteroaromatic': '[!#6;!#1;a]',
+    'pyridine': 'n1ccccc1',
+    'imidazole': 'c1cnc[nX3]1',
+    'indole': 'c1ccc2[nX3]ccc2c1',
+    'piperidine': 'N1CCCCC1',
+    'piperazine': 'N1CCNCC1',
+    'morpholine': 'N1CCOCC1',
+}
+
+# plain names ("CN", "no") are never read as SMARTS, even where they would parse
+_GROUP_NAME = re.compile(r"[A-Za-z ]+")
+
+
 class RDKitValidationError(Exception):
     """Raised when RDKit structure validation fails."""
     pass
@@ -332,33 +390,11 @@ def is_synthesizable(smiles: str) -> Tuple[bool, Optional[str]]:
 def score_candidate(props: Dict[str, Any], desired: Optional[Dict[str, Any]] = None) -> float:
     """
     Score a candidate molecule based on properties.
-    Combines multiple factors: toxicity, solubility, Lipinski compliance, bioavailability.
-    Higher score = better candidate.
+    Weighted mean of toxicity, solubility, drug-likeness, bioavailability,
+    Lipinski compliance and (when ``desired['bbbNo']``) BBB exclusion, with the
+    properties asked for in ``desired`` weighted double. Higher score = better candidate.
     """
-    score = 0.0
-    max_score = 100.0
-    
-    # Toxicity: inverse scoring (lower is better)
-    tox = (props.get('toxicity') or {}).get('score')
-    if isinstance(tox, (int, float)):
-        score += (100 - tox) * 0.25  # Lower toxicity = higher score
-    
-    # Solubility
-    sol = (props.get('solubility') or {}).get('score')
-    if isinstance(sol, (int, float)):
-        score += sol * 0.25
-    
-    # Lipinski's Rule of Five
-    ro5 = (props.get('lipinskiRules') or {}).get('passes')
-    if isinstance(ro5, bool):
-        score += (25 if ro5 else 5)
-    
-    # Bioavailability
-    bio = (props.get('bioavailability') or {}).get('percentage')
-    if isinstance(bio, (int, float)):
-        score += bio * 0.25
-    
-    return min(score, max_score)
+    return float(score_many([props], desired)[0])
 
 
 def comprehensive_validation(smiles: str) -> Dict[str, Any]:
@@ -394,3 +430,77 @@ def comprehensive_validation(smiles: str) -> Dict[str, Any]:
     return result
 
     return round(score, 2)
+
+
+@lru_cache(maxsize=256)
+def _resolve_groups(groups: Optional[str]) -> Tuple[Tuple[Tuple[str, Any], ...], Tuple[str, ...]]:
+    """(name, pattern) pairs and unrecognised entries of a Constraints.groups string."""
+    if not groups or not RDKIT_AVAILABLE:
+        return (), ()
+    patterns, unknown = [], []
+    for raw in groups.split(','):
+        name = raw.strip()
+        if not name:
+            continue
+        key = ' '.join(name.lower().replace('-', ' ').replace('_', ' ').split())
+        # plural names ("amides") are accepted too
+        smarts = _GROUP_SMARTS.get(key) or _GROUP_SMARTS.get(key.rstrip('s'))
+        patt = None
+        if smarts:
+            patt = Chem.MolFromSmarts(smarts)
+        elif not _GROUP_NAME.fullmatch(name):
+            with rdBase.BlockLogs():
+                patt = Chem.MolFromSmarts(name)
+        if patt is None:
+            unknown.append(name)
+            continue
+        patterns.append((name, patt))
+    return tuple(patterns), tuple(unknown)
+
+
+def compile_group_patterns(groups: Optional[str]) -> Tuple[Tuple[str, Any], ...]:
+    """
+    Parse a comma-separated Constraints.groups string into (name, SMARTS
+    pattern) pairs. Known names (amide, hydroxyl, ...) map to curated SMARTS;
+    entries with non-letter characters are parsed as SMARTS. Anything else is
+    left out; see unknown_groups.
+    """
+    return _resolve_groups(groups)[0]
+
+
+def unknown_groups(groups: Optional[str]) -> List[str]:
+    """Entries of a Constraints.groups string that are neither a known group name nor valid SMARTS."""
+    return list(_resolve_groups(groups)[1])
+
+
+def constraint_mask(smiles_list: List[str], mw_min: Optional[float] = None, mw_max: Optional[float] = None,
+                    groups: Optional[str] = None) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    Check a batch of SMILES against generator constraints in one pass:
+    molecular weight window and required functional groups (all of them).
+    Returns (boolean keep mask, rejection reason per SMILES or None).
+    """
+    n = len(smiles_list)
+    if n == 0 or not RDKIT_AVAILABLE:
+        return np.ones(n, dtype=bool), [None] * n
+    mols = [smiles_to_mol(s) for s in smiles_list]
+    parsed = np.fromiter((m is not None for m in mols), dtype=bool, count=n)
+    mw = np.fromiter((Descriptors.MolWt(m) if m is not None else np.nan for m in mols), dtype=float, count=n)
+    patterns = compile_group_patterns(groups)
+    hits = np.array([[m is not None and m.HasSubstructMatch(p) for _, p in patterns] for m in mols],
+                    dtype=bool).reshape(n, len(patterns))
+
+    too_light = mw < mw_min if mw_min else np.zeros(n, dtype=bool)
+    too_heavy = mw > mw_max if mw_max else np.zeros(n, dtype=bool)
+    missing = ~hits
+    keep = parsed & ~too_light & ~too_heavy & ~missing.any(axis=1)
+
+    reasons: List[Optional[str]] = [None] * n
+    for i in np.flatnonzero(~keep):
+        if not parsed[i]:
+            reasons[i] = "Invalid SMILES"
+        elif too_light[i] or too_heavy[i]:
+            reasons[i] = f"Molecular weight {mw[i]:.0f} outside {mw_min or 0}-{mw_max or 'inf'}"
+        else:
+            reasons[i] = "Missing groups: " + ", ".join(name for (name, _), hit in zip(patterns, hits[i]) if not hit)
+    return keep, reasons
@@ -0,0 +1,188 @@
+"""
+SQLite-backed persistent cache tier.
+Values are stored zlib-compressed as JSON in a WAL-mode database so cached
+LLM results survive restarts. Writes are queued to a background thread so
+request handlers never block on disk; reads are indexed point lookups, run in
+a worker thread (each with its own connection) when awaited via alookup().
+"""
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+import zlib
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache_backend import CacheBackend, task_of
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    value BLOB NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+"""
+
+_STOP = object()
+
+
+class DiskCache(CacheBackend):
+    """Persistent key/value tier with per-task TTLs and asynchronous writes."""
+
+    name = "disk"
+
+    def __init__(self, path: str, default_ttl: float = 86400, task_ttls: Optional[Dict[str, float]] = None,
+                 compress_level: int = 6):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.task_ttls = dict(task_ttls or {})
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.write_errors = 0
+        self._local = threading.local()
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        self._writer = threading.Thread(target=self._write_loop, name="disk-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ttl_for(self, key: str) -> float:
+        return self.task_ttls.get(task_of(key), self.default_ttl)
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) or None if absent or expired."""
+        try:
+            row = self._conn().execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"[DiskCache] Read failed: {e}")
+            row = None
+        if not row or row[1] <= time():
+            self.misses += 1
+            return None
+        try:
+            value = json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value, row[1]
+
+    async def alookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        return await asyncio.to_thread(self.lookup, key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time()
+        expires = now + (ttl if ttl is not None else self.ttl_for(key))
+        try:
+            blob = zlib.compress(json.dumps(value, default=str).encode("utf-8"), self.compress_level)
+        except (TypeError, ValueError):
+            return
+        self._queue.put(("set", (key, task_of(key), blob, now, expires)))
+
+    def delete(self, key: str):
+        self._queue.put(("delete", (key,)))
+
+    def sweep(self) -> int:
+        self._queue.put(("sweep", ()))
+        return 0
+
+    def warm_entries(self, limit: int) -> List[Tuple[str, Any, float]]:
+        """Most recently written live entries, newest first, for warming the memory tier."""
+        rows = self._conn().execute(
+            "SELECT key, value, expires FROM entries WHERE expires > ? ORDER BY created DESC LIMIT ?",
+            (time(), limit),
+        ).fetchall()
+        out = []
+        for key, blob, expires in rows:
+            try:
+                out.append((key, json.loads(zlib.decompress(blob)), expires))
+            except (zlib.error, ValueError):
+                continue
+        return out
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until queued writes have been committed."""
+        done = threading.Event()
+        self._queue.put(("flush", (done,)))
+        done.wait(timeout)
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._writer.join(timeout=5.0)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM entries").fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "write_errors": self.write_errors,
+            "pending_writes": self._queue.qsize(),
+        }
+
+    def _write_loop(self) -> None:
+        conn = self._conn()
+        while True:
+            ops = [self._queue.get()]
+            # group whatever else is queued into the same transaction
+            while len(ops) < 256:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(op is _STOP for op in ops)
+            events = []
+            try:
+                conn.execute("BEGIN")
+                for op in ops:
+                    if op is _STOP:
+                        continue
+                    kind, args = op
+                    if kind == "set":
+                        conn.execute("INSERT OR REPLACE INTO entries (key, task, value, created, expires) VALUES (?, ?, ?, ?, ?)", args)
+                        self.writes += 1
+                    elif kind == "delete":
+                        conn.execute("DELETE FROM entries WHERE key = ?", args)
+                    elif kind == "sweep":
+                        conn.execute("DELETE FROM entries WHERE expires <= ?", (time(),))
+                    elif kind == "flush":
+                        events.append(args[0])
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self.write_errors += 1
+                print(f"[DiskCache] Write failed: {e}")
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            for ev in events:
+                ev.set()
+            if stop:
+                conn.close()
+                return
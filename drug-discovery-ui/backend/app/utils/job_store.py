@@ -0,0 +1,156 @@
+"""
+SQLite-backed queue for background jobs.
+One row per job holds its request payload, status, progress and result, so
+the queue survives restarts and can be shared by several worker processes:
+claiming a job is a single UPDATE, and a job whose runner stops sending
+heartbeats is put back in the queue.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+_JSON_FIELDS = ("payload", "progress", "result")
+
+
+def _row(cursor: sqlite3.Cursor, values: Tuple[Any, ...]) -> Dict[str, Any]:
+    job = {col[0]: value for col, value in zip(cursor.description, values)}
+    for field in _JSON_FIELDS:
+        if job.get(field) is not None:
+            job[field] = json.loads(job[field])
+    if "cancel" in job:
+        job["cancel"] = bool(job["cancel"])
+    return job
+
+
+class JobStore:
+    """Persistent job table; every method is a short autocommit statement."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.row_factory = _row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, payload, status, created) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, kind, json.dumps(payload, default=str), time()),
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        if status:
+            return self._conn().execute("SELECT * FROM jobs WHERE status = ? ORDER BY created DESC LIMIT ?",
+                                        (status, limit)).fetchall()
+        return self._conn().execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Oldest queued job, marked running (atomic, so two workers never claim the same job)."""
+        now = time()
+        return self._conn().execute(
+            "UPDATE jobs SET status = 'running', started = ?, heartbeat = ?, attempts = attempts + 1 "
+            "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1) AND status = 'queued' "
+            "RETURNING *",
+            (now, now),
+        ).fetchone()
+
+    def progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        self._conn().execute("UPDATE jobs SET progress = ?, heartbeat = ? WHERE id = ? AND status = 'running'",
+                             (json.dumps(progress, default=str), time(), job_id))
+
+    def heartbeat(self, job_ids: List[str]) -> List[str]:
+        """Refresh the heartbeat of running jobs; returns those asked to cancel."""
+        if not job_ids:
+            return []
+        marks = ",".join("?" * len(job_ids))
+        conn = self._conn()
+        conn.execute(f"UPDATE jobs SET heartbeat = ? WHERE status = 'running' AND id IN ({marks})", (time(), *job_ids))
+        rows = conn.execute(f"SELECT id FROM jobs WHERE cancel = 1 AND id IN ({marks})", job_ids).fetchall()
+        return [r["id"] for r in rows]
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ? AND status = 'running'",
+            (status, json.dumps(result, default=str) if result is not None else None, error, time(), job_id),
+        )
+
+    def requeue(self, job_id: str) -> None:
+        """Put a running job back in the queue (worker shutting down); the attempt is not counted."""
+        self._conn().execute(
+            "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0) WHERE id = ? AND status = 'running'",
+            (job_id,),
+        )
+
+    def request_cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job now; flag a running one for its worker."""
+        conn = self._conn()
+        conn.execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status = 'queued'",
+                     (time(), job_id))
+        conn.execute("UPDATE jobs SET cancel = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def recover(self, stale_before: float, max_attempts: int) -> Tuple[int, int]:
+        """
+        Requeue running jobs whose heartbeat stopped before ``stale_before``
+        (their worker died); jobs already tried ``max_attempts`` times fail.
+        Returns (requeued, failed).
+        """
+        conn = self._conn()
+        failed = conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Interrupted too many times', finished = ? "
+            "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+            (time(), stale_before, max_attempts),
+        ).rowcount
+        requeued = conn.execute(
+            "UPDATE jobs SET status = CASE cancel WHEN 1 THEN 'cancelled' ELSE 'queued' END, "
+            "finished = CASE cancel WHEN 1 THEN ? END WHERE status = 'running' AND heartbeat < ?",
+            (time(), stale_before),
+        ).rowcount
+        return requeued, failed
+
+    def purge(self, finished_before: float) -> int:
+        return self._conn().execute("DELETE FROM jobs WHERE finished < ? AND status IN (?, ?, ?)",
+                                    (finished_before, *FINISHED)).rowcount
@@ -0,0 +1,248 @@
+"""
+JSON helpers for LLM output.
+Provides a tolerant, incremental JSON object extractor and cached pydantic
+TypeAdapters for validating model output straight into response schemas.
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, get_args, get_origin
+
+from pydantic import TypeAdapter, ValidationError
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON object can be recovered from model output."""
+    pass
+
+
+class StreamingJSONExtractor:
+    """
+    Incrementally locate the first JSON object in (possibly streamed) text.
+
+    Leading prose and markdown fences are skipped. While chunks are fed, every
+    completed top-level member is emitted as ``((key,), value)`` and every
+    completed element of a top-level array as ``((key, index), value)``.
+    ``result()`` returns the whole object, closing it at the last complete
+    member when the output was truncated.
+    """
+
+    def __init__(self) -> None:
+        self.buf = ""
+        self.pos = 0
+        self.done = False
+        self.members: Dict[str, Any] = {}
+        self._started = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._str_start = 0
+        self._key: Optional[str] = None
+        self._expect_value = False
+        self._value_start: Optional[int] = None
+        self._elem_start: Optional[int] = None
+        self._elem_index = 0
+        self._cut: Tuple[int, str] = (0, "")
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple[Any, ...], Any]]:
+        if self.done or not chunk:
+            return []
+        if not self._started:
+            i = chunk.find('{')
+            if i == -1:
+                return []
+            chunk = chunk[i:]
+            self._started = True
+        self.buf += chunk
+        events: List[Tuple[Tuple[Any, ...], Any]] = []
+        buf = self.buf
+        i = self.pos
+        n = len(buf)
+        while i < n and not self.done:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and not self._expect_value:
+                        self._key = _loads(buf[self._str_start:i + 1])
+                i += 1
+                continue
+            if c.isspace():
+                i += 1
+                continue
+            depth = len(self._stack)
+            if depth == 1 and self._expect_value and self._value_start is None and c not in ',}':
+                self._value_start = i
+            if depth == 2 and self._stack[-1] == '[' and self._elem_start is None and c not in ',]':
+                self._elem_start = i
+            if c == '"':
+                self._in_string = True
+                self._str_start = i
+            elif c in '{[':
+                self._stack.append(c)
+                if depth == 1:
+                    self._elem_start = None
+                    self._elem_index = 0
+            elif c in '}]':
+                if depth == 2 and self._stack[-1] == '[':
+                    self._finish_element(i, events)
+                    self._cut = (i + 1, '}')
+                if depth == 1:
+                    self._finish_member(i, events)
+                    self.done = True
+                    self._cut = (i + 1, '')
+                if self._stack:
+                    self._stack.pop()
+            elif c == ',':
+                if depth == 1:
+                    self._finish_member(i, events)
+                    self._cut = (i, '}')
+                elif depth == 2 and self._stack[-1] == '[':
+                    self._finish_element(i, events)
+                    self._cut = (i, ']}')
+            elif c == ':' and depth == 1:
+                self._expect_value = True
+                self._value_start = None
+            i += 1
+        self.pos = i
+        return events
+
+    def _finish_member(self, end: int, events: list) -> None:
+        if self._key is not None and self._value_start is not None:
+            try:
+                value = _loads(self.buf[self._value_start:end])
+            except ValueError:
+                value = None
+            else:
+                self.members[self._key] = value
+                events.append(((self._key,), value))
+        self._key = None
+        self._expect_value = False
+        self._value_start = None
+
+    def _finish_element(self, end: int, events: list) -> None:
+        if self._elem_start is not None and self._key is not None:
+            try:
+                value = _loads(self.buf[self._elem_start:end])
+            except ValueError:
+                pass
+            else:
+                events.append(((self._key, self._elem_index), value))
+        self._elem_start = None
+        self._elem_index += 1
+
+    def result(self) -> Dict[str, Any]:
+        """Return the parsed object, repairing truncated or sloppy output."""
+        if not self._started:
+            raise JSONExtractionError("No JSON object found in model output")
+        if self.done:
+            text = self.buf[:self._cut[0]]
+            try:
+                return _loads(text)
+            except ValueError:
+                pass
+        cut, closers = self._cut
+        if cut:
+            try:
+                return _loads(self.buf[:cut] + closers)
+            except ValueError:
+                pass
+        if self.members:
+            return dict(self.members)
+        raise JSONExtractionError("Model output did not contain a parseable JSON object")
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+
+
+def extract_json(text: str) -> Dict[str, Any]:
+    """Extract the first JSON object from model output text."""
+    ext = StreamingJSONExtractor()
+    ext.feed(text or "")
+    obj = ext.result()
+    if not isinstance(obj, dict):
+        raise JSONExtractionError("Model output JSON is not an object")
+    return obj
+
+
+@lru_cache(maxsize=None)
+def get_adapter(tp: Any) -> TypeAdapter:
+    """Return a cached TypeAdapter for a pydantic model or type."""
+    return TypeAdapter(tp)
+
+
+def validate_fields(tp: Any, data: Dict[str, Any]) -> Tuple[Optional[Any], Dict[str, str]]:
+    """
+    Validate data against a model through its cached adapter.
+    Returns (instance, {}) on success or (None, {field: error}) keyed by the
+    top-level fields that failed.
+    """
+    try:
+        return get_adapter(tp).validate_python(data), {}
+    except ValidationError as e:
+        failed: Dict[str, str] = {}
+        for err in e.errors():
+            loc = err.get('loc') or ('__root__',)
+            field = str(loc[0])
+            failed.setdefault(field, f"{'.'.join(str(p) for p in loc)}: {err.get('msg')}")
+        return None, failed
+
+
+def _list_item_type(annotation: Any) -> Optional[Any]:
+    if get_origin(annotation) in (list, List):
+        args = get_args(annotation)
+        return args[0] if args else Any
+    for arg in get_args(annotation):
+        item = _list_item_type(arg)
+        if item is not None:
+            return item
+    return None
+
+
+def validate_path(tp: Any, path: Tuple[Any, ...], value: Any) -> Optional[Any]:
+    """
+    Validate one streamed member ``(field,)`` or list element ``(field, i)``
+    of a pydantic model. Returns the JSON-ready value or None if it is invalid.
+    """
+    field = getattr(tp, 'model_fields', {}).get(path[0]) if path else None
+    if field is None:
+        return None
+    annotation = field.annotation
+    if len(path) == 2:
+        annotation = _list_item_type(annotation)
+        if annotation is None:
+            return None
+    adapter = get_adapter(annotation)
+    try:
+        return adapter.dump_python(adapter.validate_python(value), mode='json')
+    except ValidationError:
+        return None
+
+
+def drop_invalid_items(tp: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove list elements that fail validation, keeping the rest of the object."""
+    try:
+        get_adapter(tp).validate_python(data)
+        return data
+    except ValidationError as e:
+        bad: Dict[str, set] = {}
+        for err in e.errors():
+            loc = err.get('loc') or ()
+            if len(loc) >= 2 and isinstance(loc[1], int) and isinstance(data.get(loc[0]), list):
+                bad.setdefault(loc[0], set()).add(loc[1])
+        if not bad:
+            return data
+        cleaned = dict(data)
+        for field, idxs in bad.items():
+            cleaned[field] = [v for i, v in enumerate(data[field]) if i not in idxs]
+        return cleaned
@@ -1,48 +1,258 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 from time import time
-from typing import Dict, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-# Simple in-memory cache and rate limiter
+from ..core.config import get_settings
+from .cache_backend import CacheBackend
+from .disk_cache import DiskCache
+from .resp_cache import RedisCache
 
-class SimpleCache:
-    def __init__(self, ttl_seconds: int = 300):
+# In-memory cache and rate limiter
+
+class BoundedCache(CacheBackend):
+    """
+    LRU cache bounded by entry count and approximate payload size, with a
+    per-entry TTL. Expired entries are dropped on read and by sweep(), which
+    the app runs periodically in the background.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl_seconds: int = 300, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024):
         self.ttl = ttl_seconds
-        self.store: Dict[str, Tuple[float, str]] = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()  # key -> (expires_at, value, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) or None if absent or expired."""
+        with self._lock:
+            item = self.store.get(key)
+            if not item:
+                self.misses += 1
+                return None
+            expires_at, value, _ = item
+            if time() >= expires_at:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.store.move_to_end(key)
+            self.hits += 1
+            return value, expires_at
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        size = _approx_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.store:
+                self._drop(key)
+            self.store[key] = (time() + (ttl if ttl is not None else self.ttl), value, size)
+            self.bytes += size
+            while self.store and (len(self.store) > self.max_entries or self.bytes > self.max_bytes):
+                self._drop(next(iter(self.store)))
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self.store:
+                self._drop(key)
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        with self._lock:
+            item = self.store.get(key)
+            if item and time() < item[0]:
+                expires_at, count = item[0], int(item[1]) + amount
+                self._drop(key)
+            else:
+                if item:
+                    self._drop(key)
+                expires_at, count = time() + ttl, amount
+            self.store[key] = (expires_at, count, 8)
+            self.bytes += 8
+            return count
+
+    def sweep(self) -> int:
+        """Remove all expired entries; returns how many were dropped."""
+        now = time()
+        with self._lock:
+            expired = [k for k, (exp, _, _) in self.store.items() if now >= exp]
+            for k in expired:
+                self._drop(k)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.store),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _drop(self, key: str):
+        _, _, size = self.store.pop(key)
+        self.bytes -= size
+
+
+def _approx_size(value: Any) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class TieredCache:
+    """
+    Read-through chain of cache tiers, fastest first. A hit in a lower tier is
+    promoted into the tiers above it for the entry's remaining lifetime;
+    writes go to every tier (slow tiers queue them in the background).
+    """
+
+    def __init__(self, *tiers: Any):
+        self.tiers = list(tiers)
+        # callables(key, value, ttl) notified of every write (e.g. cassette recording)
+        self.listeners: List[Callable[[str, Any, Optional[float]], None]] = []
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        for i, tier in enumerate(self.tiers):
+            entry = tier.lookup(key)
+            if entry is not None:
+                return self._promote(i, key, entry)
+        return None
+
+    async def alookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """lookup() for coroutines: shared and disk tiers are read off the event loop."""
+        for i, tier in enumerate(self.tiers):
+            entry = await tier.alookup(key)
+            if entry is not None:
+                return self._promote(i, key, entry)
+        return None
+
+    def _promote(self, i: int, key: str, entry: Tuple[Any, float]) -> Tuple[Any, float]:
+        value, expires_at = entry
+        for upper in self.tiers[:i]:
+            upper.set(key, value, ttl=min(expires_at - time(), getattr(upper, "ttl", expires_at)))
+        return entry
 
     def get(self, key: str):
+        entry = self.lookup(key)
+        return entry[0] if entry else None
+
+    async def aget(self, key: str):
+        entry = await self.alookup(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        for tier in self.tiers:
+            tier.set(key, value, ttl=ttl)
+        for listener in self.listeners:
+            listener(key, value, ttl)
+
+    def delete(self, key: str):
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def sweep(self) -> int:
+        return sum(tier.sweep() for tier in self.tiers)
+
+    def warm(self, limit: int) -> int:
+        """Load the newest live entries of the slowest tier into the faster ones."""
+        source = self.tiers[-1]
+        if len(self.tiers) < 2 or not hasattr(source, "warm_entries"):
+            return 0
+        entries = source.warm_entries(limit)
         now = time()
-        item = self.store.get(key)
-        if not item:
-            return None
-        ts, value = item
-        if now - ts > self.ttl:
-            self.store.pop(key, None)
-            return None
-        return value
+        # oldest first so the newest end up most-recently-used
+        for key, value, expires_at in reversed(entries):
+            for tier in self.tiers[:-1]:
+                tier.set(key, value, ttl=min(expires_at - now, getattr(tier, "ttl", expires_at)))
+        return len(entries)
+
+    def close(self) -> None:
+        for tier in self.tiers:
+            if hasattr(tier, "close"):
+                tier.close()
 
-    def set(self, key: str, value: str):
-        self.store[key] = (time(), value)
+    def stats(self) -> Dict[str, Any]:
+        return {getattr(tier, "name", type(tier).__name__): tier.stats() for tier in self.tiers}
 
-cache = SimpleCache(ttl_seconds=600)
+
+async def sweep_periodically(target: Any, interval: float) -> None:
+    """Background task: evict expired entries every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        dropped = target.sweep()
+        if dropped:
+            print(f"[Cache] Swept {dropped} expired entries")
+
+
+def _build_cache() -> TieredCache:
+    """
+    Front tier is the in-process LRU, or a RESP/Redis server shared by every
+    worker on the node when CACHE_BACKEND=shared; the SQLite tier sits behind.
+    """
+    settings = get_settings()
+    if settings.CACHE_BACKEND == "shared":
+        front: CacheBackend = RedisCache(settings.CACHE_SHARED_URL, ttl_seconds=settings.CACHE_TTL_SECONDS)
+    else:
+        front = BoundedCache(
+            ttl_seconds=settings.CACHE_TTL_SECONDS,
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            max_bytes=settings.CACHE_MAX_BYTES,
+        )
+    if not settings.CACHE_DISK_PATH:
+        return TieredCache(front)
+    try:
+        disk = DiskCache(settings.CACHE_DISK_PATH, default_ttl=settings.CACHE_DISK_TTL_DEFAULT,
+                         task_ttls=settings.CACHE_DISK_TTLS)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[Cache] Disk tier disabled: {e}")
+        return TieredCache(front)
+    return TieredCache(front, disk)
+
+
+cache = _build_cache()
 
 class RateLimiter:
-    def __init__(self, max_per_minute: int = 30):
+    """
+    Fixed one-minute window per key, counted in a cache backend so the limit
+    holds across workers when the backend is shared.
+    """
+
+    def __init__(self, backend: CacheBackend, max_per_minute: int = 30):
+        self.backend = backend
         self.max = max_per_minute
-        self.bucket: Dict[str, Tuple[int, float]] = {}
 
-    def allow(self, key: str) -> bool:
-        now = time()
-        count, ts = self.bucket.get(key, (0, now))
-        if now - ts > 60:
-            # reset window
-            self.bucket[key] = (1, now)
-            return True
-        if count < self.max:
-            self.bucket[key] = (count + 1, ts)
-            return True
-        return False
-
-rate_limiter = RateLimiter(max_per_minute=60)
+    async def allow(self, key: str, cost: int = 1) -> bool:
+        """Charge ``cost`` units against this minute's budget for ``key``."""
+        window = int(time() // 60)
+        count = await self.backend.aincr(f"ratelimit:{key}:{window}", ttl=60, amount=cost)
+        # a count of 0 means the backend is unreachable; fail open
+        return count <= self.max
+
+rate_limiter = RateLimiter(cache.tiers[0], max_per_minute=60)
 
 
 def cache_key_molecule(name: str) -> str:
@@ -0,0 +1,171 @@
+"""
+Vectorized multi-objective ranking of generator candidates.
+Predicted properties are loaded into an (n x k) NumPy matrix of objectives
+scaled to 0..1 with higher always better. Candidates are ranked either by a
+weighted score derived from DesiredProps or by non-dominated (Pareto) fronts,
+and every candidate also gets its rank on each single objective.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+OBJECTIVES = ("toxicity", "solubility", "drugLikeness", "bioavailability", "lipinski", "bbb")
+
+# Dominance is checked in row blocks to bound memory for large populations
+_BLOCK = 256
+
+
+def _num(d: Any, field: str) -> float:
+    value = d.get(field) if isinstance(d, dict) else None
+    if isinstance(value, bool):
+        return float(value)
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+def objective_matrix(props_list: Sequence[Optional[Dict[str, Any]]], desired: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    Objectives per candidate, in OBJECTIVES order, scaled to 0..1 with higher
+    better. Missing values are NaN. BBB penetration counts as good unless
+    ``desired['bbbNo']`` asks for molecules that stay out of the brain.
+    """
+    desired = desired or {}
+    rows = []
+    for p in props_list:
+        p = p or {}
+        rows.append((
+            _num(p.get("toxicity"), "score"),
+            _num(p.get("solubility"), "score"),
+            _num(p.get("drugLikeness"), "score"),
+            _num(p.get("bioavailability"), "percentage"),
+            _num(p.get("lipinskiRules"), "passes"),
+            _num(p.get("bbbPenetration"), "canCross"),
+        ))
+    x = np.array(rows, dtype=float).reshape(len(rows), len(OBJECTIVES))
+    x[:, :4] = np.clip(x[:, :4] / 100.0, 0.0, 1.0)
+    x[:, 0] = 1.0 - x[:, 0]  # lower toxicity is better
+    if desired.get("bbbNo"):
+        x[:, 5] = 1.0 - x[:, 5]
+    return x
+
+
+def weights_for(desired: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Objective weights: requested properties count double; BBB only matters when bbbNo is set."""
+    desired = desired or {}
+    return np.array([
+        2.0 if desired.get("toxicityLow", True) else 1.0,
+        2.0 if desired.get("solubilityHigh", True) else 1.0,
+        1.0,
+        1.0,
+        2.0 if desired.get("ro5Yes", True) else 1.0,
+        2.0 if desired.get("bbbNo") else 0.0,
+    ])
+
+
+def weighted_scores(x: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weighted mean of the objectives on a 0-100 scale; missing objectives score 0."""
+    if x.size == 0:
+        return np.zeros(len(x))
+    return np.round(100.0 * (np.nan_to_num(x, nan=0.0) @ weights) / weights.sum(), 2)
+
+
+def _dominates_any(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """For each row of ``b``, whether some row of ``a`` dominates it."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros(len(b), dtype=bool)
+    # ge[i, j]: a[j] is at least as good as b[i] everywhere; gt[i, j]: strictly better somewhere
+    # (one objective at a time keeps the arrays 2-D)
+    ge = np.ones((len(b), len(a)), dtype=bool)
+    gt = np.zeros((len(b), len(a)), dtype=bool)
+    for k in range(b.shape[1]):
+        col, mine = a[:, k][None, :], b[:, k][:, None]
+        ge &= col >= mine
+        gt |= col > mine
+    return (ge & gt).any(axis=1)
+
+
+def _first_front(values: np.ndarray) -> np.ndarray:
+    """
+    Mask of non-dominated rows. Rows are visited by decreasing objective sum:
+    a dominator always has a larger sum, so each block only needs checking
+    against the front found so far and against itself.
+    """
+    order = np.argsort(-values.sum(axis=1), kind="stable")
+    front: List[int] = []
+    for start in range(0, len(order), _BLOCK):
+        idx = order[start:start + _BLOCK]
+        block = values[idx]
+        beaten = _dominates_any(values[front], block) | _dominates_any(block, block)
+        front.extend(idx[~beaten].tolist())
+    mask = np.zeros(len(values), dtype=bool)
+    mask[front] = True
+    return mask
+
+
+def pareto_fronts(x: np.ndarray, needed: Optional[int] = None) -> np.ndarray:
+    """
+    Non-dominated sorting: front index per row (0 = Pareto-optimal). Peeling
+    stops once ``needed`` rows are ranked; the rest share the next front.
+    """
+    n = len(x)
+    fronts = np.full(n, -1, dtype=int)
+    values = np.nan_to_num(x, nan=-1.0)
+    remaining = np.arange(n)
+    front = 0
+    while remaining.size and (needed is None or n - remaining.size < needed):
+        best = _first_front(values[remaining])
+        fronts[remaining[best]] = front
+        remaining = remaining[~best]
+        front += 1
+    fronts[remaining] = front
+    return fronts
+
+
+def objective_ranks(x: np.ndarray) -> np.ndarray:
+    """1-based rank of each row on each objective (1 = best, ties share a rank, missing values last)."""
+    values = -np.nan_to_num(x, nan=-1.0)
+    ranks = np.empty(values.shape, dtype=int)
+    for k in range(values.shape[1]):
+        ordered = np.sort(values[:, k])
+        ranks[:, k] = np.searchsorted(ordered, values[:, k], side="left") + 1
+    return ranks
+
+
+def rank_candidates(candidates: List[Dict[str, Any]], desired: Optional[Dict[str, Any]] = None,
+                    mode: str = "weighted", needed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Score and sort candidates in place by ``mode`` ("weighted" or "pareto").
+    Each candidate gets ``score``, ``ranks`` per objective and, in Pareto
+    mode, ``paretoFront``; Pareto ties are broken by weighted score. Fronts
+    only use objectives with a nonzero weight, so both modes honour the same
+    DesiredProps. Candidates without properties score 0 and sort last.
+    """
+    if not candidates:
+        return candidates
+    props = [c.get("properties") for c in candidates]
+    x = objective_matrix(props, desired)
+    weights = weights_for(desired)
+    scores = weighted_scores(x, weights)
+    has_props = np.fromiter((bool(p) for p in props), dtype=bool, count=len(props))
+    scores[~has_props] = 0.0
+    ranks = objective_ranks(x)
+    if mode == "pareto":
+        fronts = pareto_fronts(x[:, weights > 0], needed)
+        fronts[~has_props] = fronts.max() + 1
+        order = np.lexsort((-scores, fronts))
+    else:
+        fronts = None
+        order = np.argsort(-scores, kind="stable")
+    for i, c in enumerate(candidates):
+        c["score"] = float(scores[i])
+        c["ranks"] = {name: int(r) for name, r in zip(OBJECTIVES, ranks[i])} if has_props[i] else None
+        if fronts is not None:
+            c["paretoFront"] = int(fronts[i])
+    return [candidates[i] for i in order]
+
+
+def score_many(props_list: Sequence[Optional[Dict[str, Any]]], desired: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Weighted scores for many property dicts at once (0 where properties are missing)."""
+    x = objective_matrix(props_list, desired)
+    scores = weighted_scores(x, weights_for(desired))
+    scores[np.array([not p for p in props_list], dtype=bool)] = 0.0
+    return scores
@@ -0,0 +1,268 @@
+"""
+Shared cache backend speaking the Redis protocol (RESP2).
+Lets every uvicorn worker on a node share one cache and one set of rate-limit
+counters. Works against Redis itself or the bundled stand-in server
+(``python -m app.utils.resp_server``). A minimal client is used so no extra
+dependency is needed; a connection is kept per thread. The client blocks, so
+coroutines read through alookup()/aincr(), which run it in a worker thread,
+and writes are queued to a background thread.
+"""
+import asyncio
+import json
+import queue
+import select
+import socket
+import threading
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .cache_backend import CacheBackend
+
+
+# commands that give the same result when run twice, so a pipeline of only
+# these may be resent after a connection drops mid-request
+_IDEMPOTENT = {"GET", "PTTL", "SET", "DEL", "PEXPIRE", "DBSIZE"}
+
+_STOP = object()
+
+
+class RespError(Exception):
+    """Error reply from the server or a broken connection."""
+    pass
+
+
+class RespClient:
+    """Blocking RESP2 client for ``redis://host:port/db`` or ``unix:///path/to.sock`` URLs."""
+
+    def __init__(self, url: str, timeout: float = 0.5):
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        parsed = urlparse(self.url)
+        if parsed.scheme == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(parsed.path)
+        else:
+            sock = socket.create_connection((parsed.hostname or "127.0.0.1", parsed.port or 6379), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile("rb")
+        self._local.conn = (sock, reader)
+        db = (parsed.path or "/").lstrip("/") if parsed.scheme != "unix" else ""
+        if parsed.password:
+            self._call(["AUTH", parsed.password])
+        if db and db != "0":
+            self._call(["SELECT", db])
+        return sock, reader
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn:
+            conn[1].close()
+            conn[0].close()
+            self._local.conn = None
+
+    def execute(self, *args: Any) -> Any:
+        """Run one command, reconnecting once if the connection dropped."""
+        return self.pipeline([list(args)])[0]
+
+    def pipeline(self, commands: List[List[Any]]) -> List[Any]:
+        """
+        Run ``commands`` in one round trip. A connection found dead before
+        sending is replaced; one that fails after the commands went out is
+        only retried if they are all idempotent (INCR must not count twice).
+        """
+        retry = all(str(cmd[0]).upper() in _IDEMPOTENT for cmd in commands)
+        for attempt in range(2):
+            sent = False
+            try:
+                conn = getattr(self._local, "conn", None)
+                if conn is not None and _closed(conn[0]):
+                    self.close()
+                    conn = None
+                if conn is None:
+                    self._connect()
+                sent = True
+                return self._call_many(commands)
+            except (OSError, EOFError):
+                self.close()
+                if attempt or (sent and not retry):
+                    raise RespError(f"connection to {self.url} failed")
+        return []
+
+    def _call(self, args: List[Any]) -> Any:
+        return self._call_many([args])[0]
+
+    def _call_many(self, commands: List[List[Any]]) -> List[Any]:
+        sock, reader = self._local.conn
+        sock.sendall(b"".join(_encode(cmd) for cmd in commands))
+        replies = [_read_reply(reader) for _ in commands]
+        for r in replies:
+            if isinstance(r, RespError):
+                raise r
+        return replies
+
+
+def _closed(sock: socket.socket) -> bool:
+    """An idle connection with something to read was closed by the server (or is out of sync)."""
+    try:
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+def _encode(args: List[Any]) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for a in args:
+        b = a if isinstance(a, bytes) else str(a).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+    return b"".join(out)
+
+
+def _read_reply(reader) -> Any:
+    line = reader.readline()
+    if not line:
+        raise EOFError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        n = int(rest)
+        if n < 0:
+            return None
+        data = reader.read(n + 2)
+        return data[:-2]
+    if kind == b"*":
+        n = int(rest)
+        return None if n < 0 else [_read_reply(reader) for _ in range(n)]
+    raise RespError(f"unexpected reply: {line!r}")
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache tier on a RESP server. Values are JSON; expiry uses PX so the server
+    evicts them. Connection failures degrade to cache misses (and open rate
+    limits) rather than failing requests. SET and DEL are sent by a writer
+    thread, pipelined in batches, so set() and delete() never wait on the server.
+    """
+
+    name = "shared"
+
+    def __init__(self, url: str, ttl_seconds: float = 600, prefix: str = "dd:"):
+        self.client = RespClient(url)
+        self.ttl = ttl_seconds
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="shared-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _warn(self, e: Exception) -> None:
+        self.errors += 1
+        print(f"[SharedCache] {e}")
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        k = self.prefix + key
+        try:
+            raw, pttl = self.client.pipeline([["GET", k], ["PTTL", k]])
+        except RespError as e:
+            self._warn(e)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        expires_at = time() + pttl / 1000.0 if pttl and pttl > 0 else time() + self.ttl
+        return value, expires_at
+
+    async def alookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        return await asyncio.to_thread(self.lookup, key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl_ms = max(1, int((ttl if ttl is not None else self.ttl) * 1000))
+        try:
+            blob = json.dumps(value, default=str)
+        except (TypeError, ValueError) as e:
+            self._warn(e)
+            return
+        self._queue.put(["SET", self.prefix + key, blob, "PX", ttl_ms])
+
+    def delete(self, key: str) -> None:
+        self._queue.put(["DEL", self.prefix + key])
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        k = self.prefix + key
+        try:
+            count, pttl = self.client.pipeline([["INCRBY", k, amount], ["PTTL", k]])
+            if pttl == -1:
+                # first hit of the window (or a counter that lost its expiry)
+                self.client.execute("PEXPIRE", k, int(ttl * 1000))
+            return int(count)
+        except RespError as e:
+            self._warn(e)
+            return 0
+
+    async def aincr(self, key: str, ttl: float, amount: int = 1) -> int:
+        return await asyncio.to_thread(self.incr, key, ttl, amount)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until queued writes have been sent."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            keys = self.client.execute("DBSIZE")
+        except RespError:
+            keys = None
+        lookups = self.hits + self.misses
+        return {
+            "entries": keys,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+            "pending_writes": self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._writer.join(timeout=5.0)
+        self.client.close()
+
+    def _write_loop(self) -> None:
+        while True:
+            ops = [self._queue.get()]
+            # send whatever else is queued in the same round trip
+            while len(ops) < 256:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            commands = [op for op in ops if isinstance(op, list)]
+            if commands:
+                try:
+                    self.client.pipeline(commands)
+                except RespError as e:
+                    self._warn(e)
+            for op in ops:
+                if isinstance(op, threading.Event):
+                    op.set()
+            if any(op is _STOP for op in ops):
+                self.client.close()
+                return
@@ -0,0 +1,198 @@
+"""
+Local stand-in for Redis, for nodes without one.
+Serves the small RESP2 command subset the shared cache backend uses, from a
+single process that every uvicorn worker connects to:
+
+    python -m app.utils.resp_server --port 6380
+    python -m app.utils.resp_server --unix /tmp/drug-discovery-cache.sock
+
+then set CACHE_BACKEND=shared and CACHE_SHARED_URL=redis://127.0.0.1:6380/0
+(or unix:///tmp/drug-discovery-cache.sock).
+"""
+import argparse
+import asyncio
+import os
+from collections import OrderedDict
+from time import time
+from typing import List, Optional, Tuple
+
+
+class RespStore:
+    """Keyspace with millisecond expiry and LRU eviction past ``max_keys``."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self.data: "OrderedDict[bytes, Tuple[bytes, Optional[float]]]" = OrderedDict()
+
+    def _live(self, key: bytes) -> Optional[Tuple[bytes, Optional[float]]]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time():
+            del self.data[key]
+            return None
+        self.data.move_to_end(key)
+        return item
+
+    def _put(self, key: bytes, value: bytes, expires: Optional[float]) -> None:
+        self.data[key] = (value, expires)
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_keys:
+            self.data.popitem(last=False)
+
+    def sweep(self) -> None:
+        now = time()
+        for k in [k for k, (_, exp) in self.data.items() if exp is not None and exp <= now]:
+            del self.data[k]
+
+    def execute(self, args: List[bytes]):
+        cmd = args[0].upper().decode()
+        handler = getattr(self, "cmd_" + cmd.lower(), None)
+        if handler is None:
+            return Error(f"ERR unknown command '{cmd}'")
+        try:
+            return handler(*args[1:])
+        except (TypeError, ValueError):
+            return Error(f"ERR wrong number of arguments or syntax error for '{cmd}'")
+
+    def cmd_ping(self, *args):
+        return args[0] if args else Simple("PONG")
+
+    def cmd_select(self, db):
+        return Simple("OK")
+
+    def cmd_get(self, key):
+        item = self._live(key)
+        return item[0] if item else None
+
+    def cmd_set(self, key, value, *opts):
+        expires = None
+        opts = [o.upper() for o in opts]
+        for i, o in enumerate(opts):
+            if o == b"EX":
+                expires = time() + int(opts[i + 1])
+            elif o == b"PX":
+                expires = time() + int(opts[i + 1]) / 1000.0
+        self._put(key, value, expires)
+        return Simple("OK")
+
+    def cmd_del(self, *keys):
+        return sum(1 for k in keys if self.data.pop(k, None) is not None)
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, b"1")
+
+    def cmd_incrby(self, key, amount):
+        item = self._live(key)
+        count = (int(item[0]) if item else 0) + int(amount)
+        self._put(key, str(count).encode(), item[1] if item else None)
+        return count
+
+    def cmd_pexpire(self, key, ms):
+        item = self._live(key)
+        if not item:
+            return 0
+        self.data[key] = (item[0], time() + int(ms) / 1000.0)
+        return 1
+
+    def cmd_pttl(self, key):
+        item = self._live(key)
+        if not item:
+            return -2
+        return -1 if item[1] is None else max(0, int((item[1] - time()) * 1000))
+
+    def cmd_dbsize(self):
+        return len(self.data)
+
+    def cmd_flushdb(self):
+        self.data.clear()
+        return Simple("OK")
+
+
+class Simple(str):
+    pass
+
+
+class Error(str):
+    pass
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, Error):
+        return b"-%s\r\n" % value.encode()
+    if isinstance(value, Simple):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        value = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # inline command (e.g. from telnet / redis-cli PING)
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        n = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(n + 2))[:-2])
+    return args
+
+
+def make_handler(store: RespStore):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                writer.write(encode(store.execute(args)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(host: str = "127.0.0.1", port: int = 6380, unix: Optional[str] = None,
+                max_keys: int = 100_000, sweep_interval: float = 30.0) -> None:
+    store = RespStore(max_keys=max_keys)
+    handler = make_handler(store)
+    if unix:
+        if os.path.exists(unix):
+            os.unlink(unix)
+        server = await asyncio.start_unix_server(handler, path=unix)
+        print(f"[RespServer] Listening on unix://{unix}")
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        print(f"[RespServer] Listening on {host}:{port}")
+    async with server:
+        while True:
+            await asyncio.sleep(sweep_interval)
+            store.sweep()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Redis-protocol cache server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    parser.add_argument("--unix", default=None, help="listen on a unix socket instead of TCP")
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_keys))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Content-addressed caching for LLM-backed route handlers.
+The key hashes the canonical JSON of the request model together with a
+prompt version derived from the source of the functions that build the
+prompt, so editing a prompt invalidates its old entries without a flush.
+"""
+import functools
+import hashlib
+import inspect
+import json
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from ..core.config import get_settings
+from .molecule_utils import cache
+
+T = TypeVar("T")
+
+stats = {"hits": 0, "misses": 0, "stored": 0}
+
+
+def prompt_version(*sources: Any) -> str:
+    """Short hash of the source code (or text) of everything that shapes a prompt."""
+    h = hashlib.sha256()
+    for src in sources:
+        if callable(src):
+            try:
+                src = inspect.getsource(src)
+            except (OSError, TypeError):
+                src = getattr(src, "__qualname__", repr(src))
+        h.update(str(src).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        value = value.model_dump(mode="json")
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def request_hash(*parts: Any) -> str:
+    """Stable hash of request models/values (key order and surrounding whitespace ignored)."""
+    blob = json.dumps([_canonical(p) for p in parts], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def succeeded(result: Any) -> bool:
+    # handlers report failures in-band (ok/success=False) rather than raising
+    for flag in ("ok", "success"):
+        value = result.get(flag) if isinstance(result, dict) else getattr(result, flag, None)
+        if value is False:
+            return False
+    return result is not None
+
+
+def cached_response(task: str, *prompt_sources: Any, ttl: Optional[float] = None,
+                    cacheable: Callable[[Any], bool] = succeeded,
+                    canonical: Optional[Callable[[Any], Awaitable[Any]]] = None):
+    """
+    Decorate ``async def handler(req, ...)`` so results are cached by
+    (task, prompt version, model deployment, canonical ``req``). Only ``req``
+    enters the key; other arguments must not change the answer. ``canonical``
+    maps ``req`` to what is hashed instead (e.g. molecules replaced by their
+    identity) so equivalent spellings share an entry. Pydantic results are
+    rebuilt from the cached dump using the handler's return annotation.
+    TTL defaults to CACHE_ROUTE_TTLS[task].
+    """
+    version = prompt_version(*prompt_sources)
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        ret = inspect.signature(fn).return_annotation
+        model = ret if inspect.isclass(ret) and issubclass(ret, BaseModel) else None
+
+        @functools.wraps(fn)
+        async def wrapper(req: Any, *args: Any, **kwargs: Any) -> T:
+            settings = get_settings()
+            ident = await canonical(req) if canonical else req
+            key = f"resp:{task}:{version}:{request_hash(settings.OPENAI_MODEL, ident)}"
+            hit = await cache.aget(key)
+            if hit is not None:
+                stats["hits"] += 1
+                return model(**hit) if model else hit
+            stats["misses"] += 1
+            result = await fn(req, *args, **kwargs)
+            if cacheable(result):
+                data = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+                cache.set(key, data, ttl=ttl if ttl is not None else settings.CACHE_ROUTE_TTLS.get(task))
+                stats["stored"] += 1
+            return result
+
+        wrapper.prompt_version = version  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
@@ -0,0 +1,44 @@
+"""
+Server-Sent Events helpers for streaming endpoints.
+"""
+import json
+from typing import Any, AsyncIterator, Callable, Optional
+
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # disable proxy buffering (nginx) so the first token is flushed immediately
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Format one SSE frame; ``data`` is JSON-encoded unless already a string."""
+    payload = data if isinstance(data, str) else json.dumps(data, separators=(",", ":"), default=str)
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def text_events(deltas: AsyncIterator[str], done: Callable[[str], Any],
+                      error: Callable[[Exception], Any]) -> AsyncIterator[str]:
+    """Relay text deltas as ``token`` events, then ``done(full_text)`` or ``error(exc)``."""
+    parts = []
+    try:
+        async for delta in deltas:
+            parts.append(delta)
+            yield sse_event({"text": delta}, "token")
+    except Exception as e:
+        yield sse_event(error(e), "error")
+        return
+    yield sse_event(done("".join(parts)), "done")
+
+
+async def iter_once(frame: str) -> AsyncIterator[str]:
+    """Single-frame stream, for errors detected before streaming starts."""
+    yield frame
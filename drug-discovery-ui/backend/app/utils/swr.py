@@ -0,0 +1,117 @@
+"""
+Stale-while-revalidate caching for LLM-backed results.
+Entries carry a soft TTL inside the cached envelope and a hard TTL on the
+cache entry itself. Past the soft TTL the stale value is still served at once
+while a single background refresh reloads it; only a miss (or an entry past
+its hard TTL) makes the caller wait for the loader.
+"""
+import asyncio
+from time import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..core.config import get_settings
+from ..core.deadline import current_deadline
+from .cache_backend import task_of
+from .molecule_utils import cache
+
+_ENVELOPE = "__swr__"
+
+# key -> running load/refresh task, so concurrent callers share one LLM call
+_inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+stats = {"fresh": 0, "stale": 0, "miss": 0, "refreshes": 0, "refresh_errors": 0}
+
+
+def ttls_for(key: str) -> Tuple[float, float]:
+    """(soft, hard) TTL for a cache key, by task prefix."""
+    settings = get_settings()
+    soft, hard = settings.CACHE_SWR_TTLS.get(task_of(key), (settings.CACHE_TTL_SECONDS, settings.CACHE_DISK_TTL_DEFAULT))
+    return float(soft), float(max(soft, hard))
+
+
+def store(key: str, value: Any, soft: Optional[float] = None, hard: Optional[float] = None) -> None:
+    """Write a fresh value in the form cached_call reads (for results computed elsewhere)."""
+    if soft is None or hard is None:
+        soft, hard = ttls_for(key)
+    cache.set(key, {_ENVELOPE: 1, "v": value, "fresh_until": time() + soft}, ttl=hard)
+
+
+def unwrap(entry: Any) -> Tuple[Any, float]:
+    """(value, fresh_until); values cached before envelopes existed count as stale."""
+    if isinstance(entry, dict) and entry.get(_ENVELOPE):
+        return entry.get("v"), float(entry.get("fresh_until") or 0)
+    return entry, 0.0
+
+
+async def _load(key: str, loader: Callable[[], Awaitable[Any]], soft: float, hard: float, background: bool) -> Any:
+    if background:
+        # the refresh outlives the request that triggered it, so drop its deadline
+        current_deadline.set(None)
+    value = await loader()
+    if value is not None:
+        store(key, value, soft, hard)
+    return value
+
+
+def _start(key: str, loader: Callable[[], Awaitable[Any]], soft: float, hard: float, background: bool) -> "asyncio.Task[Any]":
+    task = asyncio.create_task(_load(key, loader, soft, hard, background))
+    _inflight[key] = task
+
+    def _done(t: "asyncio.Task[Any]") -> None:
+        if _inflight.get(key) is t:
+            _inflight.pop(key, None)
+        if background and not t.cancelled() and t.exception() is not None:
+            stats["refresh_errors"] += 1
+            print(f"[SWR] Background refresh of {key} failed: {t.exception()}")
+
+    task.add_done_callback(_done)
+    return task
+
+
+async def _claim_refresh(key: str, soft: float) -> bool:
+    """Only one worker refreshes a key per window when the front tier is shared."""
+    front = cache.tiers[0]
+    try:
+        return await front.aincr(f"swr-lock:{key}", ttl=max(5.0, min(60.0, soft))) <= 1
+    except NotImplementedError:
+        return True
+
+
+def inflight_count() -> int:
+    return len(_inflight)
+
+
+async def refresh(key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """Reload ``key`` now (joining a load already in flight), outside any request deadline."""
+    soft, hard = ttls_for(key)
+    task = _inflight.get(key) or _start(key, loader, soft, hard, background=True)
+    return await asyncio.shield(task)
+
+
+async def cached_call(key: str, loader: Callable[[], Awaitable[Any]],
+                      soft_ttl: Optional[float] = None, hard_ttl: Optional[float] = None) -> Any:
+    """
+    Return the cached value for ``key``, loading it with ``loader()`` on a miss.
+    A ``None`` result from the loader is returned but not cached.
+    """
+    soft, hard = ttls_for(key)
+    soft = soft_ttl if soft_ttl is not None else soft
+    hard = max(soft, hard_ttl if hard_ttl is not None else hard)
+
+    entry = await cache.aget(key)
+    if entry is not None:
+        value, fresh_until = unwrap(entry)
+        if time() < fresh_until:
+            stats["fresh"] += 1
+            return value
+        stats["stale"] += 1
+        # re-checked after the claim: another caller may have started a refresh meanwhile
+        if key not in _inflight and await _claim_refresh(key, soft) and key not in _inflight:
+            stats["refreshes"] += 1
+            _start(key, loader, soft, hard, background=True)
+        return value
+
+    stats["miss"] += 1
+    task = _inflight.get(key) or _start(key, loader, soft, hard, background=False)
+    # shield: one caller going away must not cancel the load other callers share
+    return await asyncio.shield(task)
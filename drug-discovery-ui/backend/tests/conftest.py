@@ -0,0 +1,9 @@
+import os
+import sys
+
+# keep the cache and job queue from writing under data/ while tests import the app
+os.environ.setdefault("CACHE_DISK_PATH", "")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("JOB_DB_PATH", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
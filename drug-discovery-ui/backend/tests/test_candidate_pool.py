@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.core.config import get_settings
+from app.services import candidate_pool
+from app.services.candidate_pool import CandidatePool
+from app.utils.molecule_utils import cache
+
+_PROPS = {"toxicity": {"score": 10, "level": "Low", "explanation": ""}}
+
+
+def _candidate(smiles, properties=None):
+    return {"smiles": smiles, "rationale": None, "valid": True, "unique": True, "synthesizable": True,
+            "filtered": False, "properties": properties}
+
+
+@pytest.fixture
+def target(request):
+    # a target per test keeps pools apart in the shared module-level cache
+    return f"pool-test-{request.node.name}"
+
+
+def _load(target, served=True):
+    return asyncio.run(CandidatePool.load(target, {"groups": "amide"}, served=served))
+
+
+def test_members_round_trip(target):
+    pool = _load(target)
+    pool.add([_candidate("CCO"), _candidate("CCN")])
+    pool.record([_candidate("CCO", _PROPS)])
+    asyncio.run(pool.save())
+
+    loaded = _load(target)
+    assert set(loaded.smiles()) == {"CCO", "CCN"}
+    assert loaded.members["CCO"]["properties"] == _PROPS
+    assert loaded.members["CCO"]["served"] == 1
+    assert loaded.members["CCN"]["served"] == 0
+    assert [c["smiles"] for c in loaded.draw(5, fresh=True)] == ["CCN"]
+
+
+def test_concurrent_requests_keep_every_update(target):
+    seed = _load(target)
+    seed.add([_candidate("CCO")])
+    asyncio.run(seed.save())
+
+    # both requests load the same state before either saves
+    first, second = _load(target), _load(target)
+    first.add([_candidate("CCC")])
+    first.record([_candidate("CCO"), _candidate("CCC")])
+    second.add([_candidate("CCCl")])
+    second.record([_candidate("CCO", _PROPS), _candidate("CCCl")])
+    asyncio.run(first.save())
+    asyncio.run(second.save())
+
+    loaded = _load(target)
+    assert set(loaded.smiles()) == {"CCO", "CCC", "CCCl"}
+    assert loaded.members["CCO"]["served"] == 2
+    assert loaded.members["CCO"]["properties"] == _PROPS
+
+
+def test_eviction_prefers_old_unenriched_members(target, monkeypatch):
+    monkeypatch.setattr(get_settings(), "GENERATOR_POOL_MAX", 2)
+    pool = _load(target)
+    pool.add([_candidate("CCO")])
+    pool.record([_candidate("CCO", _PROPS)])
+    asyncio.run(pool.save())
+    for smiles in ("CCN", "CCC"):
+        pool = _load(target)
+        pool.add([_candidate(smiles)])
+        asyncio.run(pool.save())
+
+    assert set(_load(target).smiles()) == {"CCO", "CCC"}
+    assert cache.get(candidate_pool._member_key(pool.key, "CCN")) is None
@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+from rdkit import Chem
+
+from app.main import app
+from app.utils.chemo_utils import compile_group_patterns, unknown_groups
+
+
+def _matches(groups, smiles):
+    mol = Chem.MolFromSmiles(smiles)
+    return [mol.HasSubstructMatch(patt) for _, patt in compile_group_patterns(groups)]
+
+
+@pytest.mark.parametrize("name, hit, miss", [
+    ("aromatic", "c1ccccc1", "CCCC"),
+    ("phenyl", "Cc1ccccc1", "C1CCCCC1"),
+    ("nitro", "c1ccccc1[N+](=O)[O-]", "c1ccccc1N"),
+    ("heterocycle", "C1CCNCC1", "c1ccccc1"),
+    ("basic amine", "CCN(C)C", "CC(=O)NC"),
+])
+def test_common_group_names(name, hit, miss):
+    assert _matches(name, hit) == [True]
+    assert _matches(name, miss) == [False]
+
+
+def test_names_are_normalised():
+    assert not unknown_groups("Amides, basic-amine, Aromatic  Ring")
+    assert len(compile_group_patterns("Amides, basic-amine, Aromatic  Ring")) == 3
+
+
+def test_plain_words_are_not_smarts():
+    # both parse as SMARTS, but read as words they are not groups
+    assert unknown_groups("no, CN") == ["no", "CN"]
+    assert compile_group_patterns("no, CN") == ()
+
+
+def test_smarts_fallback(capfd):
+    assert [name for name, _ in compile_group_patterns("C-N, [#7]C=O, foo(")] == ["C-N", "[#7]C=O"]
+    assert unknown_groups("C-N, [#7]C=O, foo(") == ["foo("]
+    assert "SMARTS Parse Error" not in capfd.readouterr().err
+
+
+def test_generator_rejects_unknown_groups():
+    client = TestClient(app)
+    body = {"target": "EGFR", "properties": {}, "constraints": {"groups": "amide, aromatics, unicorn"}}
+    for path in ("/api/v1/generator/run", "/api/v1/generator/run/stream", "/api/v1/generator/run/jobs"):
+        response = client.post(path, json=body)
+        assert response.status_code == 422
+        assert "unicorn" in response.json()["detail"]
+        assert "aromatics" not in response.json()["detail"]
@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+from app.utils.disk_cache import DiskCache
+from app.utils.molecule_utils import BoundedCache, TieredCache
+
+
+def test_alookup_reads_off_the_event_loop(tmp_path, monkeypatch):
+    disk = DiskCache(str(tmp_path / "cache.db"))
+    disk.set("molecule:props:aspirin", {"score": 1}, ttl=60)
+    disk.flush()
+    threads = []
+    lookup = disk.lookup
+    monkeypatch.setattr(disk, "lookup", lambda key: threads.append(threading.get_ident()) or lookup(key))
+
+    async def read():
+        return await disk.aget("molecule:props:aspirin"), await disk.aget("molecule:props:missing")
+
+    assert asyncio.run(read()) == ({"score": 1}, None)
+    assert threads and threading.get_ident() not in threads
+    disk.close()
+
+
+def test_tiered_alookup_promotes_disk_hits(tmp_path):
+    disk = DiskCache(str(tmp_path / "cache.db"))
+    disk.set("molecule:props:aspirin", {"score": 1}, ttl=60)
+    disk.flush()
+    front = BoundedCache(ttl_seconds=60)
+    tiered = TieredCache(front, disk)
+    assert asyncio.run(tiered.aget("molecule:props:aspirin")) == {"score": 1}
+    assert front.get("molecule:props:aspirin") == {"score": 1}
+    disk.close()
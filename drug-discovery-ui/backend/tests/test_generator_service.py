@@ -0,0 +1,37 @@
+import asyncio
+
+from app.services import property_predictor
+from app.services.generator_service import GeneratorService
+
+_PROPS = {"toxicity": {"score": 10, "level": "Low", "explanation": ""}}
+
+
+def _candidate(smiles, properties=None):
+    return {"smiles": smiles, "valid": True, "filtered": False, "properties": properties}
+
+
+def test_cached_properties_are_looked_up_concurrently(monkeypatch):
+    active, peak, looked_up = 0, 0, []
+
+    async def slow_lookup(cls, smiles):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        looked_up.append(smiles)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return _PROPS
+
+    async def no_prediction(*args, **kwargs):
+        raise AssertionError("every candidate was cached")
+
+    monkeypatch.setattr(GeneratorService, "_cached_props", classmethod(slow_lookup))
+    monkeypatch.setattr(property_predictor, "predict_many", no_prediction)
+    candidates = [_candidate("CCO"), _candidate("CCN"), _candidate("CCO"), _candidate("CCC", _PROPS)]
+    svc = GeneratorService()
+    ranked = asyncio.run(svc.enrich_properties_and_rank(candidates, {}))
+
+    # one lookup per distinct SMILES without attached properties, all in flight together
+    assert sorted(looked_up) == ["CCN", "CCO"]
+    assert peak == 2
+    assert all(c["properties"] == _PROPS for c in ranked)
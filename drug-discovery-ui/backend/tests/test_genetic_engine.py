@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from rdkit import Chem
+
+from app.core.config import get_settings
+from app.services import genetic_engine
+from app.services.genetic_engine import DEFAULT_SEEDS, run_genetic
+
+
+@pytest.fixture(autouse=True)
+def short_runs(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "GA_GENERATIONS", 2)
+    monkeypatch.setattr(settings, "GA_POPULATION", 24)
+    monkeypatch.setattr(settings, "GA_TIME_BUDGET", 10.0)
+    yield
+    genetic_engine.shutdown_pool()
+
+
+def _canonical(smiles):
+    return {Chem.MolToSmiles(Chem.MolFromSmiles(s)) for s in smiles}
+
+
+def test_default_seeds_are_not_returned():
+    candidates, stats = asyncio.run(run_genetic(10))
+    assert candidates
+    assert stats["generations"] == 2
+    assert not {c["smiles"] for c in candidates} & _canonical(DEFAULT_SEEDS)
+
+
+def test_user_seed_is_not_returned():
+    seed = "CC(=O)Oc1ccccc1C(=O)O"
+    candidates, _ = asyncio.run(run_genetic(10, seed_smiles=seed))
+    assert candidates
+    assert Chem.MolToSmiles(Chem.MolFromSmiles(seed)) not in {c["smiles"] for c in candidates}
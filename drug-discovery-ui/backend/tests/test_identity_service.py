@@ -0,0 +1,19 @@
+from rdkit import Chem, RDLogger
+
+from app.services.identity_service import _smiles_to_inchikey
+
+
+def test_inchikey_for_smiles_and_names(capfd):
+    assert _smiles_to_inchikey("CCO") == "LFQSCWFLJHTTHZ-UHFFFAOYSA-N"
+    assert _smiles_to_inchikey("aspirin") is None
+    assert "SMILES Parse Error" not in capfd.readouterr().err
+
+
+def test_leaves_logging_as_the_caller_set_it(capfd):
+    RDLogger.DisableLog("rdApp.*")
+    try:
+        _smiles_to_inchikey("aspirin")
+        Chem.MolFromSmiles("C1CC")
+        assert "SMILES Parse Error" not in capfd.readouterr().err
+    finally:
+        RDLogger.EnableLog("rdApp.*")
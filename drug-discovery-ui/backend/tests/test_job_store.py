@@ -0,0 +1,109 @@
+import threading
+from time import time
+
+from app.utils.job_store import JobStore
+
+
+def _store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_claim_takes_oldest_and_counts_attempt(tmp_path):
+    store = _store(tmp_path)
+    first = store.create("generator", {"n": 1})
+    store.create("generator", {"n": 2})
+    job = store.claim()
+    assert job["id"] == first["id"]
+    assert job["status"] == "running"
+    assert job["attempts"] == 1
+    assert job["payload"] == {"n": 1}
+
+
+def test_claim_is_atomic_across_connections(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    JobStore(path).create("generator", {})
+    claimed = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        # one store per thread, like separate worker processes
+        store = JobStore(path)
+        barrier.wait()
+        claimed.append(store.claim())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len([j for j in claimed if j is not None]) == 1
+
+
+def test_claim_empty_queue(tmp_path):
+    assert _store(tmp_path).claim() is None
+
+
+def test_requeue_does_not_count_attempt(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("retro", {})
+    store.claim()
+    store.requeue(job["id"])
+    again = store.get(job["id"])
+    assert again["status"] == "queued"
+    assert again["attempts"] == 0
+    assert store.claim()["attempts"] == 1
+
+
+def test_recover_requeues_stale_jobs(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("docking", {})
+    store.claim()
+    assert store.recover(stale_before=time() - 60, max_attempts=3) == (0, 0)
+    assert store.recover(stale_before=time() + 1, max_attempts=3) == (1, 0)
+    assert store.get(job["id"])["status"] == "queued"
+    assert store.claim()["attempts"] == 2
+
+
+def test_recover_fails_jobs_out_of_attempts(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("docking", {})
+    for _ in range(2):
+        store.claim()
+        store.recover(stale_before=time() + 1, max_attempts=2)
+    failed = store.get(job["id"])
+    assert failed["status"] == "failed"
+    assert failed["attempts"] == 2
+    assert failed["finished"] is not None
+
+
+def test_recover_cancels_flagged_jobs(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("generator", {})
+    store.claim()
+    assert store.request_cancel(job["id"])["cancel"] is True
+    assert store.heartbeat([job["id"]]) == [job["id"]]
+    assert store.recover(stale_before=time() + 1, max_attempts=3) == (1, 0)
+    cancelled = store.get(job["id"])
+    assert cancelled["status"] == "cancelled"
+    assert cancelled["finished"] is not None
+    assert store.claim() is None
+
+
+def test_cancel_queued_job_is_immediate(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("generator", {})
+    assert store.request_cancel(job["id"])["status"] == "cancelled"
+    assert store.claim() is None
+
+
+def test_finish_only_applies_to_running_jobs(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("generator", {})
+    store.finish(job["id"], "succeeded", result={"ok": True})
+    assert store.get(job["id"])["status"] == "queued"
+    store.claim()
+    store.finish(job["id"], "succeeded", result={"ok": True})
+    done = store.get(job["id"])
+    assert done["status"] == "succeeded"
+    assert done["result"] == {"ok": True}
+    assert store.purge(finished_before=time() + 1) == 1
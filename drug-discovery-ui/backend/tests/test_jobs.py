@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core import jobs
+from app.core.config import get_settings
+from app.core.jobs import JobRunner
+from app.core.metrics import current_route
+from app.utils.job_store import JobStore
+
+
+class Req(BaseModel):
+    n: int = 0
+
+
+class Resp(BaseModel):
+    ok: bool = True
+    n: int = 0
+
+
+def _runner(tmp_path, handler):
+    runner = JobRunner()
+    runner._store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    runner.register("test", Req, handler)
+    return runner
+
+
+async def _start(runner, n=0):
+    job = await runner.submit("test", Req(n=n))
+    claimed = runner.store.claim()
+    assert claimed["id"] == job["id"]
+    return job["id"], asyncio.create_task(runner._execute(claimed))
+
+
+def test_success_stores_result_and_last_progress(tmp_path):
+    async def handler(req, report):
+        report({"step": 1})
+        report({"step": 2})  # within the progress interval: held back until the end
+        return Resp(n=req.n * 2)
+
+    runner = _runner(tmp_path, handler)
+
+    async def main():
+        job_id, task = await _start(runner, n=21)
+        await task
+        return runner.store.get(job_id)
+
+    job = asyncio.run(main())
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"ok": True, "n": 42}
+    assert job["progress"] == {"step": 2}
+    assert runner.stats["succeeded"] == 1
+
+
+def test_unsuccessful_result_marks_job_failed(tmp_path):
+    async def handler(req, report):
+        return {"ok": False, "error": "no candidates"}
+
+    runner = _runner(tmp_path, handler)
+
+    async def main():
+        job_id, task = await _start(runner)
+        await task
+        return runner.store.get(job_id)
+
+    job = asyncio.run(main())
+    assert job["status"] == "failed"
+    assert job["error"] == "no candidates"
+
+
+def test_cancel_running_job(tmp_path):
+    async def handler(req, report):
+        await asyncio.sleep(60)
+
+    runner = _runner(tmp_path, handler)
+
+    async def main():
+        job_id, task = await _start(runner)
+        await asyncio.sleep(0.05)
+        await runner.cancel(job_id)
+        await asyncio.wait_for(task, 5)
+        return runner.store.get(job_id)
+
+    job = asyncio.run(main())
+    assert job["status"] == "cancelled"
+    assert runner.stats["cancelled"] == 1
+    assert not runner.running
+
+
+def test_job_past_its_budget_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOB_TIMEOUT_DEFAULT", 0.05)
+    monkeypatch.setattr(jobs, "_GRACE", 0.05)
+
+    async def handler(req, report):
+        # ignores its deadline, so the runner has to cut it off
+        await asyncio.sleep(60)
+
+    runner = _runner(tmp_path, handler)
+
+    async def main():
+        job_id, task = await _start(runner)
+        await asyncio.wait_for(task, 5)
+        return runner.store.get(job_id)
+
+    job = asyncio.run(main())
+    assert job["status"] == "failed"
+    assert "limit" in job["error"]
+    assert runner.stats["timed_out"] == 1
+
+
+def test_shutdown_requeues_running_job(tmp_path):
+    async def handler(req, report):
+        await asyncio.sleep(60)
+
+    runner = _runner(tmp_path, handler)
+
+    async def main():
+        job_id, task = await _start(runner)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return runner.store.get(job_id)
+
+    job = asyncio.run(main())
+    assert job["status"] == "queued"
+    assert job["attempts"] == 0
+    assert runner.stats["requeued"] == 1
+
+
+def test_unknown_kind_fails(tmp_path):
+    runner = _runner(tmp_path, None)
+    job = runner.store.create("missing", {})
+
+    async def main():
+        await runner._execute(runner.store.claim())
+
+    asyncio.run(main())
+    assert runner.store.get(job["id"])["status"] == "failed"
+
+
+def test_submit_rejects_when_queue_is_full(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOB_MAX_PENDING", 1)
+    runner = _runner(tmp_path, None)
+
+    async def main():
+        await runner.submit("test", Req())
+        with pytest.raises(HTTPException) as e:
+            await runner.submit("test", Req())
+        return e.value.status_code
+
+    assert asyncio.run(main()) == 429
+
+
+def test_usage_is_filed_under_the_job_kind(tmp_path):
+    routes = []
+
+    async def handler(req, report):
+        routes.append(current_route.get())
+        return Resp()
+
+    runner = _runner(tmp_path, handler)
+
+    async def main():
+        _, task = await _start(runner)
+        await task
+
+    asyncio.run(main())
+    assert routes == ["job:test"]
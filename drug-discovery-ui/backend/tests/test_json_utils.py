@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from app.utils.json_utils import JSONExtractionError, StreamingJSONExtractor, extract_json
+
+DOC = {
+    "preparationSteps": ["add hydrogens", "assign {charges}"],
+    "poseScore": -7.5,
+    "notes": 'quote " and brace } inside',
+    "sites": [{"id": "s1", "residues": ["HIS41"]}, {"id": "s2", "residues": []}],
+    "empty": [],
+}
+TEXT = "Here is the analysis:\n```json\n" + json.dumps(DOC, indent=2) + "\n```\nLet me know!"
+
+
+def _feed(text, size):
+    ext = StreamingJSONExtractor()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(ext.feed(text[i:i + size]))
+    return ext, events
+
+
+def test_whole_text_with_prose_and_fence():
+    assert extract_json(TEXT) == DOC
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_chunking_does_not_change_events_or_result(size):
+    whole, whole_events = _feed(TEXT, len(TEXT))
+    chunked, events = _feed(TEXT, size)
+    assert events == whole_events
+    assert chunked.result() == whole.result() == DOC
+
+
+def test_events_for_members_and_array_elements():
+    _, events = _feed(TEXT, 5)
+    assert ((("preparationSteps", 0), "add hydrogens")) in events
+    assert ((("sites", 1), {"id": "s2", "residues": []})) in events
+    assert (("poseScore",), -7.5) in events
+    members = [path[0] for path, _ in events if len(path) == 1]
+    assert members == list(DOC)
+
+
+def test_truncated_inside_a_member_keeps_completed_members():
+    text = '{"a": 1, "b": "unterminated str'
+    assert extract_json(text) == {"a": 1}
+
+
+def test_truncated_inside_an_array_keeps_completed_elements():
+    text = '{"a": 1, "b": [{"x": 1}, {"x": 2}, {"x": 3'
+    assert extract_json(text) == {"a": 1, "b": [{"x": 1}, {"x": 2}]}
+
+
+@pytest.mark.parametrize("cut", range(1, len(json.dumps(DOC))))
+def test_every_truncation_point_yields_a_prefix_of_the_members(cut):
+    text = json.dumps(DOC)[:cut]
+    try:
+        obj = extract_json(text)
+    except JSONExtractionError:
+        return
+    for key, value in obj.items():
+        if isinstance(value, list) and key in DOC:
+            assert value == DOC[key][:len(value)]
+        else:
+            assert value == DOC[key]
+
+
+def test_trailing_commas_are_tolerated():
+    assert extract_json('{"a": [1, 2,], "b": 3,}') == {"a": [1, 2], "b": 3}
+
+
+def test_text_after_the_object_is_ignored():
+    ext = StreamingJSONExtractor()
+    ext.feed('{"a": 1} and {"b": 2}')
+    assert ext.done
+    assert ext.feed('more') == []
+    assert ext.result() == {"a": 1}
+
+
+def test_no_object_raises():
+    with pytest.raises(JSONExtractionError):
+        extract_json("I cannot help with that.")
@@ -0,0 +1,23 @@
+import asyncio
+
+from app.core.metrics import current_route
+from app.services.prefetcher import Prefetcher
+
+
+def test_refresh_files_usage_under_the_task():
+    routes = []
+
+    async def loader():
+        routes.append(current_route.get())
+        return {"ok": True}
+
+    async def builder(params):
+        return f"molecule:props:prefetch-test-{params['name']}", loader
+
+    prefetcher = Prefetcher()
+    prefetcher.register("props", builder)
+    asyncio.run(prefetcher._refresh("props", {"name": "aspirin"}))
+
+    assert routes == ["prefetch:props"]
+    assert prefetcher.stats["refreshes"] == 1
+    assert current_route.get() == "-"
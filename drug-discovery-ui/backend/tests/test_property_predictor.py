@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.core.config import get_settings
+from app.services import candidate_pool, property_predictor
+
+_TOXICITY = {"score": 5, "level": "Low", "explanation": "model"}
+
+
+class _FakeLLM:
+    def __init__(self):
+        self.calls = []
+
+    def props_chunk_size(self, kind="properties"):
+        return 10 if kind == "properties" else 40
+
+    async def predict_toxicity(self, name, smiles):
+        self.calls.append(("toxicity", [name]))
+        return {"toxicity": _TOXICITY}
+
+    async def predict_properties(self, name, smiles):
+        self.calls.append(("properties", [name]))
+        return {"toxicity": _TOXICITY, "solubility": {"value": 1}}
+
+    async def predict_toxicity_batch(self, molecules, concurrency=None, on_result=None):
+        self.calls.append(("toxicity", [name for name, _ in molecules]))
+        for i in range(len(molecules)):
+            on_result(i, {"toxicity": _TOXICITY})
+        return [{"toxicity": _TOXICITY} for _ in molecules]
+
+    async def predict_properties_batch(self, molecules, concurrency=None, on_result=None):
+        self.calls.append(("properties", [name for name, _ in molecules]))
+        return [{"toxicity": _TOXICITY, "solubility": {"value": 1}} for _ in molecules]
+
+
+@pytest.fixture
+def predictor_mode(monkeypatch):
+    def use(value):
+        monkeypatch.setattr(get_settings(), "PROPERTY_PREDICTOR_MODE", value)
+    return use
+
+
+def test_hybrid_asks_only_for_toxicity(predictor_mode):
+    predictor_mode("hybrid")
+    llm = _FakeLLM()
+    result = asyncio.run(property_predictor.predict(llm, "ethanol", "CCO"))
+    assert llm.calls == [("toxicity", ["ethanol"])]
+    assert result["toxicity"] == _TOXICITY
+    assert result["solubility"] != {"value": 1}
+
+
+def test_hybrid_batch_splits_by_local_result(predictor_mode):
+    predictor_mode("hybrid")
+    llm = _FakeLLM()
+    arrived = {}
+    results = asyncio.run(property_predictor.predict_many(
+        llm, [("ethanol", "CCO"), ("unknown", None), ("benzene", "c1ccccc1")],
+        on_result=lambda i, props: arrived.setdefault(i, props)))
+    assert sorted(llm.calls) == [("properties", ["unknown"]), ("toxicity", ["ethanol", "benzene"])]
+    assert results[1] == {"toxicity": _TOXICITY, "solubility": {"value": 1}}
+    assert results[0]["toxicity"] == results[2]["toxicity"] == _TOXICITY
+    assert set(arrived) == {0, 2}
+
+
+def test_completions_follow_the_prompt_kind(predictor_mode):
+    llm = _FakeLLM()
+    predictor_mode("llm")
+    assert property_predictor.completions_for(llm, 41) == 5
+    predictor_mode("hybrid")
+    assert property_predictor.completions_for(llm, 41) == 2
+    predictor_mode("local")
+    assert property_predictor.completions_for(llm, 41) == 0
+
+
+def test_pool_key_depends_on_predictor_mode(predictor_mode):
+    keys = set()
+    for value in property_predictor.MODES:
+        predictor_mode(value)
+        keys.add(candidate_pool.pool_key("EGFR", {"groups": "amide"}))
+    assert len(keys) == len(property_predictor.MODES)
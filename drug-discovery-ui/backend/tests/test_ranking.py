@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from app.utils import ranking
+from app.utils.ranking import pareto_fronts, rank_candidates
+
+
+def _dominates(a, b):
+    return bool(np.all(a >= b) and np.any(a > b))
+
+
+def _oracle_fronts(x):
+    """O(n^2) non-dominated sorting by repeated peeling."""
+    values = np.nan_to_num(x, nan=-1.0)
+    fronts = np.full(len(x), -1)
+    remaining = list(range(len(x)))
+    front = 0
+    while remaining:
+        best = [i for i in remaining if not any(_dominates(values[j], values[i]) for j in remaining if j != i)]
+        for i in best:
+            fronts[i] = front
+        remaining = [i for i in remaining if i not in best]
+        front += 1
+    return fronts
+
+
+@pytest.mark.parametrize("seed", range(12))
+@pytest.mark.parametrize("block", [3, 256])
+def test_pareto_fronts_match_brute_force(seed, block, monkeypatch):
+    monkeypatch.setattr(ranking, "_BLOCK", block)
+    rng = np.random.default_rng(seed)
+    n, k = rng.integers(1, 60), rng.integers(1, 7)
+    # few distinct levels so ties and duplicates are common
+    x = rng.integers(0, 4, size=(n, k)) / 3.0
+    x[rng.random((n, k)) < 0.1] = np.nan
+    assert np.array_equal(pareto_fronts(x), _oracle_fronts(x))
+
+
+def test_pareto_fronts_stop_peeling_when_enough_are_ranked():
+    x = np.array([[i, i] for i in range(10)], dtype=float)
+    fronts = pareto_fronts(x, needed=3)
+    assert list(fronts[-3:]) == [2, 1, 0]
+    assert set(fronts[:-3]) == {3}
+
+
+def test_pareto_fronts_empty():
+    assert pareto_fronts(np.zeros((0, 6))).size == 0
+
+
+def _props(tox=20, sol=70, dl=60, bio=50, ro5=True, bbb=False):
+    return {"toxicity": {"score": tox}, "solubility": {"score": sol}, "drugLikeness": {"score": dl},
+            "bioavailability": {"percentage": bio}, "lipinskiRules": {"passes": ro5},
+            "bbbPenetration": {"canCross": bbb}}
+
+
+def test_rank_candidates_pareto_orders_by_front_then_score():
+    candidates = [
+        {"smiles": "dominated", "properties": _props(tox=50, sol=50)},
+        {"smiles": "best", "properties": _props(tox=10, sol=90)},
+        {"smiles": "none", "properties": None},
+    ]
+    ranked = rank_candidates(candidates, {}, mode="pareto")
+    assert [c["smiles"] for c in ranked] == ["best", "dominated", "none"]
+    assert [c["paretoFront"] for c in ranked][:2] == [0, 1]
+    # candidates without properties go behind every front
+    assert ranked[-1]["paretoFront"] > 1
+    assert ranked[-1]["score"] == 0.0
+
+
+def test_pareto_ignores_objectives_with_zero_weight():
+    # BBB has weight 0 unless bbbNo is set, so it must not split the fronts either
+    candidates = [{"smiles": "cns", "properties": _props(bbb=True)},
+                  {"smiles": "peripheral", "properties": _props(bbb=False)}]
+    weighted = rank_candidates([dict(c) for c in candidates], {"bbbNo": False})
+    pareto = rank_candidates([dict(c) for c in candidates], {"bbbNo": False}, mode="pareto")
+    assert weighted[0]["score"] == weighted[1]["score"]
+    assert [c["paretoFront"] for c in pareto] == [0, 0]
+    # once bbbNo asks for it, staying out of the brain wins in both modes
+    pareto = rank_candidates([dict(c) for c in candidates], {"bbbNo": True}, mode="pareto")
+    assert [(c["smiles"], c["paretoFront"]) for c in pareto] == [("peripheral", 0), ("cns", 1)]
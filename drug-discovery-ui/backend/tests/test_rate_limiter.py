@@ -0,0 +1,22 @@
+import asyncio
+
+from app.utils.molecule_utils import BoundedCache, RateLimiter
+
+
+def test_cost_is_charged_against_the_budget():
+    limiter = RateLimiter(BoundedCache(), max_per_minute=10)
+
+    async def main():
+        return [await limiter.allow("batch", cost=8), await limiter.allow("batch", cost=3),
+                await limiter.allow("other")]
+
+    assert asyncio.run(main()) == [True, False, True]
+
+
+def test_single_calls_share_the_window():
+    limiter = RateLimiter(BoundedCache(), max_per_minute=3)
+
+    async def main():
+        return [await limiter.allow("k") for _ in range(4)]
+
+    assert asyncio.run(main()) == [True, True, True, False]
@@ -0,0 +1,185 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from app.utils.resp_cache import RedisCache, RespClient, RespError
+from app.utils.resp_server import RespStore, _read_command, encode, make_handler
+
+
+class _Server:
+    """The bundled RESP server on an ephemeral port, run on its own loop in a thread."""
+
+    def __init__(self, handler_factory=make_handler):
+        self.store = RespStore()
+        self._handler = handler_factory(self.store)
+        self._ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        assert self._ready.wait(5)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handler, "127.0.0.1", 0))
+        self.url = "redis://127.0.0.1:%d/0" % self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _shutdown(self):
+        self._server.close()
+        handlers = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in handlers:
+            t.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+
+
+@pytest.fixture
+def server():
+    srv = _Server()
+    yield srv
+    srv.close()
+
+
+@pytest.fixture
+def shared(server):
+    cache = RedisCache(server.url, ttl_seconds=60)
+    yield cache
+    cache.close()
+
+
+def test_set_get_round_trip(shared):
+    shared.set("molecule:props:x", {"score": 1, "tags": ["a"]}, ttl=30)
+    shared.flush()
+    value, expires_at = shared.lookup("molecule:props:x")
+    assert value == {"score": 1, "tags": ["a"]}
+    assert 25 < expires_at - time.time() <= 30.5
+    assert shared.get("missing") is None
+    assert shared.stats()["hits"] == 1
+
+
+def test_px_expiry(shared):
+    shared.set("short", "v", ttl=0.1)
+    shared.flush()
+    assert shared.get("short") == "v"
+    time.sleep(0.2)
+    assert shared.get("short") is None
+
+
+def test_delete(shared):
+    shared.set("k", 1)
+    shared.delete("k")
+    shared.flush()
+    assert shared.get("k") is None
+
+
+def test_incr_counts_and_expires(server, shared):
+    assert [shared.incr("ratelimit:a:1", ttl=60) for _ in range(3)] == [1, 2, 3]
+    assert 0 < server.store.cmd_pttl(b"dd:ratelimit:a:1") <= 60000
+    assert shared.incr("window", ttl=0.1) == 1
+    time.sleep(0.2)
+    assert shared.incr("window", ttl=0.1) == 1
+
+
+def test_incr_by_amount(shared):
+    assert shared.incr("cost", ttl=60, amount=5) == 5
+    assert shared.incr("cost", ttl=60) == 6
+
+
+def test_async_reads(shared):
+    shared.set("k", [1, 2])
+    shared.flush()
+
+    async def main():
+        return await shared.aget("k"), await shared.aincr("c", ttl=60), await shared.aincr("c", ttl=60)
+
+    assert asyncio.run(main()) == ([1, 2], 1, 2)
+
+
+def test_unreachable_server_degrades():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    cache = RedisCache("redis://127.0.0.1:%d/0" % port)
+    try:
+        assert cache.get("k") is None
+        assert cache.incr("k", ttl=60) == 0
+        assert cache.errors == 2
+    finally:
+        cache.close()
+
+
+def _dropping_server():
+    """Accepts connections, records what arrives, then hangs up without replying."""
+    received = []
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(8)
+
+    def accept():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            received.append(conn.recv(65536))
+            conn.close()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return srv, "redis://127.0.0.1:%d/0" % srv.getsockname()[1], received
+
+
+def test_incr_is_not_resent_after_a_drop():
+    srv, url, received = _dropping_server()
+    client = RespClient(url)
+    try:
+        with pytest.raises(RespError):
+            client.pipeline([["INCR", "k"], ["PTTL", "k"]])
+        assert len(received) == 1
+    finally:
+        client.close()
+        srv.close()
+
+
+def test_idempotent_commands_are_retried_once():
+    srv, url, received = _dropping_server()
+    client = RespClient(url)
+    try:
+        with pytest.raises(RespError):
+            client.pipeline([["GET", "k"], ["PTTL", "k"]])
+        assert len(received) == 2
+    finally:
+        client.close()
+        srv.close()
+
+
+def _one_reply_handler(store):
+    """Answers one command per connection, then hangs up (as a restarted server would)."""
+    async def handle(reader, writer):
+        writer.write(encode(store.execute(await _read_command(reader))))
+        await writer.drain()
+        writer.close()
+    return handle
+
+
+def test_closed_connection_is_replaced_before_sending():
+    server = _Server(_one_reply_handler)
+    client = RespClient(server.url)
+    try:
+        assert client.execute("INCR", "k") == 1
+        time.sleep(0.05)
+        # the server hung up; the client notices before writing, so INCR runs exactly once more
+        assert client.execute("INCR", "k") == 2
+        assert server.store.cmd_get(b"k") == b"2"
+    finally:
+        client.close()
+        server.close()